@@ -6,37 +6,124 @@ can be overridden in tests via `app.dependency_overrides`.
 
 The dependency graph:
     get_jwks_client -> SupabaseJWKSClient singleton (PyJWKClient)
-    validate_token -> get_jwks_client, (auth — populates request.state)
-    get_db_client -> DBClient singleton
-    get_storage_client -> StorageClient singleton
-    get_file_repository -> FileRepository(db_client)
-    get_file_facade -> FileFacade(file_repository, storage_client) -> FileFacade(FileRepository(DBClient()), StorageClient())
+    validate_token -> get_jwks_client, get_verified_claims_cache (auth — populates request.state)
+    get_async_db_client -> AsyncDBClient singleton
+    get_async_storage_client -> AsyncStorageClient singleton
+    get_async_file_repository -> AsyncFileRepository(async_db_client)
+    get_async_blob_repository -> AsyncBlobRepository(async_db_client)
+    get_async_storage_delete_queue -> AsyncStorageDeleteQueueRepository(async_db_client)
+    get_async_usage_repository -> AsyncUsageRepository(async_db_client)
+    get_listing_cache -> ListingCache singleton
+    get_download_url_cache -> DownloadURLCache singleton
+    get_upload_verification_cache -> UploadVerificationCache singleton
+    get_multipart_client -> MultipartUploadClient singleton
+    get_async_single_flight -> AsyncSingleFlight singleton (coalesces identical concurrent reads)
+    get_download_proxy -> DownloadProxy singleton (streams objects for GET /files/{id}/content)
+    get_async_file_facade -> AsyncFileFacade(
+        async_file_repository, async_storage_client, listing_cache, download_url_cache, async_blob_repository,
+        async_storage_delete_queue, upload_verification_cache, async_single_flight, async_usage_repository,
+    )
+    get_async_multipart_file_facade -> get_async_file_facade, multipart_client
+        (resumable upload, confirm and delete routes only, so a multipart misconfiguration cannot break the others)
+
+Route handlers are ``async def`` and so are these providers, so FastAPI
+resolves them on the event loop instead of dispatching each one to the
+threadpool.
 """
 
 from __future__ import annotations
 
 from fastapi import Depends
 
-from app.core.db import DBClient
+from app.core.cache import DownloadURLCache, ListingCache, UploadVerificationCache
+from app.core.db import AsyncDBClient
+from app.core.download_proxy import DownloadProxy
+from app.core.multipart import MultipartUploadClient
 from app.core.security import validate_token  # noqa: F401 — re-exported
-from app.core.storage import StorageClient
-from app.facades.file_facade import FileFacade
-from app.repositories.file_repository import FileRepository
+from app.core.storage import AsyncStorageClient
+from app.facades.file_facade import AsyncFileFacade
+from app.repositories.blob_repository import AsyncBlobRepository
+from app.repositories.file_repository import AsyncFileRepository
+from app.repositories.storage_delete_queue_repository import AsyncStorageDeleteQueueRepository
+from app.repositories.usage_repository import AsyncUsageRepository
+from app.utils.singleflight import AsyncSingleFlight
+
+
+async def get_listing_cache() -> ListingCache:
+    return ListingCache()
+
+
+async def get_download_url_cache() -> DownloadURLCache:
+    return DownloadURLCache()
+
+
+async def get_upload_verification_cache() -> UploadVerificationCache:
+    return UploadVerificationCache()
+
+
+async def get_multipart_client() -> MultipartUploadClient:
+    return MultipartUploadClient()
+
+
+async def get_async_single_flight() -> AsyncSingleFlight:
+    return AsyncSingleFlight()
+
+
+async def get_download_proxy() -> DownloadProxy:
+    return DownloadProxy()
+
+
+async def get_async_db_client() -> AsyncDBClient:
+    return AsyncDBClient()
+
+
+async def get_async_storage_client() -> AsyncStorageClient:
+    return AsyncStorageClient()
+
+
+async def get_async_file_repository(db_client: AsyncDBClient = Depends(get_async_db_client)) -> AsyncFileRepository:
+    return AsyncFileRepository(db_client)
+
+
+async def get_async_blob_repository(db_client: AsyncDBClient = Depends(get_async_db_client)) -> AsyncBlobRepository:
+    return AsyncBlobRepository(db_client)
 
 
-def get_db_client() -> DBClient:
-    return DBClient()
+async def get_async_storage_delete_queue(db_client: AsyncDBClient = Depends(get_async_db_client)) -> AsyncStorageDeleteQueueRepository:
+    return AsyncStorageDeleteQueueRepository(db_client)
 
 
-def get_storage_client() -> StorageClient:
-    return StorageClient()
+async def get_async_usage_repository(db_client: AsyncDBClient = Depends(get_async_db_client)) -> AsyncUsageRepository:
+    return AsyncUsageRepository(db_client)
 
 
-def get_file_repository(db_client: DBClient = Depends(get_db_client)) -> FileRepository:
-    return FileRepository(db_client)
+async def get_async_file_facade(
+    file_repository: AsyncFileRepository = Depends(get_async_file_repository),
+    storage_client: AsyncStorageClient = Depends(get_async_storage_client),
+    listing_cache: ListingCache = Depends(get_listing_cache),
+    download_url_cache: DownloadURLCache = Depends(get_download_url_cache),
+    blob_repository: AsyncBlobRepository = Depends(get_async_blob_repository),
+    delete_queue: AsyncStorageDeleteQueueRepository = Depends(get_async_storage_delete_queue),
+    verification_cache: UploadVerificationCache = Depends(get_upload_verification_cache),
+    single_flight: AsyncSingleFlight = Depends(get_async_single_flight),
+    usage_repository: AsyncUsageRepository = Depends(get_async_usage_repository),
+) -> AsyncFileFacade:
+    return AsyncFileFacade(
+        file_repository,
+        storage_client,
+        listing_cache=listing_cache,
+        download_url_cache=download_url_cache,
+        blob_repository=blob_repository,
+        delete_queue=delete_queue,
+        verification_cache=verification_cache,
+        single_flight=single_flight,
+        usage_repository=usage_repository,
+    )
 
 
-def get_file_facade(
-    file_repository: FileRepository = Depends(get_file_repository), storage_client: StorageClient = Depends(get_storage_client)
-) -> FileFacade:
-    return FileFacade(file_repository, storage_client)
+async def get_async_multipart_file_facade(
+    facade: AsyncFileFacade = Depends(get_async_file_facade),
+    multipart_client: MultipartUploadClient = Depends(get_multipart_client),
+) -> AsyncFileFacade:
+    """The file facade with multipart uploads, for the routes that start, finish or discard resumable uploads."""
+    return facade.with_multipart_client(multipart_client)
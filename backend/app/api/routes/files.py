@@ -1,13 +1,37 @@
 from __future__ import annotations
 
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
-from app.api.deps import get_file_facade, validate_token
+from app.api.deps import get_async_file_facade, get_async_multipart_file_facade, get_download_proxy, validate_token
 from app.constants.constants import DEFAULT_PAGE_LIMIT, DEFAULT_PAGE_SKIP, MAX_PAGE_LIMIT
-from app.facades.file_facade import FileFacade
-from app.models.schemas import ConfirmUploadRequest, ConfirmUploadResponse, DownloadURLResponse, FileListResponse, UploadURLRequest, UploadURLResponse
+from app.core.download_proxy import DownloadProxy
+from app.facades.file_facade import AsyncFileFacade
+from app.models.enums import CountMode
+from app.models.schemas import (
+    BatchDownloadURLRequest,
+    BatchDownloadURLResponse,
+    BatchUploadURLRequest,
+    BatchUploadURLResponse,
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    ConfirmUploadRequest,
+    ConfirmUploadResponse,
+    DownloadURLResponse,
+    FileListResponse,
+    FileSearchQuery,
+    ResumablePartURLsRequest,
+    ResumablePartURLsResponse,
+    ResumableUploadRequest,
+    ResumableUploadSessionResponse,
+    ResumableUploadStatusResponse,
+    StorageUsageResponse,
+    UploadURLRequest,
+    UploadURLResponse,
+)
+from app.utils.exceptions import FileNotFoundError
 
 router = APIRouter(prefix="/api/v1/files", tags=["Files"], dependencies=[Depends(validate_token)])
 
@@ -20,12 +44,112 @@ router = APIRouter(prefix="/api/v1/files", tags=["Files"], dependencies=[Depends
     responses={
         400: {"description": "Invalid file type or size"},
         401: {"description": "Not authenticated"},
+        413: {"description": "Storage quota exceeded"},
+        502: {"description": "Storage service error"},
+    },
+)
+async def create_upload_url(body: UploadURLRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_file_facade)) -> UploadURLResponse:
+    """
+    Create an ``uploading`` record and return a presigned upload URL.
+
+    If ``sha256`` is given and identical content is already stored, the file
+    is recorded as ``uploaded`` straight away and the response has
+    ``already_present=true`` and no ``upload_url``: skip the transfer and the
+    confirm call.
+    """
+    user_id: str = request.state.user_id
+    return await facade.generate_upload_url(user_id, body)
+
+
+@router.post(
+    "/upload-urls",
+    response_model=BatchUploadURLResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Generate presigned upload URLs for many files",
+    responses={401: {"description": "Not authenticated"}},
+)
+async def create_upload_urls(
+    body: BatchUploadURLRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_file_facade)
+) -> BatchUploadURLResponse:
+    """
+    Create one ``uploading`` record and presigned upload URL per item, in
+    request order. Items that fail validation or signing carry a per-item
+    ``error`` and are not persisted.
+    """
+    user_id: str = request.state.user_id
+    return await facade.generate_upload_urls(user_id, body.files)
+
+
+@router.post(
+    "/resumable",
+    response_model=ResumableUploadSessionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Start a resumable (multipart) upload",
+    responses={
+        400: {"description": "Invalid file type or size"},
+        401: {"description": "Not authenticated"},
+        413: {"description": "Storage quota exceeded"},
         502: {"description": "Storage service error"},
     },
 )
-def create_upload_url(body: UploadURLRequest, request: Request, facade: FileFacade = Depends(get_file_facade)) -> UploadURLResponse:
+async def start_resumable_upload(
+    body: ResumableUploadRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)
+) -> ResumableUploadSessionResponse:
+    """
+    Create an ``uploading`` record for a large file and open a multipart
+    upload. The response tells the client the part size, part count and how
+    many parts to upload in parallel.
+    """
     user_id: str = request.state.user_id
-    return facade.generate_upload_url(user_id, body)
+    return await facade.start_resumable_upload(user_id, body)
+
+
+@router.get(
+    "/{file_id}/resumable",
+    response_model=ResumableUploadStatusResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get the progress of a resumable upload",
+    responses={400: {"description": "Not a resumable upload"}, 401: {"description": "Not authenticated"}, 404: {"description": "File not found"}},
+)
+async def get_resumable_status(
+    file_id: UUID, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)
+) -> ResumableUploadStatusResponse:
+    """
+    Return the byte ranges already stored and the parts still missing, so an
+    interrupted client can resume by re-sending only those parts.
+    """
+    user_id: str = request.state.user_id
+    return await facade.get_resumable_status(user_id, str(file_id))
+
+
+@router.post(
+    "/{file_id}/resumable/parts",
+    response_model=ResumablePartURLsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate presigned upload URLs for parts of a resumable upload",
+    responses={400: {"description": "Invalid part numbers"}, 401: {"description": "Not authenticated"}, 404: {"description": "File not found"}},
+)
+async def get_resumable_part_urls(
+    file_id: UUID, body: ResumablePartURLsRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)
+) -> ResumablePartURLsResponse:
+    user_id: str = request.state.user_id
+    return await facade.get_resumable_part_urls(user_id, str(file_id), body.part_numbers)
+
+
+@router.post(
+    "/{file_id}/resumable/complete",
+    response_model=ConfirmUploadResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Finalize a resumable upload",
+    responses={400: {"description": "Parts still missing"}, 401: {"description": "Not authenticated"}, 404: {"description": "File not found"}},
+)
+async def finalize_resumable_upload(file_id: UUID, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)) -> ConfirmUploadResponse:
+    """
+    Assemble the uploaded parts into the final object and mark the file
+    ``uploaded``. Fails with 400 while any part is missing.
+    """
+    user_id: str = request.state.user_id
+    return await facade.finalize_resumable_upload(user_id, str(file_id))
 
 
 @router.patch(
@@ -33,18 +157,25 @@ def create_upload_url(body: UploadURLRequest, request: Request, facade: FileFaca
     response_model=ConfirmUploadResponse,
     status_code=status.HTTP_200_OK,
     summary="Confirm or fail an upload",
-    responses={400: {"description": "Invalid status transition"}, 401: {"description": "Not authenticated"}, 404: {"description": "File not found"}},
+    responses={
+        400: {"description": "Invalid status transition, or the stored object is missing or does not match"},
+        401: {"description": "Not authenticated"},
+        404: {"description": "File not found"},
+        502: {"description": "Storage service error"},
+    },
 )
-def confirm_upload(
-    file_id: UUID, body: ConfirmUploadRequest, request: Request, facade: FileFacade = Depends(get_file_facade)
+async def confirm_upload(
+    file_id: UUID, body: ConfirmUploadRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)
 ) -> ConfirmUploadResponse:
     """
     Transition a file from ``uploading`` to ``uploaded`` or ``failed``.
 
-    If ``failed``, the storage object and DB record are cleaned up.
+    Before ``uploaded`` is accepted, the object's Storage metadata is checked
+    for existence and size (and MIME type if enabled); the bytes are never
+    downloaded. If ``failed``, the storage object and DB record are cleaned up.
     """
     user_id: str = request.state.user_id
-    return facade.confirm_upload(user_id, str(file_id), body)
+    return await facade.confirm_upload(user_id, str(file_id), body)
 
 
 @router.get(
@@ -52,16 +183,62 @@ def confirm_upload(
     response_model=FileListResponse,
     status_code=status.HTTP_200_OK,
     summary="List user files (paginated)",
-    responses={401: {"description": "Not authenticated"}},
+    responses={400: {"description": "Invalid pagination cursor"}, 401: {"description": "Not authenticated"}},
 )
-def list_files(
+async def list_files(
     request: Request,
     skip: int = Query(default=DEFAULT_PAGE_SKIP, ge=0, description="Rows to skip"),
     limit: int = Query(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT, description="Max rows to return"),
-    facade: FileFacade = Depends(get_file_facade),
+    cursor: str | None = Query(default=None, description="Opaque `next_cursor` from the previous page; overrides `skip`"),
+    count: CountMode = Query(default=CountMode.EXACT, description="How to compute `total`: exact, estimated or none"),
+    facade: AsyncFileFacade = Depends(get_async_file_facade),
+) -> FileListResponse:
+    """
+    List the user's uploaded files, newest first.
+
+    Prefer ``cursor`` over ``skip`` for deep pages: it seeks directly to the
+    next page instead of scanning past skipped rows.
+    """
+    user_id: str = request.state.user_id
+    return await facade.list_files(user_id, skip=skip, limit=limit, cursor=cursor, count=count)
+
+
+@router.get(
+    "/search",
+    response_model=FileListResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Search user files",
+    responses={400: {"description": "Invalid pagination cursor"}, 401: {"description": "Not authenticated"}},
+)
+async def search_files(
+    request: Request,
+    search: Annotated[FileSearchQuery, Query()],
+    facade: AsyncFileFacade = Depends(get_async_file_facade),
 ) -> FileListResponse:
+    """
+    Search the user's uploaded files, newest first, by name substring
+    (``q``) or prefix, MIME type, size range and creation-time range.
+
+    Page with ``cursor``; ``total`` is null unless ``count`` asks for it.
+    """
     user_id: str = request.state.user_id
-    return facade.list_files(user_id, skip=skip, limit=limit)
+    return await facade.search_files(user_id, search)
+
+
+@router.get(
+    "/usage",
+    response_model=StorageUsageResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get the user's storage usage and quota",
+    responses={401: {"description": "Not authenticated"}},
+)
+async def get_usage(request: Request, facade: AsyncFileFacade = Depends(get_async_file_facade)) -> StorageUsageResponse:
+    """
+    Return the bytes and number of files the user stores, the bytes of
+    uploads in progress, and the remaining quota.
+    """
+    user_id: str = request.state.user_id
+    return await facade.get_usage(user_id)
 
 
 @router.get(
@@ -71,12 +248,68 @@ def list_files(
     summary="Generate a presigned download URL",
     responses={401: {"description": "Not authenticated"}, 404: {"description": "File not found"}, 502: {"description": "Storage service error"}},
 )
-def get_download_url(file_id: UUID, request: Request, facade: FileFacade = Depends(get_file_facade)) -> DownloadURLResponse:
+async def get_download_url(file_id: UUID, request: Request, facade: AsyncFileFacade = Depends(get_async_file_facade)) -> DownloadURLResponse:
     """
     Return a presigned download URL (valid for 1 hour) for the requested file.
     """
     user_id: str = request.state.user_id
-    return facade.get_download_url(user_id, str(file_id))
+    return await facade.get_download_url(user_id, str(file_id))
+
+
+@router.get(
+    "/{file_id}/content",
+    response_class=Response,
+    status_code=status.HTTP_200_OK,
+    summary="Download a file's content through the API",
+    responses={
+        200: {"description": "The file's content", "content": {"application/octet-stream": {}}},
+        206: {"description": "The requested byte range"},
+        304: {"description": "Not modified (ETag matched If-None-Match)"},
+        401: {"description": "Not authenticated"},
+        404: {"description": "File not found"},
+        416: {"description": "Range not satisfiable"},
+        502: {"description": "Storage service error"},
+        503: {"description": "Too many concurrent downloads"},
+    },
+)
+async def download_file_content(
+    file_id: UUID,
+    request: Request,
+    facade: AsyncFileFacade = Depends(get_async_file_facade),
+    proxy: DownloadProxy = Depends(get_download_proxy),
+) -> Response:
+    """
+    Stream the file's content from Storage through the API, for clients that
+    cannot fetch the presigned URL from ``/download-url`` themselves.
+
+    Supports ``Range`` (``206``) and ``If-None-Match`` against the returned
+    ``ETag`` (``304``). Disabled with ``PROXY_DOWNLOAD_ENABLED=false``.
+    """
+    if not proxy.enabled:
+        raise FileNotFoundError("Streaming downloads are disabled.")
+    user_id: str = request.state.user_id
+    existing, download_url = await facade.get_download_source(user_id, str(file_id))
+    return await proxy.stream(download_url, request.headers, existing["name"], existing["mime_type"])
+
+
+@router.post(
+    "/download-urls",
+    response_model=BatchDownloadURLResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Generate presigned download URLs for many files",
+    responses={401: {"description": "Not authenticated"}, 502: {"description": "Storage service error"}},
+)
+async def get_download_urls(
+    body: BatchDownloadURLRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_file_facade)
+) -> BatchDownloadURLResponse:
+    """
+    Return a presigned download URL per requested file, in request order.
+
+    Files that are missing, not owned by the caller or not yet uploaded get
+    a per-item ``error`` instead of failing the whole request.
+    """
+    user_id: str = request.state.user_id
+    return await facade.get_download_urls(user_id, [str(file_id) for file_id in body.file_ids])
 
 
 @router.delete(
@@ -85,10 +318,27 @@ def get_download_url(file_id: UUID, request: Request, facade: FileFacade = Depen
     summary="Delete a file",
     responses={401: {"description": "Not authenticated"}, 404: {"description": "File not found"}},
 )
-def delete_file(file_id: UUID, request: Request, facade: FileFacade = Depends(get_file_facade)) -> None:
+async def delete_file(file_id: UUID, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)) -> None:
     """
     Hard-delete the file from Supabase Storage and remove the
     ``user_files`` database record.
     """
     user_id: str = request.state.user_id
-    facade.delete_file(user_id, str(file_id))
+    await facade.delete_file(user_id, str(file_id))
+
+
+@router.post(
+    "/bulk-delete",
+    response_model=BulkDeleteResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Delete many files",
+    responses={401: {"description": "Not authenticated"}},
+)
+async def delete_files(body: BulkDeleteRequest, request: Request, facade: AsyncFileFacade = Depends(get_async_multipart_file_facade)) -> BulkDeleteResponse:
+    """
+    Hard-delete the given files from Supabase Storage and remove their
+    ``user_files`` records. Ids that are missing or not owned by the caller
+    are reported per file rather than failing the request.
+    """
+    user_id: str = request.state.user_id
+    return await facade.delete_files(user_id, [str(file_id) for file_id in body.file_ids])
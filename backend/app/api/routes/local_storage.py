@@ -0,0 +1,149 @@
+"""
+Signed object routes for ``STORAGE_BACKEND=local``.
+
+They play the role of Supabase Storage's signed URLs: clients ``PUT`` uploads
+to and ``GET`` downloads from the URLs issued by
+:class:`~app.core.storage.LocalStorageBackend`, and ``PUT`` resumable upload
+parts to the URLs issued by
+:class:`~app.core.multipart.LocalMultipartUploadBackend`. No bearer token is
+needed; each request is authorised by the URL's HMAC signature and expiry
+instead.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from contextlib import suppress
+
+import anyio
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+
+from app.constants.constants import MAX_FILE_SIZE_BYTES, MAX_RESUMABLE_FILE_SIZE_BYTES
+from app.core.multipart import LocalMultipartUploadBackend, MultipartUploadClient
+from app.core.storage import AsyncStorageClient, LocalStorageBackend
+from app.utils.exceptions import AuthorizationError, FileNotFoundError, FileValidationError
+from app.utils.file_response import MappedFileResponse, stat_regular_file
+
+router = APIRouter(prefix="/local-storage", tags=["Local storage"], include_in_schema=False)
+
+UPLOAD_WRITE_BUFFER_SIZE: int = 1024 * 1024  # request body bytes gathered per disk write
+
+
+async def get_local_storage_backend() -> LocalStorageBackend:
+    return AsyncStorageClient().backend.local
+
+
+async def get_local_multipart_backend() -> LocalMultipartUploadBackend:
+    backend = MultipartUploadClient().backend
+    if not isinstance(backend, LocalMultipartUploadBackend):
+        raise FileNotFoundError("Resumable uploads are not served locally.")
+    return backend
+
+
+def _authorise(backend: LocalStorageBackend, method: str, path: str, expires: int, signature: str) -> str:
+    if not backend.verify(method, path, expires, signature):
+        raise AuthorizationError("Invalid or expired signature.")
+    try:
+        return backend.object_path(path)
+    except ValueError as exc:
+        raise FileValidationError("Invalid storage path.") from exc
+
+
+def _commit_upload(backend: LocalStorageBackend, temp_path: str, file_path: str, content_type: str | None) -> None:
+    backend.set_content_type(temp_path, content_type)
+    os.replace(temp_path, file_path)  # atomic: readers see the old object or the new one, never a partial file
+
+
+def _discard(temp_path: str) -> None:
+    with suppress(OSError):
+        os.remove(temp_path)
+
+
+async def _receive_body(request: Request, temp_path: str, max_bytes: int) -> bool:
+    """
+    Write the request body to ``temp_path`` in ``UPLOAD_WRITE_BUFFER_SIZE`` chunks as it arrives.
+    Returns ``False``, leaving a partial file for the caller to discard, once it exceeds ``max_bytes``.
+    """
+    received = 0
+    async with await anyio.open_file(temp_path, "wb") as out:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                return False
+            buffer += chunk
+            if len(buffer) >= UPLOAD_WRITE_BUFFER_SIZE:
+                await out.write(bytes(buffer))
+                buffer.clear()
+        await out.write(bytes(buffer))
+    return True
+
+
+@router.api_route("/object/{path:path}", methods=["GET", "HEAD"])
+async def download_object(
+    path: str,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    backend: LocalStorageBackend = Depends(get_local_storage_backend),
+) -> Response:
+    """Stream the object; supports ``Range``, ``If-Range`` and ``HEAD`` like any static file."""
+    file_path = _authorise(backend, "GET", path, expires, signature)
+    stat_result = await anyio.to_thread.run_sync(stat_regular_file, file_path)
+    if stat_result is None:
+        raise FileNotFoundError("Object not found.")
+    media_type = await anyio.to_thread.run_sync(backend.content_type, file_path)
+    return MappedFileResponse(file_path, stat_result=stat_result, media_type=media_type or "application/octet-stream")
+
+
+@router.put("/object/{path:path}")
+async def upload_object(
+    path: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    backend: LocalStorageBackend = Depends(get_local_storage_backend),
+) -> JSONResponse:
+    """
+    Write the request body to the object as it arrives, into a temporary file
+    that replaces the object only once the upload is complete.
+    """
+    file_path = _authorise(backend, "PUT", path, expires, signature)
+    await anyio.to_thread.run_sync(lambda: os.makedirs(os.path.dirname(file_path), exist_ok=True))
+    temp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+    try:
+        if not await _receive_body(request, temp_path, MAX_FILE_SIZE_BYTES):
+            return JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": "Object too large."})
+        await anyio.to_thread.run_sync(_commit_upload, backend, temp_path, file_path, request.headers.get("content-type"))
+    finally:
+        await anyio.to_thread.run_sync(_discard, temp_path)
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"Key": path})
+
+
+@router.put("/multipart/{upload_id}/{part_number}")
+async def upload_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    backend: LocalMultipartUploadBackend = Depends(get_local_multipart_backend),
+) -> Response:
+    """Store one part of a resumable upload; a re-sent part replaces the earlier copy."""
+    if not backend.verify_part(upload_id, part_number, expires, signature):
+        raise AuthorizationError("Invalid or expired signature.")
+    part_path = backend.part_path(upload_id, part_number)
+    if not await anyio.to_thread.run_sync(os.path.isdir, os.path.dirname(part_path)):
+        raise FileNotFoundError("Upload not found.")
+    temp_path = f"{part_path}.{uuid.uuid4().hex}.part"
+    try:
+        if not await _receive_body(request, temp_path, MAX_RESUMABLE_FILE_SIZE_BYTES):
+            return JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": "Part too large."})
+        await anyio.to_thread.run_sync(os.replace, temp_path, part_path)
+    except OSError as exc:
+        # The upload was completed or aborted while this part was in flight.
+        raise FileNotFoundError("Upload not found.") from exc
+    finally:
+        await anyio.to_thread.run_sync(_discard, temp_path)
+    return Response(status_code=status.HTTP_200_OK)
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Response
+
+from app.core.metrics import collect_threadpool_metrics
+from app.utils.metrics import CONTENT_TYPE_LATEST, MetricsRegistry
+
+router = APIRouter(tags=["Observability"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint (unauthenticated; restrict it at the ingress)."""
+    collect_threadpool_metrics()
+    return Response(content=MetricsRegistry().render(), media_type=CONTENT_TYPE_LATEST)
@@ -1,9 +1,19 @@
-MAX_FILE_SIZE_BYTES: int = 10 * 1024 * 1024  # 10 MB
+MAX_FILE_SIZE_BYTES: int = 10 * 1024 * 1024  # 10 MB, single-URL uploads
+MAX_RESUMABLE_FILE_SIZE_BYTES: int = 50 * 1024 * 1024 * 1024  # 50 GB, resumable (multipart) uploads
 
 USER_FILES_TABLE: str = "user_files"
+FILE_BLOBS_TABLE: str = "file_blobs"
+STORAGE_DELETE_QUEUE_TABLE: str = "storage_delete_queue"
+USER_STORAGE_USAGE_TABLE: str = "user_storage_usage"
+JOB_LEASES_TABLE: str = "job_leases"
 
 PRESIGNED_URL_EXPIRY: int = 3600  # 1 hour
 
 DEFAULT_PAGE_SKIP: int = 0
 DEFAULT_PAGE_LIMIT: int = 20
-MAX_PAGE_LIMIT: int = 100
\ No newline at end of file
+MAX_PAGE_LIMIT: int = 100
+
+MAX_BATCH_SIZE: int = 100  # max file ids / items per batch request
+MAX_BULK_DELETE_SIZE: int = 1000
+MAX_IN_FILTER_SIZE: int = 200  # ids per `in.(...)` filter, keeps PostgREST URLs well under proxy limits
+STORAGE_REMOVE_CHUNK_SIZE: int = 100  # paths per Storage remove() call
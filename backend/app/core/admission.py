@@ -0,0 +1,239 @@
+"""
+Admission control: per-user request rate limits and per-upstream concurrency caps.
+
+Rate limits are token buckets (``rate_limit_rate`` tokens per second, up to
+``rate_limit_burst``) kept in a pluggable backend. ``InMemoryRateLimitBackend``
+is the per-process default, so with several workers each one enforces the
+limit on its own; ``RedisRateLimitBackend`` shares buckets across workers
+(requires the optional ``redis`` package and ``RATE_LIMIT_BACKEND=redis``).
+
+Concurrency caps bound the calls in flight to each upstream (``postgrest``,
+``storage``) per process. A call beyond the cap is rejected at once with
+:class:`ServiceOverloadedError` instead of queueing for a thread or a pooled
+connection, so one busy upstream cannot tie up the whole worker.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, TypeVar
+
+from app.core.config import AppConfig
+from app.core.metrics import RATE_LIMITED_REQUESTS, UPSTREAM_CALLS_SHED
+from app.utils.exceptions import ServiceOverloadedError
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+
+F = TypeVar("F", bound=Callable)
+
+
+class RateLimitBackend(ABC):
+    """
+    Token-bucket store. :meth:`consume` takes ``cost`` tokens from the bucket
+    at ``key`` and returns 0 when allowed, otherwise the seconds until enough
+    tokens are available. ``aconsume`` is used from the event loop.
+    """
+
+    @abstractmethod
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1) -> float: ...
+
+    async def aconsume(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        return self.consume(key, rate, burst, cost)
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in an LRU-bounded dict; an evicted bucket simply starts full again."""
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            retry_after = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_entries:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Refill and take atomically on the server, using the server's clock so workers never disagree on time.
+_TOKEN_BUCKET_SCRIPT = """
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by all workers. If Redis is unreachable, requests are allowed rather than rejected."""
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis
+            import redis.asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package to be installed.") from exc
+        self._script = redis.Redis.from_url(url, decode_responses=True).register_script(_TOKEN_BUCKET_SCRIPT)
+        self._async_script = aioredis.Redis.from_url(url, decode_responses=True).register_script(_TOKEN_BUCKET_SCRIPT)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"ratelimit:{key}"
+
+    def consume(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        try:
+            return float(self._script(keys=[self._key(key)], args=[rate, burst, cost]))
+        except Exception as exc:
+            logger.warning("Rate limit backend unavailable, allowing request: %s", exc)
+            return 0.0
+
+    async def aconsume(self, key: str, rate: float, burst: float, cost: float = 1) -> float:
+        try:
+            return float(await self._async_script(keys=[self._key(key)], args=[rate, burst, cost]))
+        except Exception as exc:
+            logger.warning("Rate limit backend unavailable, allowing request: %s", exc)
+            return 0.0
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    config = AppConfig()
+    if config.rate_limit_backend == "redis":
+        logger.info("Using Redis rate limit backend.")
+        return RedisRateLimitBackend(config.redis_url)
+    return InMemoryRateLimitBackend(config.rate_limit_max_entries)
+
+
+class RateLimiter(metaclass=SingletonMeta):
+    """Per-client token buckets. Keys are ``user:<id>`` for authenticated callers, ``ip:<addr>`` otherwise."""
+
+    def __init__(self, backend: RateLimitBackend | None = None) -> None:
+        config = AppConfig()
+        self._enabled = config.rate_limit_enabled
+        self._rate = config.rate_limit_rate
+        self._burst = config.rate_limit_burst
+        self._backend = backend or create_rate_limit_backend()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled and self._rate > 0
+
+    async def acheck(self, key: str, cost: float = 1) -> float:
+        """0 when the request may proceed, otherwise the seconds the client should wait."""
+        if not self.enabled:
+            return 0.0
+        retry_after = await self._backend.aconsume(key, self._rate, self._burst, cost)
+        if retry_after > 0:
+            RATE_LIMITED_REQUESTS.inc(scope=key.split(":", 1)[0])
+        return retry_after
+
+
+class UpstreamConcurrencyLimiter:
+    """
+    Non-blocking slot counter shared by threadpool and event-loop callers.
+    ``limit <= 0`` disables the cap.
+    """
+
+    def __init__(self, upstream: str, limit: int, retry_after: float) -> None:
+        self.upstream = upstream
+        self.limit = limit
+        self._retry_after = retry_after
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def acquire(self) -> None:
+        if self.limit <= 0:
+            return
+        with self._lock:
+            if self._in_use >= self.limit:
+                UPSTREAM_CALLS_SHED.inc(upstream=self.upstream)
+                raise ServiceOverloadedError(f"The {self.upstream} service is busy. Please retry shortly.", retry_after=self._retry_after)
+            self._in_use += 1
+
+    def release(self) -> None:
+        if self.limit <= 0:
+            return
+        with self._lock:
+            self._in_use -= 1
+
+
+class UpstreamAdmission(metaclass=SingletonMeta):
+    """One :class:`UpstreamConcurrencyLimiter` per upstream, sized from ``AppConfig``."""
+
+    def __init__(self) -> None:
+        config = AppConfig()
+        limits = {
+            "postgrest": config.db_max_concurrency,
+            "storage": config.storage_max_concurrency,
+            "storage_downloads": config.proxy_download_max_concurrency,  # streams proxied by app.core.download_proxy
+        }
+        self._limiters = {name: UpstreamConcurrencyLimiter(name, limit, config.overload_retry_after) for name, limit in limits.items()}
+
+    def limiter(self, upstream: str) -> UpstreamConcurrencyLimiter:
+        return self._limiters[upstream]
+
+
+def limit_concurrency(upstream: str) -> Callable[[F], F]:
+    """
+    Hold one of ``upstream``'s slots for the duration of each call of the
+    decorated (sync or async) function; raise :class:`ServiceOverloadedError`
+    immediately when none is free.
+    """
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                limiter = UpstreamAdmission().limiter(upstream)
+                limiter.acquire()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    limiter.release()
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            limiter = UpstreamAdmission().limiter(upstream)
+            limiter.acquire()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                limiter.release()
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,256 @@
+"""
+Pluggable key/value cache backends, the per-user listing cache, the
+presigned download-URL cache and the upload-verification cache.
+
+Backends store opaque strings with an optional TTL. ``InMemoryCacheBackend``
+is the per-process default and doubles as the fake used in tests;
+``RedisCacheBackend`` shares entries across workers (requires the optional
+``redis`` package and ``CACHE_BACKEND=redis``).
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+from app.core.config import AppConfig
+from app.core.metrics import record_cache_lookup
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+from app.utils.ttl_cache import TTLCache
+
+
+class CacheBackend(ABC):
+    """
+    Minimal string cache. The ``a*`` variants are used from the event loop;
+    by default they call the sync methods, which is fine for non-blocking
+    backends. Network backends override them, and ``amget``/``amset`` to
+    batch many keys into one round trip.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float | None = None) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    async def aget(self, key: str) -> str | None:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str, ttl: float | None = None) -> None:
+        self.set(key, value, ttl)
+
+    async def adelete(self, key: str) -> None:
+        self.delete(key)
+
+    async def amget(self, keys: list[str]) -> list[str | None]:
+        return [self.get(key) for key in keys]
+
+    async def amset(self, entries: dict[str, tuple[str, float | None]]) -> None:
+        """Set each ``key -> (value, ttl)`` of ``entries``."""
+        for key, (value, ttl) in entries.items():
+            self.set(key, value, ttl)
+
+
+class InMemoryCacheBackend(CacheBackend):
+
+    def __init__(self, max_entries: int) -> None:
+        self._cache = TTLCache(maxsize=max_entries)
+
+    def get(self, key: str) -> str | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.pop(key)
+
+
+class RedisCacheBackend(CacheBackend):
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis
+            import redis.asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package to be installed.") from exc
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._async_client = aioredis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> str | None:
+        return self._client.get(key)
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        self._client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    async def aget(self, key: str) -> str | None:
+        return await self._async_client.get(key)
+
+    async def aset(self, key: str, value: str, ttl: float | None = None) -> None:
+        await self._async_client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def adelete(self, key: str) -> None:
+        await self._async_client.delete(key)
+
+    async def amget(self, keys: list[str]) -> list[str | None]:
+        return await self._async_client.mget(keys) if keys else []
+
+    async def amset(self, entries: dict[str, tuple[str, float | None]]) -> None:
+        if not entries:
+            return
+        async with self._async_client.pipeline(transaction=False) as pipe:
+            for key, (value, ttl) in entries.items():
+                pipe.set(key, value, px=int(ttl * 1000) if ttl else None)
+            await pipe.execute()
+
+
+def create_cache_backend(max_entries: int) -> CacheBackend:
+    config = AppConfig()
+    if config.cache_backend == "redis":
+        logger.info("Using Redis cache backend.")
+        return RedisCacheBackend(config.redis_url)
+    return InMemoryCacheBackend(max_entries)
+
+
+class ListingCache(metaclass=SingletonMeta):
+    """
+    Cache of serialised file-listing pages, namespaced per user.
+
+    Each user has a random version token that is part of every page key.
+    Invalidation swaps the token, orphaning all of that user's pages at once
+    (they age out via TTL/LRU) without needing a prefix scan on the backend.
+    A missing token is replaced by a fresh one, so an evicted token can never
+    resurrect stale pages.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None) -> None:
+        config = AppConfig()
+        self._ttl = config.list_cache_ttl
+        self._backend = backend or create_cache_backend(config.list_cache_max_entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"files:list-version:{user_id}"
+
+    @staticmethod
+    def _page_key(user_id: str, version: str, params: tuple) -> str:
+        return f"files:list:{user_id}:{version}:" + ":".join("" if p is None else str(p) for p in params)
+
+    async def aversion(self, user_id: str) -> str:
+        """
+        Current version token for ``user_id``. Read it *before* querying the DB and
+        pass it to :meth:`aset`, so a page computed before an invalidation is
+        filed under the old token and never served.
+        """
+        version = await self._backend.aget(self._version_key(user_id))
+        if not version:
+            version = uuid.uuid4().hex
+            await self._backend.aset(self._version_key(user_id), version)
+        return version
+
+    async def aget(self, user_id: str, version: str, params: tuple) -> str | None:
+        if not self.enabled:
+            return None
+        page = await self._backend.aget(self._page_key(user_id, version, params))
+        record_cache_lookup("listing", page is not None)
+        return page
+
+    async def aset(self, user_id: str, version: str, params: tuple, value: str) -> None:
+        if self.enabled:
+            await self._backend.aset(self._page_key(user_id, version, params), value, ttl=self._ttl)
+
+    async def ainvalidate(self, user_id: str) -> None:
+        await self._backend.aset(self._version_key(user_id), uuid.uuid4().hex)
+
+
+class DownloadURLCache(metaclass=SingletonMeta):
+    """
+    Presigned download URLs keyed by storage path.
+
+    A URL is only handed out while at least ``download_url_min_remaining``
+    seconds of its lifetime are left; the backend TTL is set to expire the
+    entry at exactly that point.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None) -> None:
+        config = AppConfig()
+        self._min_remaining = config.download_url_min_remaining
+        self._backend = backend or create_cache_backend(config.download_url_cache_max_entries)
+
+    @staticmethod
+    def _key(storage_path: str) -> str:
+        return f"files:download-url:{storage_path}"
+
+    def _decode(self, raw: str | None) -> tuple[str, int] | None:
+        cached = None
+        if raw:
+            entry = json.loads(raw)
+            remaining = int(entry["expires_at"] - time.time())
+            if remaining >= self._min_remaining:
+                cached = (entry["url"], remaining)
+        record_cache_lookup("download_url", cached is not None)
+        return cached
+
+    def _encode(self, url: str, expires_at: float) -> tuple[str, float]:
+        return json.dumps({"url": url, "expires_at": expires_at}), expires_at - time.time() - self._min_remaining
+
+    async def aget(self, storage_path: str) -> tuple[str, int] | None:
+        """Return ``(url, seconds_remaining)`` for a still-usable cached URL."""
+        return self._decode(await self._backend.aget(self._key(storage_path)))
+
+    async def amget(self, storage_paths: list[str]) -> dict[str, tuple[str, int]]:
+        """Batch :meth:`aget` in one backend round trip; paths without a usable URL are absent."""
+        raw_values = await self._backend.amget([self._key(path) for path in storage_paths])
+        found = {path: self._decode(raw) for path, raw in zip(storage_paths, raw_values)}
+        return {path: cached for path, cached in found.items() if cached}
+
+    async def aset(self, storage_path: str, url: str, expires_at: float) -> None:
+        value, ttl = self._encode(url, expires_at)
+        if ttl > 0:
+            await self._backend.aset(self._key(storage_path), value, ttl=ttl)
+
+    async def amset(self, urls: dict[str, str], expires_at: float) -> None:
+        """Batch :meth:`aset` for ``{storage_path: url}`` URLs that all expire at ``expires_at``."""
+        entries = {self._key(path): self._encode(url, expires_at) for path, url in urls.items()}
+        await self._backend.amset({key: (value, ttl) for key, (value, ttl) in entries.items() if ttl > 0})
+
+    async def aevict(self, storage_path: str) -> None:
+        await self._backend.adelete(self._key(storage_path))
+
+
+class UploadVerificationCache(metaclass=SingletonMeta):
+    """
+    Uploads that already passed confirm-time verification, keyed by storage
+    path and expected size, so a retried confirm skips the Storage lookup.
+    Only successes are cached: a missing object may still be in flight.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None) -> None:
+        config = AppConfig()
+        self._ttl = config.upload_verification_cache_ttl
+        self._backend = backend or create_cache_backend(config.upload_verification_cache_max_entries)
+
+    @staticmethod
+    def _key(storage_path: str, size_bytes: int) -> str:
+        return f"files:verified:{storage_path}:{size_bytes}"
+
+    async def aget(self, storage_path: str, size_bytes: int) -> bool:
+        verified = await self._backend.aget(self._key(storage_path, size_bytes)) is not None
+        record_cache_lookup("upload_verification", verified)
+        return verified
+
+    async def aset(self, storage_path: str, size_bytes: int) -> None:
+        await self._backend.aset(self._key(storage_path, size_bytes), "1", ttl=self._ttl)
@@ -23,6 +23,142 @@ class AppConfig(metaclass=SingletonMeta):
         self.port: int = int(os.environ.get("PORT", "8080"))
         self.allowed_origins: list[str] = self._parse_list(os.environ.get("ALLOWED_ORIGINS", "http://localhost:3000"))
 
+        # Production serving (app.server): worker processes, sockets and per-worker threadpools
+        self.server_host: str = os.environ.get("SERVER_HOST", "0.0.0.0")
+        self.server_workers: int = int(os.environ.get("SERVER_WORKERS", str(os.cpu_count() or 1)))
+        self.server_backlog: int = int(os.environ.get("SERVER_BACKLOG", "2048"))  # pending connections queued by the kernel
+        # Keep idle client connections longer than the load balancer does, so it never reuses a closed one
+        self.server_keepalive_timeout: int = int(os.environ.get("SERVER_KEEPALIVE_TIMEOUT", "65"))
+        self.server_graceful_shutdown_timeout: int = int(os.environ.get("SERVER_GRACEFUL_SHUTDOWN_TIMEOUT", "30"))  # drain time after SIGTERM
+        self.server_limit_concurrency: int = int(os.environ.get("SERVER_LIMIT_CONCURRENCY", "0"))  # per worker, 503 beyond it; 0 = unlimited
+        self.threadpool_size: int = int(os.environ.get("THREADPOOL_SIZE", "40"))  # sync handlers/dependencies and asyncio.to_thread, per worker
+
+        # Shared upstream HTTP connection pool (Supabase DB, Storage and JWKS)
+        self.http_max_connections: int = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive_connections: int = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.http_keepalive_expiry: float = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.http2_enabled: bool = self._parse_bool(os.environ.get("HTTP2_ENABLED", "true"))
+        self.http_connect_timeout: float = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+        self.http_read_timeout: float = float(os.environ.get("HTTP_READ_TIMEOUT", "30"))
+
+        # Upstream resilience (DB = "postgrest", Storage = "storage"): per-attempt timeouts, retries and circuit breakers
+        self.db_timeout: float = float(os.environ.get("DB_TIMEOUT", "10"))
+        self.storage_timeout: float = float(os.environ.get("STORAGE_TIMEOUT", "15"))
+        # Per-operation overrides, e.g. "postgrest.get_rows=5,storage.delete_files=30"
+        self.upstream_operation_timeouts: dict[str, float] = self._parse_float_map(os.environ.get("UPSTREAM_OPERATION_TIMEOUTS", ""))
+        self.upstream_retry_attempts: int = int(os.environ.get("UPSTREAM_RETRY_ATTEMPTS", "3"))  # total tries for idempotent operations
+        self.upstream_retry_base_delay: float = float(os.environ.get("UPSTREAM_RETRY_BASE_DELAY", "0.1"))
+        self.upstream_retry_max_delay: float = float(os.environ.get("UPSTREAM_RETRY_MAX_DELAY", "2"))
+        self.circuit_failure_threshold: int = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures that open it
+        self.circuit_recovery_timeout: float = float(os.environ.get("CIRCUIT_RECOVERY_TIMEOUT", "30"))  # seconds open before a trial call
+        self.circuit_half_open_max_calls: int = int(os.environ.get("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+
+        # Auth: verified-token cache and JWKS background refresh
+        self.jwt_cache_max_entries: int = int(os.environ.get("JWT_CACHE_MAX_ENTRIES", "10000"))
+        self.jwks_refresh_interval: float = float(os.environ.get("JWKS_REFRESH_INTERVAL", "240"))
+
+        # Caching: "memory" (per process) or "redis" (shared across workers)
+        self.cache_backend: str = os.environ.get("CACHE_BACKEND", "memory").lower()
+        self.redis_url: str = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+        # 0 disables the listing cache. Writes invalidate it only in the worker that served them, so with the
+        # per-process "memory" backend it defaults to on only for a single worker (app.server refuses it otherwise).
+        default_list_cache_ttl = "30" if self.cache_backend == "redis" or self.server_workers == 1 else "0"
+        self.list_cache_ttl: float = float(os.environ.get("LIST_CACHE_TTL", default_list_cache_ttl))
+        self.list_cache_max_entries: int = int(os.environ.get("LIST_CACHE_MAX_ENTRIES", "10000"))
+        # A cached download URL is reused only while this many seconds of its lifetime remain
+        self.download_url_min_remaining: int = int(os.environ.get("DOWNLOAD_URL_MIN_REMAINING", "300"))
+        self.download_url_cache_max_entries: int = int(os.environ.get("DOWNLOAD_URL_CACHE_MAX_ENTRIES", "10000"))
+
+        # Admission control: per-client token buckets ("memory" per process, or "redis" shared) and per-upstream caps
+        self.rate_limit_enabled: bool = self._parse_bool(os.environ.get("RATE_LIMIT_ENABLED", "true"))
+        self.rate_limit_backend: str = os.environ.get("RATE_LIMIT_BACKEND", "memory").lower()
+        self.rate_limit_rate: float = float(os.environ.get("RATE_LIMIT_RATE", "20"))  # sustained requests per second per user
+        self.rate_limit_burst: float = float(os.environ.get("RATE_LIMIT_BURST", "100"))
+        self.rate_limit_max_entries: int = int(os.environ.get("RATE_LIMIT_MAX_ENTRIES", "100000"))
+        # Max concurrent calls per upstream per process, beyond which calls fail fast with 503; 0 = unlimited
+        self.db_max_concurrency: int = int(os.environ.get("DB_MAX_CONCURRENCY", "60"))
+        self.storage_max_concurrency: int = int(os.environ.get("STORAGE_MAX_CONCURRENCY", "40"))
+        self.overload_retry_after: float = float(os.environ.get("OVERLOAD_RETRY_AFTER", "1"))  # Retry-After on 503s
+
+        # Confirm-time verification against Storage object metadata (existence, size, optionally MIME type)
+        self.upload_verify_enabled: bool = self._parse_bool(os.environ.get("UPLOAD_VERIFY_ENABLED", "true"))
+        self.upload_verify_mime_type: bool = self._parse_bool(os.environ.get("UPLOAD_VERIFY_MIME_TYPE", "false"))
+        self.upload_verification_cache_ttl: float = float(os.environ.get("UPLOAD_VERIFICATION_CACHE_TTL", "600"))
+        self.upload_verification_cache_max_entries: int = int(os.environ.get("UPLOAD_VERIFICATION_CACHE_MAX_ENTRIES", "10000"))
+        # Max concurrent Storage metadata lookups per process
+        self.storage_info_concurrency: int = int(os.environ.get("STORAGE_INFO_CONCURRENCY", "20"))
+
+        # Batch uploads: max concurrent Storage signing calls per batch request
+        self.upload_sign_concurrency: int = int(os.environ.get("UPLOAD_SIGN_CONCURRENCY", "10"))
+
+        # Object storage: "supabase" or "local" (files under LOCAL_STORAGE_ROOT, served by the API's signed /local-storage routes)
+        self.storage_backend: str = os.environ.get("STORAGE_BACKEND", "supabase").lower()
+        self.local_storage_root: str = os.environ.get("LOCAL_STORAGE_ROOT", ".local-storage")
+        self.local_storage_public_url: str = os.environ.get("LOCAL_STORAGE_PUBLIC_URL", f"http://localhost:{self.port}")  # as clients reach the API
+        # HMAC key for local signed URLs; must be the same in every worker. Required with the local backend rather than
+        # falling back to SUPABASE_KEY, so the service key is never reused to sign URLs handed to clients.
+        self.local_storage_signing_key: str = (
+            self._require("LOCAL_STORAGE_SIGNING_KEY") if self.storage_backend == "local" else os.environ.get("LOCAL_STORAGE_SIGNING_KEY", "")
+        )
+
+        # Streaming download route (GET /api/v1/files/{id}/content): relays the object through the API instead of redirecting
+        self.proxy_download_enabled: bool = self._parse_bool(os.environ.get("PROXY_DOWNLOAD_ENABLED", "true"))
+        self.proxy_download_chunk_size: int = int(os.environ.get("PROXY_DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))  # max bytes buffered per stream
+        # Max concurrent streams per process; separate from STORAGE_MAX_CONCURRENCY since a stream holds its slot until done
+        self.proxy_download_max_concurrency: int = int(os.environ.get("PROXY_DOWNLOAD_MAX_CONCURRENCY", "200"))
+
+        # Resumable (multipart) uploads: "s3" (Supabase S3 endpoint) or "local" (on disk, only with STORAGE_BACKEND=local)
+        self.multipart_backend: str = os.environ.get("MULTIPART_BACKEND", "local" if self.storage_backend == "local" else "s3").lower()
+        self._check_multipart_backend()
+        self.s3_region: str = os.environ.get("S3_REGION", "us-east-1")
+        self.s3_access_key_id: str = os.environ.get("S3_ACCESS_KEY_ID", "")
+        self.s3_secret_access_key: str = os.environ.get("S3_SECRET_ACCESS_KEY", "")
+        self.resumable_chunk_size: int = int(os.environ.get("RESUMABLE_CHUNK_SIZE", str(8 * 1024 * 1024)))
+        # Parallel part uploads suggested to clients
+        self.resumable_max_concurrency: int = int(os.environ.get("RESUMABLE_MAX_CONCURRENCY", "4"))
+
+        # Storage quota per user in bytes, counting uploaded and in-progress uploads; 0 = unlimited
+        self.storage_quota_bytes: int = int(os.environ.get("STORAGE_QUOTA_BYTES", str(10 * 1024**3)))
+        # Usage reconciler: recomputes the per-user usage counters from user_files to correct any drift
+        self.usage_reconcile_enabled: bool = self._parse_bool(os.environ.get("USAGE_RECONCILE_ENABLED", "true"))
+        self.usage_reconcile_interval: float = float(os.environ.get("USAGE_RECONCILE_INTERVAL", "3600"))  # seconds between runs
+        self.usage_reconcile_batch_size: int = int(os.environ.get("USAGE_RECONCILE_BATCH_SIZE", "200"))  # users per batch
+        self.usage_reconcile_batch_pause: float = float(os.environ.get("USAGE_RECONCILE_BATCH_PAUSE", "1"))  # seconds between batches
+
+        # Upload reaper: purges stale 'uploading' rows and retries failed storage deletes
+        self.reaper_enabled: bool = self._parse_bool(os.environ.get("REAPER_ENABLED", "true"))
+        self.reaper_interval: float = float(os.environ.get("REAPER_INTERVAL", "300"))  # seconds between runs
+        self.reaper_stale_after: float = float(os.environ.get("REAPER_STALE_AFTER", "86400"))  # idle time after which an 'uploading' row is stale
+        self.reaper_batch_size: int = int(os.environ.get("REAPER_BATCH_SIZE", "100"))
+        self.reaper_max_batches: int = int(os.environ.get("REAPER_MAX_BATCHES", "20"))  # per phase, per run
+        self.reaper_batch_pause: float = float(os.environ.get("REAPER_BATCH_PAUSE", "1"))  # seconds between batches (rate limit)
+        self.reaper_retry_base_delay: float = float(os.environ.get("REAPER_RETRY_BASE_DELAY", "60"))
+        self.reaper_retry_max_delay: float = float(os.environ.get("REAPER_RETRY_MAX_DELAY", "3600"))
+        self.reaper_max_attempts: int = int(os.environ.get("REAPER_MAX_ATTEMPTS", "20"))
+
+        # Logging (app.utils.logger): records are written by a background thread from a bounded queue
+        self.log_format: str = os.environ.get("LOG_FORMAT", "json").lower()  # "json" (one object per line) or "text"
+        self.log_level: str = os.environ.get("LOG_LEVEL", "INFO").upper()
+        # Per-level keep ratio, e.g. "INFO=0.1,DEBUG=0"; unlisted levels keep everything
+        self.log_sample_rates: dict[str, float] = self._parse_float_map(os.environ.get("LOG_SAMPLE_RATES", ""))
+        self.log_queue_size: int = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))  # records buffered before dropping
+
+        # Tracing: "none", "otlp" (OTLP/HTTP JSON collector) or "file" (JSON lines, for offline use)
+        self.trace_exporter: str = os.environ.get("TRACE_EXPORTER", "none").lower()
+        self.trace_sample_ratio: float = float(os.environ.get("TRACE_SAMPLE_RATIO", "0.1"))  # share of new traces recorded
+        self.otlp_endpoint: str = os.environ.get("OTLP_ENDPOINT", "http://localhost:4318")
+        self.trace_file_path: str = os.environ.get("TRACE_FILE_PATH", "traces.jsonl")
+        self.trace_service_name: str = os.environ.get("TRACE_SERVICE_NAME", "dropbox-api")
+        self.trace_export_batch_size: int = int(os.environ.get("TRACE_EXPORT_BATCH_SIZE", "512"))
+        self.trace_export_interval: float = float(os.environ.get("TRACE_EXPORT_INTERVAL", "5"))
+
+    def _check_multipart_backend(self) -> None:
+        # Checked here so a bad combination stops the app at startup instead of failing every resumable upload.
+        if self.multipart_backend not in ("s3", "local"):
+            raise EnvironmentError(f"MULTIPART_BACKEND must be 's3' or 'local', not '{self.multipart_backend}'.")
+        if self.multipart_backend == "local" and self.storage_backend != "local":
+            raise EnvironmentError("MULTIPART_BACKEND=local requires STORAGE_BACKEND=local.")
+
     @staticmethod
     def _require(key: str) -> str:
         value = os.environ.get(key)
@@ -34,6 +170,15 @@ class AppConfig(metaclass=SingletonMeta):
     def _parse_list(raw: str, sep: str = ",") -> list[str]:
         return [item.strip() for item in raw.split(sep) if item.strip()]
 
+    @staticmethod
+    def _parse_float_map(raw: str, sep: str = ",") -> dict[str, float]:
+        pairs = (item.split("=", 1) for item in AppConfig._parse_list(raw, sep) if "=" in item)
+        return {key.strip(): float(value) for key, value in pairs}
+
+    @staticmethod
+    def _parse_bool(raw: str) -> bool:
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+
     @property
     def is_development(self) -> bool:
         return self.environment in ("development", "dev")
@@ -1,41 +1,124 @@
 from __future__ import annotations
 
-from supabase import Client, create_client
+from supabase import AsyncClient, AsyncClientOptions
 from postgrest import APIError
 
+from app.core.admission import limit_concurrency
 from app.core.config import AppConfig
+from app.core.http import HTTPClientPool
+from app.core.metrics import instrument_upstream
+from app.core.resilience import resilient
 from app.models.enums import SupabaseOperatorType
 from app.utils.logger import logger
 from app.utils.singleton import SingletonMeta
 
 
-class DBClient(metaclass=SingletonMeta):
+class _BaseDBClient:
+    """Query-building helpers, independent of the client that executes the query."""
+
+    @staticmethod
+    def _build_select_query(
+        table,
+        *columns: str,
+        where_condition_dict: dict | None = None,
+        order_by_columns: list | None = None,
+        skip: int | None = None,
+        limit: int | None = None,
+        count: str | None = "exact",
+    ):
+        select_columns = columns if columns else ("*",)
+        query = table.select(*select_columns, count=count)
+
+        query = _BaseDBClient._apply_conditions(query, where_condition_dict)
+
+        if order_by_columns:
+            for column, is_desc in order_by_columns:
+                query = query.order(column, desc=is_desc)
+
+        if limit is not None:
+            if skip is not None:
+                query = query.range(skip, skip + limit - 1)
+            else:
+                query = query.limit(limit)
+        elif skip is not None:
+            query = query.offset(skip)
+        return query
+
+    @staticmethod
+    def _apply_conditions(query, where_condition_dict: dict | None):
+        if not where_condition_dict:
+            return query
+        for column, condition in where_condition_dict.items():
+            # A list of (operator, value) pairs applies several filters to one column, e.g. a range.
+            for operator, value in condition if isinstance(condition, list) else [condition]:
+                if operator == SupabaseOperatorType.IS_NOT_NULL.value:
+                    query = query.not_.is_(column, None)
+                elif operator == SupabaseOperatorType.OR.value:
+                    # ``column`` is only a label here; ``value`` is a PostgREST logic tree, e.g. "a.lt.1,b.eq.2".
+                    query = query.or_(value)
+                else:
+                    query = getattr(query, operator)(column, value)
+        return query
+
+
+class AsyncDBClient(_BaseDBClient, metaclass=SingletonMeta):
+    """
+    PostgREST access over the shared async HTTP pool.
+
+    Every method awaits the upstream PostgREST call instead of blocking a
+    threadpool worker, so a single event loop can keep many queries in flight.
+    """
+
     def __init__(self) -> None:
-        self.supabase: Client = None
+        self.supabase: AsyncClient = None
         self._initialise_client()
 
     def _initialise_client(self) -> None:
         try:
             config = AppConfig()
-            self.supabase = create_client(config.supabase_url, config.supabase_key)
-            logger.info("Supabase DB client initialised successfully.")
+            self.supabase = AsyncClient(config.supabase_url, config.supabase_key, options=AsyncClientOptions(httpx_client=HTTPClientPool().async_client))
+            logger.info("Supabase async DB client initialised successfully.")
         except Exception as exc:
-            logger.error("Failed to initialise Supabase DB client: %s", exc)
+            logger.error("Failed to initialise Supabase async DB client: %s", exc)
             raise
 
-    def insert_row(self, table_name: str, data: dict) -> dict:
-        response = self.supabase.table(table_name).insert(data).execute()
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")
+    @instrument_upstream("postgrest")
+    async def insert_row(self, table_name: str, data: dict) -> dict:
+        response = await self.supabase.table(table_name).insert(data).execute()
         return response.data[0]
 
-    def get_single_row(self, table_name: str, *columns: str, where_condition_dict: dict | None = None) -> dict | None:
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")
+    @instrument_upstream("postgrest")
+    async def insert_rows(self, table_name: str, data: list[dict]) -> list[dict]:
+        response = await self.supabase.table(table_name).insert(data).execute()
+        return response.data
+
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")
+    @instrument_upstream("postgrest")
+    async def insert_row_if_absent(self, table_name: str, data: dict, on_conflict: str) -> dict | None:
+        """Insert ``data`` unless a row with the same ``on_conflict`` key exists; returns ``None`` in that case."""
+        response = await self.supabase.table(table_name).upsert(data, on_conflict=on_conflict, ignore_duplicates=True).execute()
+        return response.data[0] if response.data else None
+
+    @limit_concurrency("postgrest")
+    @resilient("postgrest", idempotent=True)
+    @instrument_upstream("postgrest")
+    async def get_single_row(self, table_name: str, *columns: str, where_condition_dict: dict | None = None) -> dict | None:
         select_columns = columns if columns else ("*",)
         query = self.supabase.table(table_name).select(*select_columns)
         query = self._apply_conditions(query, where_condition_dict)
 
-        result = query.maybe_single().execute()
+        result = await query.maybe_single().execute()
         return result.data if result else None
 
-    def get_rows(
+    @limit_concurrency("postgrest")
+    @resilient("postgrest", idempotent=True)
+    @instrument_upstream("postgrest")
+    async def get_rows(
         self,
         table_name: str,
         *columns: str,
@@ -43,55 +126,69 @@ class DBClient(metaclass=SingletonMeta):
         order_by_columns: list | None = None,
         skip: int | None = None,
         limit: int | None = None,
-    ) -> tuple[list[dict], int]:
+        count: str | None = "exact",
+    ) -> tuple[list[dict], int | None]:
+        """
+        Select rows matching ``where_condition_dict``. Returns (rows, count).
+
+        ``count`` is passed to PostgREST ("exact", "planned" or "estimated");
+        ``None`` skips counting entirely and the returned count is ``None``.
+        """
         try:
-            select_columns = columns if columns else ("*",)
-            query = self.supabase.table(table_name).select(*select_columns, count="exact")
-
-            query = self._apply_conditions(query, where_condition_dict)
-
-            if order_by_columns:
-                for column, is_desc in order_by_columns:
-                    query = query.order(column, desc=is_desc)
-
-            if limit is not None:
-                if skip is not None:
-                    query = query.range(skip, skip + limit - 1)
-                else:
-                    query = query.limit(limit)
-            elif skip is not None:
-                query = query.offset(skip)
-
-            result = query.execute()
+            query = self._build_select_query(
+                self.supabase.table(table_name),
+                *columns,
+                where_condition_dict=where_condition_dict,
+                order_by_columns=order_by_columns,
+                skip=skip,
+                limit=limit,
+                count=count,
+            )
+            result = await query.execute()
             return result.data, result.count
 
         except APIError as api_err:
             if api_err.code == "PGRST103":
-                return [], 0
+                return [], 0 if count else None
             raise
 
-    def update_row(self, table_name: str, data: dict, where_condition_dict: dict) -> dict | None:
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")
+    @instrument_upstream("postgrest")
+    async def update_row(self, table_name: str, data: dict, where_condition_dict: dict) -> dict | None:
         query = self.supabase.table(table_name).update(data)
         query = self._apply_conditions(query, where_condition_dict)
-        response = query.execute()
+        response = await query.execute()
         return response.data[0] if response.data else None
 
-    def delete_row(
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")
+    @instrument_upstream("postgrest")
+    async def upsert_rows(self, table_name: str, data: list[dict], on_conflict: str, ignore_duplicates: bool = False) -> list[dict]:
+        """
+        Insert ``data``; rows that already exist on ``on_conflict`` get the given
+        columns updated, or are skipped when ``ignore_duplicates`` is set.
+        """
+        response = await self.supabase.table(table_name).upsert(data, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates).execute()
+        return response.data
+
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")  # not idempotent for callers: a repeated delete returns no rows
+    @instrument_upstream("postgrest")
+    async def delete_row(
         self,
         table_name: str,
         where_condition_dict: dict,
-    ) -> None:
+    ) -> list[dict]:
+        """Delete matching rows and return them."""
         query = self.supabase.table(table_name).delete()
         query = self._apply_conditions(query, where_condition_dict)
-        query.execute()
-
-    @staticmethod
-    def _apply_conditions(query, where_condition_dict: dict | None):
-        if not where_condition_dict:
-            return query
-        for column, (operator, value) in where_condition_dict.items():
-            if operator == SupabaseOperatorType.IS_NOT_NULL.value:
-                query = query.not_.is_(column, None)
-            else:
-                query = getattr(query, operator)(column, value)
-        return query
+        return (await query.execute()).data
+
+    @limit_concurrency("postgrest")
+    @resilient("postgrest")
+    @instrument_upstream("postgrest")
+    async def call_function(self, function_name: str, params: dict | None = None):
+        """Invoke a Postgres function through PostgREST RPC and return its result."""
+        response = await self.supabase.rpc(function_name, params or {}).execute()
+        return response.data
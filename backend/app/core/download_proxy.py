@@ -0,0 +1,154 @@
+"""
+Streaming download proxy.
+
+``GET /api/v1/files/{id}/content`` serves a file's bytes through the API for
+clients that cannot follow a presigned URL (no direct Storage access, strict
+CORS, one origin to audit). The object is fetched from its signed Storage URL
+over the shared keep-alive pool and relayed chunk by chunk: at most
+``proxy_download_chunk_size`` bytes are buffered per stream, and the ASGI
+server's flow control stops reading from Storage while a slow client catches
+up, so memory per download stays flat whatever the object size.
+
+``Range``/``If-Range`` and ``If-None-Match``/``If-Modified-Since`` are passed
+to Storage, whose ``206``, ``304`` and ``416`` answers are relayed as they
+are. When Storage ignores ``If-None-Match`` the proxy answers ``304`` itself
+if the ETag matches, without reading the body.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Mapping
+from urllib.parse import quote
+
+import httpx
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.admission import UpstreamAdmission
+from app.core.config import AppConfig
+from app.core.http import HTTPClientPool
+from app.core.metrics import PROXY_DOWNLOAD_BYTES, PROXY_DOWNLOADS_IN_FLIGHT, instrument_upstream
+from app.core.resilience import resilient
+from app.utils.exceptions import FileNotFoundError, ServiceOverloadedError, StorageError
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+
+_FORWARDED_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+_RELAYED_RESPONSE_HEADERS = ("content-type", "content-length", "content-range", "accept-ranges", "etag", "last-modified")
+_RELAYED_STATUSES = frozenset({200, 206, 304, 416})
+# Storage answers 400 with an embedded 404 for a missing object.
+_MISSING_OBJECT_STATUSES = frozenset({400, 404})
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header value."""
+    if not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        return tag.strip().removeprefix("W/")
+
+    return opaque(etag) in {opaque(tag) for tag in if_none_match.split(",")}
+
+
+def content_disposition(file_name: str) -> str:
+    """``attachment`` disposition with an ASCII fallback name and the UTF-8 ``filename*`` form."""
+    fallback = "".join(char if 32 <= ord(char) < 127 and char not in '"\\' else "_" for char in file_name) or "download"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(file_name, safe='')}"
+
+
+class ProxiedDownloadResponse(StreamingResponse):
+    """Relays an open upstream response, then closes it and frees the stream's slot however sending ends."""
+
+    def __init__(self, upstream: httpx.Response, release: Callable[[], None], chunk_size: int, headers: Mapping[str, str]) -> None:
+        self._upstream = upstream
+        self._release = release
+        super().__init__(self._relay(chunk_size), status_code=upstream.status_code, headers=headers)
+
+    async def _relay(self, chunk_size: int):
+        # Raw bytes: Accept-Encoding is identity, and Content-Length/Content-Range must match what is sent.
+        async for chunk in self._upstream.aiter_raw(chunk_size):
+            PROXY_DOWNLOAD_BYTES.inc(len(chunk))
+            yield chunk
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._upstream.aclose()
+            self._release()
+
+
+class DownloadProxy(metaclass=SingletonMeta):
+    """Opens signed Storage URLs on the shared async client and wraps them in streaming responses."""
+
+    def __init__(self, client: httpx.AsyncClient | None = None) -> None:
+        config = AppConfig()
+        self._client = client or HTTPClientPool().async_client
+        self._chunk_size = max(1, config.proxy_download_chunk_size)
+        self.enabled = config.proxy_download_enabled
+
+    @resilient("storage", idempotent=True)
+    @instrument_upstream("storage")
+    async def open_download(self, url: str, headers: Mapping[str, str]) -> httpx.Response:
+        """
+        Send the request and return once the response headers arrive, with
+        the body unread. The per-attempt deadline bounds the wait for
+        headers and each later body read, not the whole transfer.
+        """
+        response = await self._client.send(self._client.build_request("GET", url, headers=headers), stream=True)
+        if response.status_code in _RELAYED_STATUSES:
+            return response
+        await response.aclose()
+        if response.status_code in _MISSING_OBJECT_STATUSES:
+            raise FileNotFoundError("File content not found in storage.")
+        response.raise_for_status()  # 5xx and 429 are retried by ``resilient``
+        return response
+
+    async def stream(self, url: str, request_headers: Mapping[str, str], file_name: str, mime_type: str) -> Response:
+        """
+        Stream the object at the signed ``url`` to the client, honouring the
+        client's conditional and range headers. Raises
+        :class:`ServiceOverloadedError` when ``proxy_download_max_concurrency``
+        streams are already running.
+        """
+        limiter = UpstreamAdmission().limiter("storage_downloads")
+        limiter.acquire()
+        PROXY_DOWNLOADS_IN_FLIGHT.inc()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                PROXY_DOWNLOADS_IN_FLIGHT.dec()
+                limiter.release()
+
+        forwarded = {name: request_headers[name] for name in _FORWARDED_REQUEST_HEADERS if name in request_headers}
+        forwarded["accept-encoding"] = "identity"
+        try:
+            upstream = await self.open_download(url, forwarded)
+        except BaseException as exc:
+            release()  # also on cancellation, so an abandoned request never keeps its slot
+            if isinstance(exc, (FileNotFoundError, ServiceOverloadedError)) or not isinstance(exc, Exception):
+                raise
+            logger.error("Storage download failed: %s", exc)
+            raise StorageError("Unable to download file. Please try again.") from exc
+
+        headers = {name: upstream.headers[name] for name in _RELAYED_RESPONSE_HEADERS if name in upstream.headers}
+        headers.setdefault("content-type", mime_type)
+        headers["content-disposition"] = content_disposition(file_name)
+        headers["cache-control"] = "private, no-cache"  # browsers may keep it but must revalidate with the ETag
+
+        if_none_match = request_headers.get("if-none-match")
+        not_modified = upstream.status_code == 304 or (
+            upstream.status_code == 200 and if_none_match and etag_matches(if_none_match, upstream.headers.get("etag", ""))
+        )
+        if not_modified:
+            await upstream.aclose()
+            release()
+            headers.pop("content-length", None)
+            return Response(status_code=304, headers=headers)
+        return ProxiedDownloadResponse(upstream, release, self._chunk_size, headers)
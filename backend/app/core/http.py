@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import httpx
+
+from app.core.config import AppConfig
+from app.core.resilience import aapply_upstream_deadline, apply_upstream_deadline
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+
+
+class HTTPClientPool(metaclass=SingletonMeta):
+    """
+    Process-wide HTTP transport shared by every upstream client.
+
+    The DB, Storage and JWKS clients all talk to the same Supabase host, so
+    they reuse one keep-alive pool instead of each opening their own. httpx
+    cannot share a pool between sync and async callers, hence one client of
+    each flavour, both built from the same ``AppConfig`` limits.
+    """
+
+    def __init__(self) -> None:
+        self._sync_client: httpx.Client = None
+        self._async_client: httpx.AsyncClient = None
+        self._initialise_clients()
+
+    def _initialise_clients(self) -> None:
+        config = AppConfig()
+        limits = httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry,
+        )
+        timeout = httpx.Timeout(config.http_read_timeout, connect=config.http_connect_timeout)
+        # Request hooks clamp each request's timeouts to the calling operation's deadline (see app.core.resilience).
+        self._sync_client = httpx.Client(
+            limits=limits, timeout=timeout, http2=config.http2_enabled, follow_redirects=True, event_hooks={"request": [apply_upstream_deadline]}
+        )
+        self._async_client = httpx.AsyncClient(
+            limits=limits, timeout=timeout, http2=config.http2_enabled, follow_redirects=True, event_hooks={"request": [aapply_upstream_deadline]}
+        )
+        logger.info(
+            "HTTP client pool initialised (max_connections=%d, keepalive=%d, http2=%s).",
+            config.http_max_connections,
+            config.http_max_keepalive_connections,
+            config.http2_enabled,
+        )
+
+    @property
+    def sync_client(self) -> httpx.Client:
+        return self._sync_client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        return self._async_client
+
+    async def aclose(self) -> None:
+        self._sync_client.close()
+        await self._async_client.aclose()
+        logger.info("HTTP client pool closed.")
@@ -0,0 +1,124 @@
+"""
+Application metrics exposed on ``GET /metrics``.
+
+- ``http_request_duration_seconds``: per route template, method and status,
+  recorded by :class:`~app.middleware.metrics_middleware.MetricsMiddleware`.
+- ``upstream_request_duration_seconds``: per upstream (``postgrest``,
+  ``storage``, ``multipart``, ``jwks``) and operation, recorded by
+  :func:`instrument_upstream` on the client methods.
+- ``cache_lookups_total``: hits and misses per cache.
+- ``rate_limited_requests_total`` and ``upstream_calls_shed_total``: requests
+  rejected by admission control (:mod:`app.core.admission`).
+- ``upstream_retries_total``, ``circuit_breaker_state`` and
+  ``circuit_breaker_transitions_total``: retries and breaker state per
+  upstream (:mod:`app.core.resilience`).
+- ``proxy_download_bytes_total`` and ``proxy_downloads_in_flight``: objects
+  relayed by the streaming download route (:mod:`app.core.download_proxy`).
+- Threadpool gauges for the anyio worker pool that runs sync dependencies
+  and ``run_in_threadpool`` calls, sampled at scrape time.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import time
+from typing import Callable, TypeVar
+
+from anyio import to_thread
+
+from app.utils.metrics import Counter, Gauge, Histogram
+from app.utils.tracing import Tracer
+
+F = TypeVar("F", bound=Callable)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Time spent in calls to upstream services.",
+    ("upstream", "operation", "outcome"),
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Upstream calls currently in progress.", ("upstream",))
+
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by result.", ("cache", "result"))
+
+RATE_LIMITED_REQUESTS = Counter("rate_limited_requests_total", "Requests rejected with 429 by the per-client rate limit.", ("scope",))
+UPSTREAM_CALLS_SHED = Counter("upstream_calls_shed_total", "Upstream calls rejected because the upstream's concurrency cap was reached.", ("upstream",))
+
+UPSTREAM_RETRIES = Counter("upstream_retries_total", "Upstream calls retried after a transient failure.", ("upstream", "operation"))
+CIRCUIT_BREAKER_STATE = Gauge("circuit_breaker_state", "Circuit breaker state per upstream: 0 closed, 1 half-open, 2 open.", ("upstream",))
+CIRCUIT_BREAKER_TRANSITIONS = Counter("circuit_breaker_transitions_total", "Circuit breaker state changes.", ("upstream", "state"))
+
+PROXY_DOWNLOAD_BYTES = Counter("proxy_download_bytes_total", "Object bytes relayed to clients by the streaming download route.")
+PROXY_DOWNLOADS_IN_FLIGHT = Gauge("proxy_downloads_in_flight", "Streaming downloads currently being relayed.")
+
+THREADPOOL_WORKERS_BUSY = Gauge("threadpool_workers_busy", "Threadpool tokens currently borrowed by running tasks.")
+THREADPOOL_WORKERS_TOTAL = Gauge("threadpool_workers_total", "Threadpool capacity.")
+THREADPOOL_QUEUE_DEPTH = Gauge("threadpool_queue_depth", "Tasks waiting for a free threadpool worker.")
+
+
+def instrument_upstream(upstream: str, operation: str | None = None) -> Callable[[F], F]:
+    """
+    Time every call of the decorated (sync or async) function as
+    ``operation`` (default: the function name) against ``upstream``.
+    The outcome label is ``ok`` or ``error`` depending on whether it raised.
+    Inside a sampled trace the call is also recorded as a ``upstream.operation`` span.
+    """
+
+    def decorator(func: F) -> F:
+        op = operation or func.__name__
+        span_name = f"{upstream}.{op}"
+
+        def _record(started: float, outcome: str) -> None:
+            UPSTREAM_REQUESTS_IN_FLIGHT.dec(upstream=upstream)
+            UPSTREAM_REQUEST_DURATION.observe(time.perf_counter() - started, upstream=upstream, operation=op, outcome=outcome)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                UPSTREAM_REQUESTS_IN_FLIGHT.inc(upstream=upstream)
+                started, outcome = time.perf_counter(), "error"
+                try:
+                    with Tracer().span(span_name, upstream=upstream, operation=op):
+                        result = await func(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    _record(started, outcome)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            UPSTREAM_REQUESTS_IN_FLIGHT.inc(upstream=upstream)
+            started, outcome = time.perf_counter(), "error"
+            try:
+                with Tracer().span(span_name, upstream=upstream, operation=op):
+                    result = func(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                _record(started, outcome)
+
+        return wrapper
+
+    return decorator
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def collect_threadpool_metrics() -> None:
+    """Sample the default anyio thread limiter. Must be called from the event loop."""
+    limiter = to_thread.current_default_thread_limiter()
+    THREADPOOL_WORKERS_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_WORKERS_TOTAL.set(limiter.total_tokens)
+    THREADPOOL_QUEUE_DEPTH.set(limiter.statistics().tasks_waiting)
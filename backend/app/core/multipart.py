@@ -0,0 +1,261 @@
+"""
+Multipart (resumable) upload backends.
+
+A multipart upload is split into fixed-size parts that the client uploads
+directly to storage through per-part presigned URLs, in parallel and in any
+order. Storage keeps the received parts, so an interrupted transfer resumes
+by re-sending only the missing ones; completing the upload assembles the
+parts server-side into the final object.
+
+``S3MultipartUploadBackend`` talks to Supabase Storage's S3-compatible
+endpoint (requires ``boto3`` and S3 access keys).
+``LocalMultipartUploadBackend`` keeps parts on local disk next to the
+objects of :class:`~app.core.storage.LocalStorageBackend` and is meant for
+offline development and tests; its part URLs are signed the same way and
+served by ``PUT /local-storage/multipart/{upload_id}/{part_number}``.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from functools import cached_property
+
+from app.constants.constants import PRESIGNED_URL_EXPIRY
+from app.core.config import AppConfig
+from app.core.metrics import instrument_upstream
+from app.core.storage import AsyncStorageClient, LocalStorageBackend
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+
+
+class MultipartUploadBackend(ABC):
+
+    @abstractmethod
+    def start(self, path: str, mime_type: str) -> str:
+        """Open a multipart upload for ``path`` and return its upload id."""
+
+    @abstractmethod
+    def sign_part(self, path: str, upload_id: str, part_number: int, expires_in: int) -> str:
+        """Return a presigned URL the client can PUT part ``part_number`` (1-based) to."""
+
+    @abstractmethod
+    def list_parts(self, path: str, upload_id: str) -> dict[int, int]:
+        """Return ``{part_number: size_bytes}`` for every part received so far."""
+
+    @abstractmethod
+    def complete(self, path: str, upload_id: str, part_numbers: list[int]) -> None:
+        """Assemble the given parts, in order, into the object at ``path``."""
+
+    @abstractmethod
+    def abort(self, path: str, upload_id: str) -> None:
+        """Discard the upload and every part received for it."""
+
+
+class S3MultipartUploadBackend(MultipartUploadBackend):
+
+    def __init__(self, endpoint_url: str, bucket: str, region: str, access_key_id: str, secret_access_key: str) -> None:
+        self._bucket = bucket
+        self._client_kwargs = {
+            "endpoint_url": endpoint_url,
+            "region_name": region,
+            "aws_access_key_id": access_key_id,
+            "aws_secret_access_key": secret_access_key,
+        }
+
+    @cached_property
+    def _s3(self):
+        # Built on first use, so processes that never handle a resumable upload do not pay for importing boto3.
+        try:
+            import boto3
+        except ImportError as exc:
+            raise RuntimeError("MULTIPART_BACKEND=s3 requires the 'boto3' package to be installed.") from exc
+        return boto3.client("s3", **self._client_kwargs)
+
+    def start(self, path: str, mime_type: str) -> str:
+        response = self._s3.create_multipart_upload(Bucket=self._bucket, Key=path, ContentType=mime_type)
+        return response["UploadId"]
+
+    def sign_part(self, path: str, upload_id: str, part_number: int, expires_in: int) -> str:
+        return self._s3.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": self._bucket, "Key": path, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=expires_in,
+        )
+
+    def list_parts(self, path: str, upload_id: str) -> dict[int, int]:
+        return {part["PartNumber"]: part["Size"] for part in self._iter_parts(path, upload_id)}
+
+    def complete(self, path: str, upload_id: str, part_numbers: list[int]) -> None:
+        etags = {part["PartNumber"]: part["ETag"] for part in self._iter_parts(path, upload_id)}
+        self._s3.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=path,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": number, "ETag": etags[number]} for number in part_numbers]},
+        )
+
+    def abort(self, path: str, upload_id: str) -> None:
+        self._s3.abort_multipart_upload(Bucket=self._bucket, Key=path, UploadId=upload_id)
+
+    def _iter_parts(self, path: str, upload_id: str):
+        paginator = self._s3.get_paginator("list_parts")
+        for page in paginator.paginate(Bucket=self._bucket, Key=path, UploadId=upload_id):
+            yield from page.get("Parts", [])
+
+
+class LocalMultipartUploadBackend(MultipartUploadBackend):
+    """
+    Parts live under ``<root>/.multipart/<upload_id>/``; completed objects at
+    ``storage.object_path(path)``, so they get the same containment checks as
+    single-request uploads. Part URLs are HMAC-signed by ``storage`` for the
+    ``PUT_PART`` method on ``<upload_id>/<part_number>``.
+    """
+
+    PART_METHOD = "PUT_PART"
+    _UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+    _CONTENT_TYPE_FILE = "content-type"
+
+    def __init__(self, storage: LocalStorageBackend) -> None:
+        self._storage = storage
+        self._parts_root = os.path.join(storage.root, ".multipart")
+
+    def upload_dir(self, upload_id: str) -> str:
+        """Directory holding the parts of ``upload_id``; raises ``ValueError`` for ids this backend never issues."""
+        if not self._UPLOAD_ID.fullmatch(upload_id):
+            raise ValueError(f"Invalid upload id: {upload_id!r}")
+        return os.path.join(self._parts_root, upload_id)
+
+    def part_path(self, upload_id: str, part_number: int) -> str:
+        return os.path.join(self.upload_dir(upload_id), f"{part_number:05d}")
+
+    def verify_part(self, upload_id: str, part_number: int, expires: int, signature: str) -> bool:
+        return self._storage.verify(self.PART_METHOD, f"{upload_id}/{part_number}", expires, signature)
+
+    def start(self, path: str, mime_type: str) -> str:
+        self._storage.object_path(path)
+        upload_id = uuid.uuid4().hex
+        upload_dir = self.upload_dir(upload_id)
+        os.makedirs(upload_dir)
+        with open(os.path.join(upload_dir, self._CONTENT_TYPE_FILE), "w") as content_type:
+            content_type.write(mime_type)
+        return upload_id
+
+    def sign_part(self, path: str, upload_id: str, part_number: int, expires_in: int) -> str:
+        self.upload_dir(upload_id)
+        return self._storage.signed_url("multipart", self.PART_METHOD, f"{upload_id}/{part_number}", expires_in)
+
+    def list_parts(self, path: str, upload_id: str) -> dict[int, int]:
+        upload_dir = self.upload_dir(upload_id)
+        return {int(name): os.path.getsize(os.path.join(upload_dir, name)) for name in os.listdir(upload_dir) if name.isdigit()}
+
+    def complete(self, path: str, upload_id: str, part_numbers: list[int]) -> None:
+        upload_dir = self.upload_dir(upload_id)
+        target = self._storage.object_path(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{upload_id}.part"
+        try:
+            with open(temp_path, "wb") as out:
+                for number in part_numbers:
+                    with open(self.part_path(upload_id, number), "rb") as part:
+                        shutil.copyfileobj(part, out)
+            with open(os.path.join(upload_dir, self._CONTENT_TYPE_FILE)) as content_type:
+                self._storage.set_content_type(temp_path, content_type.read())
+            os.replace(temp_path, target)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.abort(path, upload_id)
+
+    def abort(self, path: str, upload_id: str) -> None:
+        shutil.rmtree(self.upload_dir(upload_id), ignore_errors=True)
+
+
+def create_multipart_backend() -> MultipartUploadBackend:
+    config = AppConfig()
+    if config.multipart_backend == "local":
+        # Parts are uploaded through the signed /local-storage routes; AppConfig only allows this with the local storage backend.
+        logger.info("Using local multipart upload backend (root=%s).", config.local_storage_root)
+        return LocalMultipartUploadBackend(AsyncStorageClient().backend.local)
+    return S3MultipartUploadBackend(
+        endpoint_url=f"{config.supabase_url.rstrip('/')}/storage/v1/s3",
+        bucket=config.supabase_storage_bucket,
+        region=config.s3_region,
+        access_key_id=config.s3_access_key_id,
+        secret_access_key=config.s3_secret_access_key,
+    )
+
+
+class MultipartUploadClient(metaclass=SingletonMeta):
+    """
+    Process-wide entry point for multipart uploads. Wraps the configured
+    backend with the logging conventions of :class:`AsyncStorageClient` and owns
+    the part-size / concurrency settings handed to clients.
+
+    Backend calls are blocking; async callers run them via ``asyncio.to_thread``.
+    """
+
+    # S3 multipart limits: parts of at least 5 MiB (except the last), at most 10,000 parts.
+    MIN_PART_SIZE: int = 5 * 1024 * 1024
+    MAX_PARTS: int = 10_000
+
+    def __init__(self, backend: MultipartUploadBackend | None = None) -> None:
+        config = AppConfig()
+        self._backend = backend or create_multipart_backend()
+        self.chunk_size: int = max(config.resumable_chunk_size, self.MIN_PART_SIZE)
+        self.max_concurrency: int = config.resumable_max_concurrency
+
+    @property
+    def backend(self) -> MultipartUploadBackend:
+        return self._backend
+
+    def chunk_size_for(self, size_bytes: int) -> int:
+        """Configured part size, grown if needed so the file fits in ``MAX_PARTS`` parts."""
+        return max(self.chunk_size, -(-size_bytes // self.MAX_PARTS))
+
+    @instrument_upstream("multipart")
+    def start(self, path: str, mime_type: str) -> str:
+        try:
+            upload_id = self._backend.start(path, mime_type)
+            logger.info("Multipart upload started for path=%s (upload_id=%s).", path, upload_id)
+            return upload_id
+        except Exception as exc:
+            logger.error("Failed to start multipart upload for path=%s: %s", path, exc)
+            raise
+
+    @instrument_upstream("multipart")
+    def sign_parts(self, path: str, upload_id: str, part_numbers: list[int], expires_in: int = PRESIGNED_URL_EXPIRY) -> dict[int, str]:
+        try:
+            return {number: self._backend.sign_part(path, upload_id, number, expires_in) for number in part_numbers}
+        except Exception as exc:
+            logger.error("Failed to sign multipart upload parts for path=%s: %s", path, exc)
+            raise
+
+    @instrument_upstream("multipart")
+    def list_parts(self, path: str, upload_id: str) -> dict[int, int]:
+        try:
+            return self._backend.list_parts(path, upload_id)
+        except Exception as exc:
+            logger.error("Failed to list multipart upload parts for path=%s: %s", path, exc)
+            raise
+
+    @instrument_upstream("multipart")
+    def complete(self, path: str, upload_id: str, part_numbers: list[int]) -> None:
+        try:
+            self._backend.complete(path, upload_id, part_numbers)
+            logger.info("Multipart upload completed for path=%s (%d parts).", path, len(part_numbers))
+        except Exception as exc:
+            logger.error("Failed to complete multipart upload for path=%s: %s", path, exc)
+            raise
+
+    @instrument_upstream("multipart")
+    def abort(self, path: str, upload_id: str) -> None:
+        try:
+            self._backend.abort(path, upload_id)
+            logger.info("Multipart upload aborted for path=%s.", path)
+        except Exception as exc:
+            logger.error("Failed to abort multipart upload for path=%s: %s", path, exc)
+            raise
@@ -0,0 +1,290 @@
+"""
+Resilience for upstream calls: per-attempt deadlines, retries with
+exponential backoff and full jitter, and one circuit breaker per upstream.
+
+- Deadlines: :func:`upstream_deadline` sets a per-attempt deadline in a
+  context variable. The shared HTTP pool's request hook
+  (:func:`apply_upstream_deadline`) clamps every request's timeouts to the
+  remaining time, but httpx applies those to each phase (connect, write,
+  each read) separately, so a response that keeps trickling in could still
+  outlive it. Async attempts are therefore also run under
+  ``asyncio.timeout``, which bounds the attempt as a whole. Sync attempts
+  only get the per-phase clamp.
+- Retries: only after transient failures (transport errors, timeouts, 5xx,
+  429, and PostgREST connection/pool errors). Idempotent operations (reads,
+  signing, Storage deletes) retry on any transient failure. Other operations
+  retry only when the request never reached the upstream (connect and pool
+  errors), so a write is never applied twice.
+- Circuit breaker: opens after ``circuit_failure_threshold`` consecutive
+  transient failures and fails fast with :class:`CircuitOpenError` (503) for
+  ``circuit_recovery_timeout`` seconds. It then lets a few trial calls
+  through (half-open); their outcome closes or re-opens it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, TypeVar
+
+import httpx
+from postgrest import APIError
+from storage3.exceptions import StorageApiError
+
+from app.core.config import AppConfig
+from app.core.metrics import CIRCUIT_BREAKER_STATE, CIRCUIT_BREAKER_TRANSITIONS, UPSTREAM_RETRIES
+from app.utils.exceptions import CircuitOpenError
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+
+F = TypeVar("F", bound=Callable)
+
+_upstream_deadline_ctx: ContextVar[float | None] = ContextVar("upstream_deadline", default=None)
+
+# PostgREST could not reach or query the database: connection, schema cache and pool timeouts.
+_TRANSIENT_POSTGREST_CODES = frozenset({"PGRST000", "PGRST001", "PGRST002", "PGRST003"})
+# SQLSTATE classes: connection exception, insufficient resources, operator intervention
+# (incl. statement timeout), transaction rollback (serialization failure, deadlock).
+_TRANSIENT_SQLSTATE_CLASSES = ("08", "53", "57", "40")
+# Failures raised before the request was sent; safe to retry for any operation.
+_NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+@contextmanager
+def upstream_deadline(timeout: float) -> Iterator[None]:
+    """Bound every upstream HTTP request made inside the block to ``timeout`` seconds from now."""
+    token = _upstream_deadline_ctx.set(time.monotonic() + timeout)
+    try:
+        yield
+    finally:
+        _upstream_deadline_ctx.reset(token)
+
+
+def apply_upstream_deadline(request: httpx.Request) -> None:
+    """httpx request hook: clamp each of the request's phase timeouts to what is left of the current deadline."""
+    deadline = _upstream_deadline_ctx.get()
+    if deadline is None:
+        return
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise httpx.TimeoutException("Upstream operation deadline exceeded.", request=request)
+    timeouts = request.extensions.get("timeout") or {}
+    request.extensions["timeout"] = {
+        phase: remaining if timeouts.get(phase) is None else min(timeouts[phase], remaining) for phase in ("connect", "read", "write", "pool")
+    }
+
+
+async def aapply_upstream_deadline(request: httpx.Request) -> None:
+    apply_upstream_deadline(request)
+
+
+def _exception_chain(exc: BaseException) -> Iterator[BaseException]:
+    seen: set[int] = set()
+    current: BaseException | None = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        current = current.__cause__ or current.__context__
+
+
+def _is_transient_status(status: int | str | None) -> bool:
+    try:
+        code = int(status)
+    except (TypeError, ValueError):
+        return False
+    return code >= 500 or code == 429
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether ``exc`` (or the error it wraps) is worth retrying and counts against the circuit breaker."""
+    for error in _exception_chain(exc):
+        if isinstance(error, (httpx.TransportError, TimeoutError)):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return _is_transient_status(error.response.status_code)
+        if isinstance(error, StorageApiError):
+            return _is_transient_status(error.status)
+        if isinstance(error, APIError):
+            code = error.code
+            if isinstance(code, int):  # set to the HTTP status when the error body was not JSON
+                return _is_transient_status(code)
+            return bool(code) and (code in _TRANSIENT_POSTGREST_CODES or (code[:2] in _TRANSIENT_SQLSTATE_CLASSES and code[:2].isdigit()))
+    return False
+
+
+def _was_not_sent(exc: BaseException) -> bool:
+    return any(isinstance(error, _NOT_SENT_ERRORS) for error in _exception_chain(exc))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker, shared by threadpool and event-loop callers."""
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, upstream: str, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int) -> None:
+        self.upstream = upstream
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        CIRCUIT_BREAKER_STATE.set(0, upstream=upstream)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        # Caller holds the lock.
+        self._state = state
+        CIRCUIT_BREAKER_STATE.set(self._STATE_VALUES[state], upstream=self.upstream)
+        CIRCUIT_BREAKER_TRANSITIONS.inc(upstream=self.upstream, state=state)
+        log = logger.info if state == self.CLOSED else logger.warning
+        log("Circuit breaker for %s is now %s.", self.upstream, state)
+
+    def before_call(self) -> None:
+        """Admit a call, or raise :class:`CircuitOpenError` while the breaker is open."""
+        if self._failure_threshold <= 0:
+            return
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self._recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(f"The {self.upstream} service is temporarily unavailable.", retry_after=remaining)
+                self._transition(self.HALF_OPEN)
+                self._half_open_calls = 0
+            if self._state == self.HALF_OPEN:
+                if self._half_open_calls >= self._half_open_max_calls:
+                    raise CircuitOpenError(f"The {self.upstream} service is temporarily unavailable.", retry_after=1)
+                self._half_open_calls += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self._failures >= self._failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+
+class UpstreamResilience(metaclass=SingletonMeta):
+    """Per-upstream circuit breakers and the retry/timeout policy, all from ``AppConfig``."""
+
+    def __init__(self) -> None:
+        config = AppConfig()
+        self._timeouts = {"postgrest": config.db_timeout, "storage": config.storage_timeout}
+        self._operation_timeouts = config.upstream_operation_timeouts
+        self.retry_attempts = max(1, config.upstream_retry_attempts)
+        self._retry_base_delay = config.upstream_retry_base_delay
+        self._retry_max_delay = config.upstream_retry_max_delay
+        self._breakers = {
+            upstream: CircuitBreaker(upstream, config.circuit_failure_threshold, config.circuit_recovery_timeout, config.circuit_half_open_max_calls)
+            for upstream in self._timeouts
+        }
+
+    def breaker(self, upstream: str) -> CircuitBreaker:
+        return self._breakers[upstream]
+
+    def timeout(self, upstream: str, operation: str) -> float:
+        return self._operation_timeouts.get(f"{upstream}.{operation}", self._timeouts[upstream])
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self._retry_max_delay, self._retry_base_delay * 2 ** (attempt - 1)))
+
+    def should_retry(self, exc: BaseException, attempt: int, idempotent: bool) -> bool:
+        if attempt >= self.retry_attempts or isinstance(exc, CircuitOpenError):
+            return False
+        return _was_not_sent(exc) if not idempotent else is_transient(exc)
+
+
+def resilient(upstream: str, idempotent: bool = False, operation: str | None = None) -> Callable[[F], F]:
+    """
+    Run each call of the decorated (sync or async) client method under the
+    upstream's circuit breaker, with a per-attempt deadline and retries as
+    described in the module docstring. ``operation`` (default: the function
+    name) selects the per-operation timeout. Apply it outside
+    ``instrument_upstream`` so each attempt is timed on its own.
+    """
+
+    def decorator(func: F) -> F:
+        op = operation or func.__name__
+
+        def _on_failure(breaker: CircuitBreaker, exc: Exception) -> None:
+            if is_transient(exc):
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # the upstream answered; the request itself was bad
+
+        def _log_retry(attempt: int, delay: float, exc: Exception) -> None:
+            UPSTREAM_RETRIES.inc(upstream=upstream, operation=op)
+            logger.warning("Retrying %s.%s in %.2fs after attempt %d failed: %s", upstream, op, delay, attempt, exc)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                policy = UpstreamResilience()
+                breaker = policy.breaker(upstream)
+                attempt = 0
+                while True:
+                    attempt += 1
+                    breaker.before_call()
+                    timeout = policy.timeout(upstream, op)
+                    try:
+                        with upstream_deadline(timeout):
+                            async with asyncio.timeout(timeout):
+                                result = await func(*args, **kwargs)
+                    except Exception as exc:
+                        _on_failure(breaker, exc)
+                        if not policy.should_retry(exc, attempt, idempotent):
+                            raise
+                        delay = policy.backoff(attempt)
+                        _log_retry(attempt, delay, exc)
+                        await asyncio.sleep(delay)
+                    else:
+                        breaker.record_success()
+                        return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            policy = UpstreamResilience()
+            breaker = policy.breaker(upstream)
+            attempt = 0
+            while True:
+                attempt += 1
+                breaker.before_call()
+                try:
+                    with upstream_deadline(policy.timeout(upstream, op)):
+                        result = func(*args, **kwargs)
+                except Exception as exc:
+                    _on_failure(breaker, exc)
+                    if not policy.should_retry(exc, attempt, idempotent):
+                        raise
+                    delay = policy.backoff(attempt)
+                    _log_retry(attempt, delay, exc)
+                    time.sleep(delay)
+                else:
+                    breaker.record_success()
+                    return result
+
+        return wrapper
+
+    return decorator
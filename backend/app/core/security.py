@@ -1,18 +1,52 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+from typing import Any
+
+import httpx
 import jwt
 from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jwt import PyJWKClient
+from jwt import PyJWKClient, PyJWKClientConnectionError
 
 from app.core.config import AppConfig
+from app.core.http import HTTPClientPool
+from app.core.metrics import instrument_upstream, record_cache_lookup
 from app.utils.exceptions import AuthenticationError
-from app.utils.logger import add_logger_metadata
+from app.utils.logger import add_logger_metadata, logger
 from app.utils.singleton import SingletonMeta
+from app.utils.ttl_cache import TTLCache
 
 _bearer_scheme = HTTPBearer(auto_error=False)
 
 
+class _PooledPyJWKClient(PyJWKClient):
+    """
+    PyJWKClient that fetches the JWKS over the shared httpx pool instead of urllib.
+
+    Unlike the base class, a failed fetch leaves the previously cached key set
+    in place, so a transient JWKS outage during a background refresh does not
+    push the next fetch onto a user request.
+    """
+
+    def __init__(self, uri: str, http_client: httpx.Client, lifespan: float) -> None:
+        super().__init__(uri, lifespan=lifespan)
+        self._http_client = http_client
+
+    @instrument_upstream("jwks", "fetch_jwks")
+    def fetch_data(self) -> Any:
+        try:
+            response = self._http_client.get(self.uri, headers=self.headers)
+            response.raise_for_status()
+            jwk_set = response.json()
+        except httpx.HTTPError as exc:
+            raise PyJWKClientConnectionError(f'Fail to fetch data from the url, err: "{exc}"') from exc
+        if self.jwk_set_cache is not None:
+            self.jwk_set_cache.put(jwk_set)
+        return jwk_set
+
+
 class SupabaseJWKSClient(metaclass=SingletonMeta):
     """Singleton JWKS client for Supabase signing keys (ES256/RS256)."""
 
@@ -20,23 +54,58 @@ class SupabaseJWKSClient(metaclass=SingletonMeta):
         config = AppConfig()
         # Supabase implements asymmetric signing using JWKS.
         jwks_url = f"{config.supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
-        self._client = PyJWKClient(jwks_url)
+        self._refresh_interval = config.jwks_refresh_interval
+        # Cached key set outlives two refresh intervals, so one missed refresh never expires it.
+        self._client = _PooledPyJWKClient(jwks_url, HTTPClientPool().sync_client, lifespan=self._refresh_interval * 2)
 
     @property
     def client(self) -> PyJWKClient:
         return self._client
 
+    def refresh(self) -> None:
+        """Re-fetch the key set; failures are logged and the previous keys are kept."""
+        try:
+            keys = self._client.get_signing_keys(refresh=True)
+            logger.info("JWKS refreshed (%d signing keys).", len(keys))
+        except Exception as exc:
+            logger.warning("JWKS refresh failed, keeping cached keys: %s", exc)
+
+    async def run_refresh_loop(self) -> None:
+        """Refresh the key set every ``jwks_refresh_interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self._refresh_interval)
+            await asyncio.to_thread(self.refresh)
+
+
+class VerifiedClaimsCache(TTLCache, metaclass=SingletonMeta):
+    """
+    Verified JWT claims keyed by a SHA-256 of the raw token.
+
+    Each entry expires at the token's own ``exp``, so a cache hit can never
+    outlive the token; the LRU bound caps memory for many distinct tokens.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(maxsize=AppConfig().jwt_cache_max_entries)
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
 
 def get_jwks_client() -> PyJWKClient:
     return SupabaseJWKSClient().client
 
 
-def validate_token(
-    request: Request, credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme), jwks_client: PyJWKClient = Depends(get_jwks_client)
-) -> None:
-    if not credentials:
-        raise AuthenticationError("Not authenticated.")
-    token = credentials.credentials
+def get_verified_claims_cache() -> VerifiedClaimsCache:
+    return VerifiedClaimsCache()
+
+
+def verify_token(token: str, jwks_client: PyJWKClient, claims_cache: VerifiedClaimsCache) -> dict:
+    """
+    Verify ``token`` against the JWKS and cache its claims until it expires.
+    Blocking (the key set may have to be fetched); raises :class:`AuthenticationError`.
+    """
     # Verify token using asymmetric signing (Supabase Signing Keys: ES256/RS256) via JWKS first.
     try:
         signing_key = jwks_client.get_signing_key_from_jwt(token)
@@ -47,6 +116,25 @@ def validate_token(
         raise AuthenticationError("Invalid token. Unable to decode the token.") from exc
     except Exception as exc:
         raise AuthenticationError("Not authenticated.") from exc
+    if "exp" in decoded_token:
+        claims_cache.set(claims_cache.key_for(token), decoded_token, expires_at=float(decoded_token["exp"]))
+    return decoded_token
+
+
+def validate_token(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(_bearer_scheme),
+    jwks_client: PyJWKClient = Depends(get_jwks_client),
+    claims_cache: VerifiedClaimsCache = Depends(get_verified_claims_cache),
+) -> None:
+    if not credentials:
+        raise AuthenticationError("Not authenticated.")
+    token = credentials.credentials
+    cache_key = claims_cache.key_for(token)
+    decoded_token: dict | None = claims_cache.get(cache_key)
+    record_cache_lookup("jwt_claims", decoded_token is not None)
+    if decoded_token is None:
+        decoded_token = verify_token(token, jwks_client, claims_cache)
     request.state.user_id = decoded_token["sub"]
     request.state.user_email = decoded_token.get("email", "")
     add_logger_metadata({"user_id": request.state.user_id, "user_email": request.state.user_email})  # Add user ID and email to logger metadata
@@ -1,60 +1,356 @@
+"""
+Object storage backends and the process-wide storage clients.
+
+``AsyncStorageBackend`` covers everything the app asks of object storage:
+signed upload and download URLs, object metadata, and single and bulk
+deletes. Clients upload and download directly against the signed URLs, never
+through these calls.
+
+``AsyncSupabaseStorageBackend`` (default) talks to Supabase Storage over the
+shared HTTP pool. ``LocalStorageBackend`` keeps objects on local disk under
+``LOCAL_STORAGE_ROOT`` and issues HMAC-signed URLs served by the API's own
+``/local-storage`` routes (:mod:`app.api.routes.local_storage`). That gives a
+zero-network deployment mode and a fast backend for load tests. It is
+selected with ``STORAGE_BACKEND=local``.
+
+:class:`AsyncStorageClient` wraps the configured backend with the concurrency
+caps, resilience policy, metrics and logging that apply to every storage call,
+whichever backend serves it.
+"""
+
 from __future__ import annotations
 
-from supabase import Client, create_client
+import asyncio
+import base64
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import quote, urlencode
+
+from storage3.exceptions import StorageApiError
+from supabase import AsyncClient, AsyncClientOptions
 
+from app.core.admission import limit_concurrency
 from app.core.config import AppConfig
+from app.core.http import HTTPClientPool
+from app.core.metrics import instrument_upstream
+from app.core.resilience import resilient
 from app.constants.constants import PRESIGNED_URL_EXPIRY
 from app.utils.logger import logger
+from app.utils.paths import split_storage_path
 from app.utils.singleton import SingletonMeta
 
 
-class StorageClient(metaclass=SingletonMeta):
+class AsyncStorageBackend(ABC):
 
-    def __init__(self) -> None:
-        self._client: Client = None
-        self._bucket: str = ""
-        self._initialise_client()
+    @abstractmethod
+    async def create_signed_upload_url(self, path: str) -> str:
+        """Return a URL the client can PUT the object at ``path`` to."""
+
+    @abstractmethod
+    async def create_signed_download_url(self, path: str, expires_in: int) -> str:
+        """Return a URL the client can GET ``path`` from for ``expires_in`` seconds."""
+
+    @abstractmethod
+    async def create_signed_download_urls(self, paths: list[str], expires_in: int) -> dict[str, str]:
+        """Sign many paths at once. Returns ``{path: url}``; paths that could not be signed are omitted."""
+
+    @abstractmethod
+    async def get_file_info(self, path: str) -> dict | None:
+        """``{"size", "mime_type"}`` of the object at ``path``, or ``None`` if it does not exist."""
+
+    @abstractmethod
+    async def delete_files(self, paths: list[str]) -> None:
+        """Remove the objects at ``paths``; missing objects are ignored."""
+
+
+class _BaseSupabaseStorageBackend:
+    """Response parsing for the Supabase Storage API."""
+
+    @staticmethod
+    def _extract_upload_url(response: dict) -> str:
+        signed_url = response.get("signed_url")
+        if not signed_url:
+            raise ValueError(f"Unexpected response from Storage: {response}")
+        return signed_url
+
+    @staticmethod
+    def _extract_download_url(response: dict) -> str:
+        signed_url = response.get("signedURL") or response.get("signedUrl")
+        if not signed_url:
+            raise ValueError(f"Unexpected response from Storage: {response}")
+        return signed_url
+
+    @staticmethod
+    def _extract_download_urls(response: list[dict]) -> dict[str, str]:
+        signed_urls: dict[str, str] = {}
+        for item in response:
+            signed_url = item.get("signedURL") or item.get("signedUrl")
+            if item.get("error") or not signed_url:
+                logger.warning("Storage could not sign path=%s: %s", item.get("path"), item.get("error"))
+                continue
+            signed_urls[item["path"]] = signed_url
+        return signed_urls
+
+    @staticmethod
+    def _parse_object_info(response: dict) -> dict:
+        """Normalise Storage object info to ``{"size", "mime_type"}`` (older APIs nest both under ``metadata``)."""
+        metadata = response.get("metadata") or {}
+        return {
+            "size": response.get("size", metadata.get("size")),
+            "mime_type": response.get("content_type") or metadata.get("mimetype"),
+        }
+
+    @staticmethod
+    def _is_not_found(exc: Exception) -> bool:
+        return isinstance(exc, StorageApiError) and str(exc.status) in ("400", "404") and "not found" in str(exc.message).lower()
+
+
+class AsyncSupabaseStorageBackend(_BaseSupabaseStorageBackend, AsyncStorageBackend):
 
-    def _initialise_client(self) -> None:
+    def __init__(self) -> None:
         try:
             config = AppConfig()
-            self._client = create_client(config.supabase_url, config.supabase_key)
-            self._bucket = config.supabase_storage_bucket
-            logger.info("Supabase Storage client initialised (bucket=%s).", self._bucket)
+            self._client: AsyncClient = AsyncClient(config.supabase_url, config.supabase_key, options=AsyncClientOptions(httpx_client=HTTPClientPool().async_client))
+            self._bucket: str = config.supabase_storage_bucket
+            logger.info("Supabase async Storage client initialised (bucket=%s).", self._bucket)
+        except Exception as exc:
+            logger.error("Failed to initialise Supabase async Storage client: %s", exc)
+            raise
+
+    async def create_signed_upload_url(self, path: str) -> str:
+        return self._extract_upload_url(await self._client.storage.from_(self._bucket).create_signed_upload_url(path))
+
+    async def create_signed_download_url(self, path: str, expires_in: int) -> str:
+        return self._extract_download_url(await self._client.storage.from_(self._bucket).create_signed_url(path, expires_in))
+
+    async def create_signed_download_urls(self, paths: list[str], expires_in: int) -> dict[str, str]:
+        return self._extract_download_urls(await self._client.storage.from_(self._bucket).create_signed_urls(paths, expires_in))
+
+    async def get_file_info(self, path: str) -> dict | None:
+        try:
+            return self._parse_object_info(await self._client.storage.from_(self._bucket).info(path))
         except Exception as exc:
-            logger.error("Failed to initialise Supabase Storage client: %s", exc)
+            if self._is_not_found(exc):
+                return None
             raise
 
+    async def delete_files(self, paths: list[str]) -> None:
+        await self._client.storage.from_(self._bucket).remove(paths)
+
+
+class LocalStorageBackend:
+    """
+    Blocking filesystem operations behind :class:`AsyncLocalStorageBackend`,
+    also used directly by the ``/local-storage`` routes.
+
+    Objects live under ``<root>/<path>``, the same layout the local multipart
+    backend completes uploads into. Signed URLs point at
+    ``<public_url>/local-storage/object/<path>`` and carry an expiry and an
+    HMAC-SHA256 signature over method, path and expiry.
+
+    Uploads are written to a temporary file and renamed into place, so an
+    object is never truncated while a download is reading it.
+    """
+
+    CONTENT_TYPE_XATTR = "user.content_type"
+
+    def __init__(self, root: str, public_url: str, signing_key: str) -> None:
+        self._root = os.path.realpath(root)
+        self._public_url = public_url.rstrip("/")
+        self._signing_key = signing_key.encode()
+        os.makedirs(self._root, exist_ok=True)
+        logger.info("Local storage backend initialised (root=%s).", self._root)
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def object_path(self, path: str) -> str:
+        """
+        Absolute file path for the object at ``path``. Every segment must be a
+        plain name and the result must not pass through a symlink, so the
+        object is exactly ``<root>/<path>``: a path issued under
+        ``{user_id}/{file_id}/`` cannot reach any other prefix.
+        """
+        candidate = os.path.join(self._root, *split_storage_path(path))
+        if os.path.realpath(candidate) != candidate:
+            raise ValueError(f"Invalid storage path: {path!r}")
+        return candidate
+
+    def _signature(self, method: str, path: str, expires: int) -> str:
+        digest = hmac.new(self._signing_key, f"{method}\n{path}\n{expires}".encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+    def verify(self, method: str, path: str, expires: int, signature: str) -> bool:
+        """Whether ``signature`` was issued by this backend for ``method`` on ``path`` and has not expired."""
+        return expires >= time.time() and hmac.compare_digest(self._signature(method, path, expires), signature)
+
+    def signed_url(self, route: str, method: str, path: str, expires_in: int) -> str:
+        """URL of ``/local-storage/<route>/<path>`` that :meth:`verify` accepts for ``method`` until it expires."""
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self._signature(method, path, expires)})
+        return f"{self._public_url}/local-storage/{route}/{quote(path)}?{query}"
+
     def create_signed_upload_url(self, path: str) -> str:
+        self.object_path(path)
+        return self.signed_url("object", "PUT", path, PRESIGNED_URL_EXPIRY)
+
+    def create_signed_download_url(self, path: str, expires_in: int) -> str:
+        self.object_path(path)
+        return self.signed_url("object", "GET", path, expires_in)
+
+    def create_signed_download_urls(self, paths: list[str], expires_in: int) -> dict[str, str]:
+        return {path: self.create_signed_download_url(path, expires_in) for path in paths}
+
+    def content_type(self, file_path: str) -> str | None:
+        """Content type recorded at upload (as an extended attribute where supported), else guessed from the name."""
+        try:
+            return os.getxattr(file_path, self.CONTENT_TYPE_XATTR).decode()
+        except (AttributeError, OSError):
+            return mimetypes.guess_type(file_path)[0]
+
+    def set_content_type(self, file_path: str, content_type: str | None) -> None:
+        if content_type:
+            try:
+                os.setxattr(file_path, self.CONTENT_TYPE_XATTR, content_type.encode())
+            except (AttributeError, OSError):
+                pass  # filesystem without user xattrs: content_type() falls back to guessing
+
+    def get_file_info(self, path: str) -> dict | None:
+        file_path = self.object_path(path)
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            return None
+        return {"size": size, "mime_type": self.content_type(file_path)}
+
+    def delete_files(self, paths: list[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(self.object_path(path))
+            except FileNotFoundError:
+                pass
+
+
+class AsyncLocalStorageBackend(AsyncStorageBackend):
+    """Event-loop adapter for :class:`LocalStorageBackend`; filesystem calls run in a worker thread, signing inline."""
+
+    def __init__(self, backend: LocalStorageBackend) -> None:
+        self._backend = backend
+
+    @property
+    def local(self) -> LocalStorageBackend:
+        return self._backend
+
+    async def create_signed_upload_url(self, path: str) -> str:
+        return self._backend.create_signed_upload_url(path)
+
+    async def create_signed_download_url(self, path: str, expires_in: int) -> str:
+        return self._backend.create_signed_download_url(path, expires_in)
+
+    async def create_signed_download_urls(self, paths: list[str], expires_in: int) -> dict[str, str]:
+        return self._backend.create_signed_download_urls(paths, expires_in)
+
+    async def get_file_info(self, path: str) -> dict | None:
+        return await asyncio.to_thread(self._backend.get_file_info, path)
+
+    async def delete_files(self, paths: list[str]) -> None:
+        await asyncio.to_thread(self._backend.delete_files, paths)
+
+
+def create_async_storage_backend() -> AsyncStorageBackend:
+    config = AppConfig()
+    if config.storage_backend == "local":
+        return AsyncLocalStorageBackend(LocalStorageBackend(config.local_storage_root, config.local_storage_public_url, config.local_storage_signing_key))
+    return AsyncSupabaseStorageBackend()
+
+
+class AsyncStorageClient(metaclass=SingletonMeta):
+
+    def __init__(self, backend: AsyncStorageBackend | None = None) -> None:
+        self._backend = backend or create_async_storage_backend()
+        # Caps concurrent metadata lookups so a burst of confirms cannot flood Storage.
+        self._info_slots = asyncio.Semaphore(AppConfig().storage_info_concurrency)
+
+    @property
+    def backend(self) -> AsyncStorageBackend:
+        return self._backend
+
+    @limit_concurrency("storage")
+    @resilient("storage", idempotent=True)
+    @instrument_upstream("storage")
+    async def create_signed_upload_url(self, path: str) -> str:
         try:
-            response = self._client.storage.from_(self._bucket).create_signed_upload_url(path)
-            signed_url = response.get("signed_url")
-            if not signed_url:
-                raise ValueError(f"Unexpected response from Storage: {response}")
-            return signed_url
+            return await self._backend.create_signed_upload_url(path)
         except Exception as exc:
             logger.error("Failed to create signed upload URL for path=%s: %s", path, exc)
             raise
 
-    def create_signed_download_url(
+    @limit_concurrency("storage")
+    @resilient("storage", idempotent=True)
+    @instrument_upstream("storage")
+    async def create_signed_download_url(
         self,
         path: str,
         expires_in: int = PRESIGNED_URL_EXPIRY,
     ) -> str:
         try:
-            response = self._client.storage.from_(self._bucket).create_signed_url(path, expires_in)
-            signed_url = response.get("signedURL") or response.get("signedUrl")
-            if not signed_url:
-                raise ValueError(f"Unexpected response from Storage: {response}")
-            return signed_url
+            return await self._backend.create_signed_download_url(path, expires_in)
         except Exception as exc:
             logger.error("Failed to create signed download URL for path=%s: %s", path, exc)
             raise
 
-    def delete_file(self, path: str) -> None:
+    @limit_concurrency("storage")
+    @resilient("storage", idempotent=True)
+    @instrument_upstream("storage")
+    async def create_signed_download_urls(self, paths: list[str], expires_in: int = PRESIGNED_URL_EXPIRY) -> dict[str, str]:
+        """Sign many paths in one request. Returns ``{path: url}``; paths Storage could not sign are omitted."""
         try:
-            self._client.storage.from_(self._bucket).remove([path])
+            return await self._backend.create_signed_download_urls(paths, expires_in)
+        except Exception as exc:
+            logger.error("Failed to create signed download URLs for %d paths: %s", len(paths), exc)
+            raise
+
+    async def get_file_info(self, path: str) -> dict | None:
+        """Size and MIME type of the object at ``path`` from Storage metadata, or ``None`` if it does not exist."""
+        # Queue for an info slot before taking a storage admission slot, so waiting lookups never hold admission
+        # slots that signing and deletes need.
+        async with self._info_slots:
+            return await self._get_file_info(path)
+
+    @limit_concurrency("storage")
+    @resilient("storage", idempotent=True, operation="get_file_info")
+    @instrument_upstream("storage", "get_file_info")
+    async def _get_file_info(self, path: str) -> dict | None:
+        try:
+            return await self._backend.get_file_info(path)
+        except Exception as exc:
+            logger.error("Failed to read storage object info for path=%s: %s", path, exc)
+            raise
+
+    @limit_concurrency("storage")
+    @resilient("storage", idempotent=True)
+    @instrument_upstream("storage")
+    async def delete_file(self, path: str) -> None:
+        try:
+            await self._backend.delete_files([path])
             logger.info("Deleted file from storage: %s", path)
         except Exception as exc:
             logger.error("Failed to delete file from storage path=%s: %s", path, exc)
             raise
+
+    @limit_concurrency("storage")
+    @resilient("storage", idempotent=True)
+    @instrument_upstream("storage")
+    async def delete_files(self, paths: list[str]) -> None:
+        """Remove many objects with a single Storage request."""
+        try:
+            await self._backend.delete_files(paths)
+            logger.info("Deleted %d files from storage.", len(paths))
+        except Exception as exc:
+            logger.error("Failed to delete %d files from storage: %s", len(paths), exc)
+            raise
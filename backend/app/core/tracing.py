@@ -0,0 +1,114 @@
+"""
+Span exporters and tracer setup from ``AppConfig``.
+
+``TRACE_EXPORTER`` selects where sampled spans go:
+
+- ``otlp``: an OpenTelemetry collector, over OTLP/HTTP with the JSON encoding
+  (``POST {OTLP_ENDPOINT}/v1/traces``).
+- ``file``: one JSON object per line in ``TRACE_FILE_PATH``, for offline use.
+- ``none`` (default): nothing is recorded; requests still get trace ids.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+
+import httpx
+
+from app.core.config import AppConfig
+from app.utils.logger import logger
+from app.utils.tracing import Span, SpanExporter, Tracer
+
+_OTLP_STATUS_OK = 1
+_OTLP_STATUS_ERROR = 2
+_OTLP_SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+
+class JSONFileSpanExporter(SpanExporter):
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        with self._lock, open(self._path, "a", encoding="utf-8") as out:
+            out.write(lines)
+
+
+class OTLPHTTPSpanExporter(SpanExporter):
+    """
+    Uses its own small httpx client rather than the shared Supabase pool, so a
+    slow collector can never hold connections that requests are waiting for.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 10.0) -> None:
+        self._url = f"{endpoint.rstrip('/')}/v1/traces"
+        self._service_name = service_name
+        self._client = httpx.Client(timeout=timeout, limits=httpx.Limits(max_connections=2))
+
+    @staticmethod
+    def _attribute(key: str, value) -> dict:
+        if isinstance(value, bool):
+            encoded = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded = {"doubleValue": value}
+        else:
+            encoded = {"stringValue": str(value)}
+        return {"key": key, "value": encoded}
+
+    def _encode_span(self, span: Span) -> dict:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": _OTLP_SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_time_ns),
+            "endTimeUnixNano": str(span.end_time_ns),
+            "attributes": [self._attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": _OTLP_STATUS_ERROR, "message": span.error} if span.error else {"code": _OTLP_STATUS_OK},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def export(self, spans: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [self._attribute("service.name", self._service_name)]},
+                    "scopeSpans": [{"scope": {"name": "dropbox_app"}, "spans": [self._encode_span(span) for span in spans]}],
+                }
+            ]
+        }
+        response = self._client.post(self._url, json=payload)
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+def create_span_exporter() -> SpanExporter | None:
+    config = AppConfig()
+    if config.trace_exporter == "otlp":
+        logger.info("Exporting traces to OTLP collector at %s (sample ratio %.3f).", config.otlp_endpoint, config.trace_sample_ratio)
+        return OTLPHTTPSpanExporter(config.otlp_endpoint, config.trace_service_name)
+    if config.trace_exporter == "file":
+        logger.info("Writing traces to %s (sample ratio %.3f).", config.trace_file_path, config.trace_sample_ratio)
+        return JSONFileSpanExporter(config.trace_file_path)
+    return None
+
+
+def configure_tracing() -> Tracer:
+    config = AppConfig()
+    tracer = Tracer()
+    tracer.configure(
+        create_span_exporter(),
+        sample_ratio=config.trace_sample_ratio,
+        batch_size=config.trace_export_batch_size,
+        export_interval=config.trace_export_interval,
+    )
+    return tracer
@@ -1,126 +1,876 @@
 from __future__ import annotations
+import asyncio
+import copy
+import hashlib
+import time
 import uuid
 from datetime import datetime, timezone
-from app.constants.constants import PRESIGNED_URL_EXPIRY
-from app.core.storage import StorageClient
-from app.models.enums import FileStatus
+from typing import Any, ClassVar
+from pydantic import ValidationError
+from app.constants.constants import PRESIGNED_URL_EXPIRY, STORAGE_REMOVE_CHUNK_SIZE
+from app.core.cache import DownloadURLCache, ListingCache, UploadVerificationCache
+from app.core.config import AppConfig
+from app.core.multipart import MultipartUploadClient
+from app.core.storage import AsyncStorageClient
+from app.models.enums import CountMode, FileStatus
 from app.models.schemas import (
+    BatchDownloadURLItem,
+    BatchDownloadURLResponse,
+    BatchUploadURLItem,
+    BatchUploadURLResponse,
+    BulkDeleteItem,
+    BulkDeleteResponse,
     ConfirmUploadRequest,
     ConfirmUploadResponse,
     DownloadURLResponse,
     FileListResponse,
     FileResponse,
+    FileSearchQuery,
+    ResumablePartURL,
+    ResumablePartURLsResponse,
+    ResumableUploadRequest,
+    ResumableUploadSessionResponse,
+    ResumableUploadStatusResponse,
+    StorageUsageResponse,
     UploadURLRequest,
     UploadURLResponse,
 )
-from app.repositories.file_repository import FileRepository
-from app.utils.exceptions import FileNotFoundError, FileValidationError, StorageError
+from app.repositories.blob_repository import AsyncBlobRepository
+from app.repositories.file_repository import AsyncFileRepository
+from app.repositories.storage_delete_queue_repository import AsyncStorageDeleteQueueRepository
+from app.repositories.usage_repository import AsyncUsageRepository
+from app.utils.batching import chunked
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.exceptions import DropboxAppException, FileNotFoundError, FileValidationError, QuotaExceededError, StorageError
 from app.utils.logger import logger
+from app.utils.paths import is_safe_path_segment
+from app.utils.singleflight import AsyncSingleFlight
+from app.utils.tracing import traced_methods
 
 
-class FileFacade:
+class _BaseFileFacade:
+    """Validation, record-building and response-building rules of the file facade; no I/O."""
 
-    def __init__(self, file_repository: FileRepository, storage_client: StorageClient) -> None:
+    # CountMode -> PostgREST count method (None skips the COUNT entirely)
+    _COUNT_METHODS: ClassVar[dict[CountMode, str | None]] = {CountMode.EXACT: "exact", CountMode.ESTIMATED: "estimated", CountMode.NONE: None}
+
+    @staticmethod
+    def _build_storage_path(user_id: str, file_id: str, filename: str) -> str:
+        if not is_safe_path_segment(filename):  # request models reject these already; never build such a path regardless
+            raise FileValidationError("Invalid file name.")
+        return f"{user_id}/{file_id}/{filename}"
+
+    @staticmethod
+    def _build_blob_path(user_id: str, sha256: str) -> str:
+        return f"{user_id}/blobs/{sha256[:2]}/{sha256}"
+
+    @staticmethod
+    def _new_file_record(
+        file_id: str,
+        user_id: str,
+        storage_path: str,
+        request: UploadURLRequest,
+        status: FileStatus = FileStatus.UPLOADING,
+        blob_sha256: str | None = None,
+    ) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        record = {
+            "id": file_id,
+            "user_id": user_id,
+            "name": request.name,
+            "storage_path": storage_path,
+            "size_bytes": request.size_bytes,
+            "mime_type": request.mime_type,
+            "status": status.value,
+            "is_deleted": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if blob_sha256:
+            record["blob_sha256"] = blob_sha256
+        return record
+
+    @classmethod
+    def _new_resumable_record(
+        cls, file_id: str, user_id: str, storage_path: str, request: ResumableUploadRequest, upload_id: str, chunk_size: int
+    ) -> dict:
+        return {**cls._new_file_record(file_id, user_id, storage_path, request), "upload_id": upload_id, "chunk_size": chunk_size}
+
+    @staticmethod
+    def _validate_upload_items(items: list[dict[str, Any]]) -> list[UploadURLRequest | str]:
+        """Validate each batch item on its own; invalid items become their error message."""
+        validated: list[UploadURLRequest | str] = []
+        for item in items:
+            try:
+                validated.append(UploadURLRequest.model_validate(item))
+            except ValidationError as exc:
+                validated.append("; ".join(error["msg"].removeprefix("Value error, ") for error in exc.errors()))
+        return validated
+
+    @staticmethod
+    def _build_batch_upload_response(
+        validated: list[UploadURLRequest | str], signed: dict[int, tuple[str, str, str | None]]
+    ) -> BatchUploadURLResponse:
+        """``signed`` maps item index -> (file_id, storage_path, upload_url or None if signing failed)."""
+        results: list[BatchUploadURLItem] = []
+        for index, item in enumerate(validated):
+            if isinstance(item, str):
+                results.append(BatchUploadURLItem(index=index, error=item))
+                continue
+            file_id, storage_path, upload_url = signed[index]
+            if upload_url is None:
+                results.append(BatchUploadURLItem(index=index, error="Unable to generate upload URL."))
+            else:
+                results.append(BatchUploadURLItem(index=index, file_id=uuid.UUID(file_id), upload_url=upload_url, storage_path=storage_path))
+        return BatchUploadURLResponse(results=results)
+
+    @staticmethod
+    def _ensure_confirmable(existing: dict | None) -> dict:
+        if not existing:
+            raise FileNotFoundError("File not found or access denied.")
+
+        if existing["status"] != FileStatus.UPLOADING.value:
+            raise FileValidationError(f"File status is '{existing['status']}'; only 'uploading' " f"files can be confirmed.")
+        return existing
+
+    @classmethod
+    def _ensure_resumable(cls, existing: dict | None) -> dict:
+        existing = cls._ensure_confirmable(existing)
+        if not existing.get("upload_id"):
+            raise FileValidationError("File is not a resumable upload.")
+        return existing
+
+    @staticmethod
+    def _part_sizes(size_bytes: int, chunk_size: int) -> list[int]:
+        """Expected size of each part; index 0 is part 1."""
+        full, last = divmod(size_bytes, chunk_size)
+        return [chunk_size] * full + ([last] if last else [])
+
+    @classmethod
+    def _build_resumable_status(cls, existing: dict, parts: dict[int, int]) -> ResumableUploadStatusResponse:
+        """``parts`` is the backend's ``{part_number: size}``; a part counts only if its size is exactly right."""
+        expected = cls._part_sizes(existing["size_bytes"], existing["chunk_size"])
+        ranges: list[tuple[int, int]] = []
+        missing: list[int] = []
+        offset = 0
+        for part_number, size in enumerate(expected, start=1):
+            if parts.get(part_number) != size:
+                missing.append(part_number)
+            elif ranges and ranges[-1][1] == offset:
+                ranges[-1] = (ranges[-1][0], offset + size)
+            else:
+                ranges.append((offset, offset + size))
+            offset += size
+        return ResumableUploadStatusResponse(
+            file_id=uuid.UUID(existing["id"]),
+            size_bytes=existing["size_bytes"],
+            chunk_size=existing["chunk_size"],
+            total_parts=len(expected),
+            received_bytes=sum(end - start for start, end in ranges),
+            received_ranges=ranges,
+            missing_parts=missing,
+        )
+
+    @classmethod
+    def _validate_part_numbers(cls, existing: dict, part_numbers: list[int]) -> list[int]:
+        total_parts = len(cls._part_sizes(existing["size_bytes"], existing["chunk_size"]))
+        invalid = [number for number in part_numbers if not 1 <= number <= total_parts]
+        if invalid:
+            raise FileValidationError(f"Part numbers must be between 1 and {total_parts}; got {invalid}.")
+        return list(dict.fromkeys(part_numbers))
+
+    @staticmethod
+    def _verification_error(existing: dict, info: dict | None, check_mime_type: bool) -> str | None:
+        """Compare Storage object metadata with the file record; ``None`` when they agree."""
+        if info is None:
+            return "Uploaded object was not found in storage."
+        if info["size"] != existing["size_bytes"]:
+            return f"Uploaded object is {info['size']} bytes; expected {existing['size_bytes']}."
+        if check_mime_type and info["mime_type"] != existing["mime_type"]:
+            return f"Uploaded object has type '{info['mime_type']}'; expected '{existing['mime_type']}'."
+        return None
+
+    @staticmethod
+    def _ensure_downloadable(existing: dict | None) -> dict:
+        if not existing:
+            raise FileNotFoundError("File not found or access denied.")
+
+        if existing["status"] != FileStatus.UPLOADED.value:
+            raise FileValidationError("File is not in 'uploaded' state.")
+
+        if existing.get("is_deleted"):
+            raise FileNotFoundError("File has been deleted.")
+        return existing
+
+    @classmethod
+    def _download_error(cls, existing: dict | None) -> str | None:
+        """Per-item variant of :meth:`_ensure_downloadable` for batch endpoints."""
+        try:
+            cls._ensure_downloadable(existing)
+        except DropboxAppException as exc:
+            return exc.message
+        return None
+
+    @staticmethod
+    def _decode_list_cursor(cursor: str) -> tuple[str, str]:
+        values = decode_cursor(cursor, "created_at", "id")
+        try:
+            # Re-serialise so only well-formed values ever reach the PostgREST filter string.
+            return datetime.fromisoformat(values["created_at"]).isoformat(), str(uuid.UUID(values["id"]))
+        except ValueError as exc:
+            raise FileValidationError("Invalid pagination cursor.") from exc
+
+    @staticmethod
+    def _search_params(search: FileSearchQuery) -> tuple:
+        """Listing-cache params for a search: a digest, so user input never shapes the cache key."""
+        return ("search", hashlib.sha256(search.model_dump_json().encode()).hexdigest())
+
+    @staticmethod
+    def _search_filters(search: FileSearchQuery) -> dict:
+        """``AsyncFileRepository.search_by_user`` filters for ``search``."""
+        return {
+            "name_contains": search.q,
+            "name_prefix": search.prefix,
+            "mime_types": [mime_type.value for mime_type in search.mime_type] if search.mime_type else None,
+            "min_size": search.min_size,
+            "max_size": search.max_size,
+            "created_after": search.created_after.isoformat() if search.created_after else None,
+            "created_before": search.created_before.isoformat() if search.created_before else None,
+        }
+
+    @staticmethod
+    def _build_list_response(rows: list[dict], total: int | None, skip: int, limit: int) -> FileListResponse:
+        """``rows`` holds up to ``limit + 1`` rows; the extra one only signals that another page exists."""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor({"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}) if has_more else None
+        files = [FileResponse(**row) for row in rows]
+        return FileListResponse(files=files, total=total, skip=skip, limit=limit, next_cursor=next_cursor)
+
+    @staticmethod
+    def _build_bulk_delete_response(file_ids: list[str], deleted_ids: set[str]) -> BulkDeleteResponse:
+        results = [
+            BulkDeleteItem(file_id=uuid.UUID(file_id), deleted=True)
+            if file_id in deleted_ids
+            else BulkDeleteItem(file_id=uuid.UUID(file_id), deleted=False, error="File not found or access denied.")
+            for file_id in file_ids
+        ]
+        return BulkDeleteResponse(deleted_count=len(deleted_ids), results=results)
+
+    @staticmethod
+    def _ensure_exists(existing: dict | None) -> dict:
+        if not existing:
+            raise FileNotFoundError("File not found or access denied.")
+        return existing
+
+    @staticmethod
+    def _split_by_blob(rows: list[dict]) -> tuple[list[str], list[tuple[str, str]]]:
+        """Partition rows into (storage paths owned outright, ``(user_id, sha256)`` of blobs whose reference they hold)."""
+        own_paths = [row["storage_path"] for row in rows if not row.get("blob_sha256")]
+        blobs = [(row["user_id"], row["blob_sha256"]) for row in rows if row.get("blob_sha256")]
+        return own_paths, blobs
+
+    @staticmethod
+    def _quota_error(usage: dict, quota: int, size_bytes: int) -> str | None:
+        """Why ``size_bytes`` more would exceed ``quota`` (0 = unlimited), counting uploads in progress; else ``None``."""
+        if quota <= 0:
+            return None
+        available = quota - usage["bytes_used"] - usage["bytes_pending"]
+        if size_bytes <= available:
+            return None
+        return f"Upload of {size_bytes} bytes exceeds the storage quota: {max(0, available)} of {quota} bytes available."
+
+    @classmethod
+    def _apply_quota(cls, validated: list[UploadURLRequest | str], usage: dict, quota: int) -> list[UploadURLRequest | str]:
+        """Batch variant of :meth:`_quota_error`: items that no longer fit, in request order, become errors."""
+        reserved = 0
+        result: list[UploadURLRequest | str] = []
+        for item in validated:
+            if isinstance(item, UploadURLRequest):
+                error = cls._quota_error(usage, quota, reserved + item.size_bytes)
+                if error:
+                    item = "Upload exceeds the storage quota."
+                else:
+                    reserved += item.size_bytes
+            result.append(item)
+        return result
+
+    @staticmethod
+    def _build_usage_response(usage: dict, quota: int) -> StorageUsageResponse:
+        response = StorageUsageResponse(bytes_used=usage["bytes_used"], file_count=usage["file_count"], bytes_pending=usage["bytes_pending"])
+        if quota > 0:
+            response.quota_bytes = quota
+            response.bytes_available = max(0, quota - usage["bytes_used"] - usage["bytes_pending"])
+        return response
+
+    @property
+    def _usage(self) -> AsyncUsageRepository:
+        if self._usage_repo is None:
+            raise StorageError("Usage accounting is not configured.")
+        return self._usage_repo
+
+    @property
+    def _multipart(self) -> MultipartUploadClient:
+        if self._multipart_client is None:
+            raise StorageError("Resumable uploads are not configured.")
+        return self._multipart_client
+
+
+@traced_methods
+class AsyncFileFacade(_BaseFileFacade):
+    """
+    File operations behind the ``/files`` routes.
+
+    Upstream Supabase calls are awaited on the event loop rather than pinning
+    a threadpool worker for their duration.
+    """
+
+    def __init__(
+        self,
+        file_repository: AsyncFileRepository,
+        storage_client: AsyncStorageClient,
+        listing_cache: ListingCache | None = None,
+        download_url_cache: DownloadURLCache | None = None,
+        multipart_client: MultipartUploadClient | None = None,
+        blob_repository: AsyncBlobRepository | None = None,
+        delete_queue: AsyncStorageDeleteQueueRepository | None = None,
+        verification_cache: UploadVerificationCache | None = None,
+        single_flight: AsyncSingleFlight | None = None,
+        usage_repository: AsyncUsageRepository | None = None,
+    ) -> None:
         self._file_repo = file_repository
         self._storage_client = storage_client
+        self._listing_cache = listing_cache
+        self._download_url_cache = download_url_cache
+        self._multipart_client = multipart_client
+        self._blob_repo = blob_repository
+        self._delete_queue = delete_queue
+        self._verification_cache = verification_cache
+        self._single_flight = single_flight
+        self._usage_repo = usage_repository
 
-    def generate_upload_url(self, user_id: str, request: UploadURLRequest) -> UploadURLResponse:
+    def with_multipart_client(self, multipart_client: MultipartUploadClient) -> AsyncFileFacade:
+        """A copy of this facade that can also start, finish and abort resumable uploads."""
+        facade = copy.copy(self)
+        facade._multipart_client = multipart_client
+        return facade
+
+    async def generate_upload_url(self, user_id: str, request: UploadURLRequest) -> UploadURLResponse:
         """
         Create a DB record (status=uploading) and return a presigned
         upload URL so the client can push the file directly to storage.
+
+        Requests carrying a ``sha256`` go through the content-addressed blob
+        layer first (see :meth:`_generate_blob_upload_url`). Uploads that would
+        exceed the storage quota are rejected before anything is signed.
         """
+        await self._ensure_within_quota(user_id, request.size_bytes)
         file_id = str(uuid.uuid4())
+        if request.sha256 and self._blob_repo:
+            response = await self._generate_blob_upload_url(user_id, file_id, request)
+            if response:
+                return response
+
         storage_path = self._build_storage_path(user_id, file_id, request.name)
 
         # 1. Generate presigned upload URL from Supabase Storage
         try:
-            upload_url = self._storage_client.create_signed_upload_url(storage_path)
+            upload_url = await self._storage_client.create_signed_upload_url(storage_path)
         except Exception as exc:
             logger.error("Storage upload URL generation failed: %s", exc)
             raise StorageError("Unable to generate upload URL. Please try again.") from exc
 
-        # 2. Persist file metadata with status='uploading'
-        now = datetime.now(timezone.utc).isoformat()
-        record = self._file_repo.create(
-            {
-                "id": file_id,
-                "user_id": user_id,
-                "name": request.name,
-                "storage_path": storage_path,
-                "size_bytes": request.size_bytes,
-                "mime_type": request.mime_type,
-                "status": FileStatus.UPLOADING.value,
-                "is_deleted": False,
-                "created_at": now,
-                "updated_at": now,
-            }
-        )
+        # 2. Persist file metadata with status='uploading', reserving its bytes against the quota
+        record = await self._create_record(user_id, self._new_file_record(file_id, user_id, storage_path, request))
 
         logger.info("Upload URL generated: file_id=%s, user_id=%s", file_id, user_id)
 
         return UploadURLResponse(file_id=record["id"], upload_url=upload_url, storage_path=storage_path)
 
-    def confirm_upload(self, user_id: str, file_id: str, request: ConfirmUploadRequest) -> ConfirmUploadResponse:
-        existing = self._file_repo.get_by_id(file_id, user_id)
-        if not existing:
-            raise FileNotFoundError("File not found or access denied.")
+    async def _generate_blob_upload_url(self, user_id: str, file_id: str, request: UploadURLRequest) -> UploadURLResponse | None:
+        """
+        Reuse the user's uploaded blob with the same hash (no transfer; the file is
+        ``uploaded`` immediately), or claim the hash and have the client upload
+        to the blob's path. Returns ``None`` when the blob exists but cannot be
+        shared yet (still uploading, or sizes disagree) so the caller falls back
+        to a private upload.
+        """
+        sha256 = request.sha256
+        blob = await self._blob_repo.get(user_id, sha256)
+        if blob and blob["size_bytes"] == request.size_bytes and await self._blob_repo.retain(user_id, sha256):
+            try:
+                await self._create_record(user_id, self._new_file_record(file_id, user_id, blob["storage_path"], request, FileStatus.UPLOADED, sha256))
+            except QuotaExceededError:
+                await self._blob_repo.release([(user_id, sha256)])
+                raise
+            await self._invalidate_listing(user_id)
+            logger.info("Upload deduplicated: file_id=%s, user_id=%s, sha256=%s", file_id, user_id, sha256)
+            return UploadURLResponse(file_id=uuid.UUID(file_id), storage_path=blob["storage_path"], already_present=True)
 
-        if existing["status"] != FileStatus.UPLOADING.value:
-            raise FileValidationError(f"File status is '{existing['status']}'; only 'uploading' " f"files can be confirmed.")
+        storage_path = self._build_blob_path(user_id, sha256)
+        if blob or not await self._blob_repo.create(user_id, sha256, storage_path, request.size_bytes):
+            return None
+
+        try:
+            upload_url = await self._storage_client.create_signed_upload_url(storage_path)
+        except Exception as exc:
+            await self._blob_repo.release([(user_id, sha256)])
+            logger.error("Storage upload URL generation failed: %s", exc)
+            raise StorageError("Unable to generate upload URL. Please try again.") from exc
+
+        try:
+            await self._create_record(user_id, self._new_file_record(file_id, user_id, storage_path, request, blob_sha256=sha256))
+        except QuotaExceededError:
+            await self._blob_repo.release([(user_id, sha256)])
+            raise
+        logger.info("Upload URL generated for new blob: file_id=%s, user_id=%s, sha256=%s", file_id, user_id, sha256)
+
+        return UploadURLResponse(file_id=uuid.UUID(file_id), upload_url=upload_url, storage_path=storage_path)
+
+    async def generate_upload_urls(self, user_id: str, items: list[dict[str, Any]]) -> BatchUploadURLResponse:
+        """
+        Batch variant of :meth:`generate_upload_url`: items are signed concurrently
+        (bounded by ``upload_sign_concurrency``) and every successfully signed
+        item is persisted with a single bulk insert.
+        """
+        validated = self._validate_upload_items(items)
+        quota = AppConfig().storage_quota_bytes
+        if self._usage_repo and quota > 0 and any(isinstance(item, UploadURLRequest) for item in validated):
+            validated = self._apply_quota(validated, await self._usage_repo.get(user_id), quota)
+        pending = {
+            index: (str(uuid.uuid4()), item) for index, item in enumerate(validated) if isinstance(item, UploadURLRequest)
+        }
+        semaphore = asyncio.Semaphore(AppConfig().upload_sign_concurrency)
+
+        async def sign(index: int) -> tuple[str, str, str | None]:
+            file_id, request = pending[index]
+            storage_path = self._build_storage_path(user_id, file_id, request.name)
+            try:
+                async with semaphore:
+                    return file_id, storage_path, await self._storage_client.create_signed_upload_url(storage_path)
+            except Exception as exc:
+                logger.error("Storage upload URL generation failed for item %d: %s", index, exc)
+                return file_id, storage_path, None
+
+        signed = dict(zip(pending, await asyncio.gather(*(sign(index) for index in pending))))
+
+        records = [
+            self._new_file_record(file_id, user_id, storage_path, pending[index][1])
+            for index, (file_id, storage_path, upload_url) in signed.items()
+            if upload_url is not None
+        ]
+        if records:
+            created = {row["id"] for row in await self._create_records(user_id, records)}
+            # Items a concurrent upload pushed past the quota since the pre-check above.
+            for index, (file_id, _, upload_url) in signed.items():
+                if upload_url is not None and file_id not in created:
+                    validated[index] = "Upload exceeds the storage quota."
+            records = [record for record in records if record["id"] in created]
+        logger.info("Batch upload URLs generated: %d of %d items, user_id=%s", len(records), len(items), user_id)
+
+        return self._build_batch_upload_response(validated, signed)
+
+    async def confirm_upload(self, user_id: str, file_id: str, request: ConfirmUploadRequest) -> ConfirmUploadResponse:
+        existing = self._ensure_confirmable(await self._file_repo.get_by_id(file_id, user_id))
 
         new_status = request.status.value
+        if existing.get("upload_id") and new_status == FileStatus.UPLOADED.value:
+            raise FileValidationError("Resumable uploads must be finalized via the resumable complete endpoint.")
 
         if new_status == FileStatus.FAILED.value:
-            self._safe_delete_storage(existing["storage_path"])
-            self._file_repo.delete(file_id, user_id)
+            await self._safe_abort_multipart(existing)
+            await self._file_repo.delete(file_id, user_id)
+            for storage_path in await self._unreferenced_storage_paths([existing]):
+                await self._safe_delete_storage(storage_path)
             logger.info("Upload marked as failed — cleaned up file_id=%s", file_id)
         else:
-            self._file_repo.update_status(file_id, user_id, new_status)
+            await self._verify_upload(existing)
+            if existing.get("blob_sha256"):
+                await self._blob_repo.mark_uploaded(user_id, existing["blob_sha256"])
+            await self._file_repo.update_status(file_id, user_id, new_status)
+            await self._invalidate_listing(user_id)
             logger.info("Upload confirmed: file_id=%s", file_id)
 
         return ConfirmUploadResponse(file_id=uuid.UUID(file_id), status=request.status)
 
-    def list_files(self, user_id: str, skip: int = 0, limit: int = 20) -> FileListResponse:
-        rows, total = self._file_repo.list_by_user(user_id, skip=skip, limit=limit)
+    async def start_resumable_upload(self, user_id: str, request: ResumableUploadRequest) -> ResumableUploadSessionResponse:
+        """
+        Open a multipart upload in storage and create its ``uploading`` record.
 
-        files = [FileResponse(**row) for row in rows]
-        return FileListResponse(files=files, total=total, skip=skip, limit=limit)
+        The client uploads parts in parallel through :meth:`get_resumable_part_urls`,
+        resumes by asking :meth:`get_resumable_status` for the missing parts, and
+        calls :meth:`finalize_resumable_upload` once every part is stored.
+        """
+        await self._ensure_within_quota(user_id, request.size_bytes)
+        file_id = str(uuid.uuid4())
+        storage_path = self._build_storage_path(user_id, file_id, request.name)
+        chunk_size = self._multipart.chunk_size_for(request.size_bytes)
 
-    def get_download_url(self, user_id: str, file_id: str) -> DownloadURLResponse:
-        """Generate a presigned download URL for an uploaded file."""
-        existing = self._file_repo.get_by_id(file_id, user_id)
-        if not existing:
-            raise FileNotFoundError("File not found or access denied.")
+        try:
+            upload_id = await asyncio.to_thread(self._multipart.start, storage_path, request.mime_type)
+        except Exception as exc:
+            raise StorageError("Unable to start resumable upload. Please try again.") from exc
 
-        if existing["status"] != FileStatus.UPLOADED.value:
-            raise FileValidationError("File is not in 'uploaded' state.")
+        record = self._new_resumable_record(file_id, user_id, storage_path, request, upload_id, chunk_size)
+        try:
+            await self._create_record(user_id, record)
+        except QuotaExceededError:
+            await self._safe_abort_multipart(record)
+            raise
+        total_parts = -(-request.size_bytes // chunk_size)
+        logger.info("Resumable upload started: file_id=%s, user_id=%s, parts=%d", file_id, user_id, total_parts)
 
-        if existing.get("is_deleted"):
-            raise FileNotFoundError("File has been deleted.")
+        return ResumableUploadSessionResponse(
+            file_id=uuid.UUID(file_id),
+            storage_path=storage_path,
+            chunk_size=chunk_size,
+            total_parts=total_parts,
+            max_concurrency=self._multipart.max_concurrency,
+        )
+
+    async def get_resumable_status(self, user_id: str, file_id: str) -> ResumableUploadStatusResponse:
+        """Report which byte ranges of a resumable upload are already stored and which parts are missing."""
+        existing = self._ensure_resumable(await self._file_repo.get_by_id(file_id, user_id))
+        try:
+            parts = await asyncio.to_thread(self._multipart.list_parts, existing["storage_path"], existing["upload_id"])
+        except Exception as exc:
+            raise StorageError("Unable to read resumable upload state. Please try again.") from exc
+        await self._file_repo.touch(file_id, user_id)
+        return self._build_resumable_status(existing, parts)
+
+    async def get_resumable_part_urls(self, user_id: str, file_id: str, part_numbers: list[int]) -> ResumablePartURLsResponse:
+        existing = self._ensure_resumable(await self._file_repo.get_by_id(file_id, user_id))
+        part_numbers = self._validate_part_numbers(existing, part_numbers)
+        try:
+            urls = await asyncio.to_thread(self._multipart.sign_parts, existing["storage_path"], existing["upload_id"], part_numbers)
+        except Exception as exc:
+            raise StorageError("Unable to generate part upload URLs. Please try again.") from exc
+        # Clients fetch part URLs as they go, so this keeps a long transfer from looking abandoned to the reaper.
+        await self._file_repo.touch(file_id, user_id)
+        return ResumablePartURLsResponse(
+            parts=[ResumablePartURL(part_number=number, upload_url=urls[number]) for number in part_numbers], expires_in=PRESIGNED_URL_EXPIRY
+        )
+
+    async def finalize_resumable_upload(self, user_id: str, file_id: str) -> ConfirmUploadResponse:
+        """Assemble the stored parts into the final object and mark the file ``uploaded``."""
+        existing = self._ensure_resumable(await self._file_repo.get_by_id(file_id, user_id))
+        try:
+            parts = await asyncio.to_thread(self._multipart.list_parts, existing["storage_path"], existing["upload_id"])
+        except Exception as exc:
+            raise StorageError("Unable to read resumable upload state. Please try again.") from exc
+
+        upload_status = self._build_resumable_status(existing, parts)
+        if upload_status.missing_parts:
+            raise FileValidationError(
+                f"Upload incomplete: {len(upload_status.missing_parts)} of {upload_status.total_parts} parts are missing."
+            )
+
+        try:
+            await asyncio.to_thread(
+                self._multipart.complete, existing["storage_path"], existing["upload_id"], list(range(1, upload_status.total_parts + 1))
+            )
+        except Exception as exc:
+            raise StorageError("Unable to finalize resumable upload. Please try again.") from exc
+
+        await self._file_repo.update_status(file_id, user_id, FileStatus.UPLOADED.value)
+        await self._invalidate_listing(user_id)
+        logger.info("Resumable upload finalized: file_id=%s", file_id)
+
+        return ConfirmUploadResponse(file_id=uuid.UUID(file_id), status=FileStatus.UPLOADED)
+
+    async def list_files(
+        self, user_id: str, skip: int = 0, limit: int = 20, cursor: str | None = None, count: CountMode = CountMode.EXACT
+    ) -> FileListResponse:
+        """
+        List a page of the user's files. With ``cursor`` the page is fetched by keyset
+        on ``(created_at, id)`` and ``skip`` is ignored.
+
+        Pages are served from the listing cache when one is configured; every
+        mutation that can change what is listed invalidates the user's pages.
+        """
+        params = (skip, limit, cursor, count.value)
+        version = await self._listing_version(user_id)
+        if version:
+            cached = await self._listing_cache.aget(user_id, version, params)
+            if cached:
+                return FileListResponse.model_validate_json(cached)
+
+        async def fetch() -> FileListResponse:
+            after = self._decode_list_cursor(cursor) if cursor else None
+            rows, total = await self._file_repo.list_by_user(
+                user_id, skip=None if after else skip, limit=limit + 1, after=after, count=self._COUNT_METHODS[count]
+            )
+            response = self._build_list_response(rows, total, 0 if after else skip, limit)
+            if version:
+                await self._listing_cache.aset(user_id, version, params, response.model_dump_json())
+            return response
+
+        # The listing version is part of the key, and invalidation also drops the user's in-flight calls,
+        # so a request made after an invalidation never joins an older query.
+        return await self._single_flight.do(("list_files", user_id, version, params), fetch) if self._single_flight else await fetch()
+
+    async def search_files(self, user_id: str, search: FileSearchQuery) -> FileListResponse:
+        """
+        Search the user's uploaded files by name substring or prefix, MIME
+        type, size and creation time, newest first. Pages follow
+        ``next_cursor``; ``total`` is only computed when asked for.
+
+        Results are cached and coalesced like :meth:`list_files` and
+        invalidated by the same mutations.
+        """
+        params = self._search_params(search)
+        version = await self._listing_version(user_id)
+        if version:
+            cached = await self._listing_cache.aget(user_id, version, params)
+            if cached:
+                return FileListResponse.model_validate_json(cached)
+
+        async def fetch() -> FileListResponse:
+            after = self._decode_list_cursor(search.cursor) if search.cursor else None
+            rows, total = await self._file_repo.search_by_user(
+                user_id, limit=search.limit + 1, after=after, count=self._COUNT_METHODS[search.count], **self._search_filters(search)
+            )
+            response = self._build_list_response(rows, total, 0, search.limit)
+            if version:
+                await self._listing_cache.aset(user_id, version, params, response.model_dump_json())
+            return response
+
+        return await self._single_flight.do(("search_files", user_id, version, params), fetch) if self._single_flight else await fetch()
+
+    async def get_download_url(self, user_id: str, file_id: str) -> DownloadURLResponse:
+        """
+        Generate a presigned download URL for an uploaded file, reusing a cached
+        URL for the same object while enough of its lifetime remains. Identical
+        concurrent requests share one lookup and signing round trip.
+        """
+        _, download_url, expires_in = await self._download_source(user_id, file_id)
+        return DownloadURLResponse(file_id=uuid.UUID(file_id), download_url=download_url, expires_in=expires_in)
+
+    async def get_download_source(self, user_id: str, file_id: str) -> tuple[dict, str]:
+        """
+        Return the file record and a signed Storage URL for it, for callers
+        that fetch the object themselves (the streaming download route).
+        """
+        existing, download_url, _ = await self._download_source(user_id, file_id)
+        return existing, download_url
+
+    async def _download_source(self, user_id: str, file_id: str) -> tuple[dict, str, int]:
+        if self._single_flight:
+            return await self._single_flight.do(("get_download_url", user_id, file_id), lambda: self._sign_download(user_id, file_id))
+        return await self._sign_download(user_id, file_id)
+
+    async def _sign_download(self, user_id: str, file_id: str) -> tuple[dict, str, int]:
+        existing = self._ensure_downloadable(await self._file_repo.get_by_id(file_id, user_id))
+        storage_path = existing["storage_path"]
 
+        cached = await self._download_url_cache.aget(storage_path) if self._download_url_cache else None
+        if cached:
+            download_url, remaining = cached
+            return existing, download_url, remaining
+
+        # Taken before signing so the recorded expiry is never later than the real one.
+        expires_at = time.time() + PRESIGNED_URL_EXPIRY
         try:
-            download_url = self._storage_client.create_signed_download_url(existing["storage_path"], expires_in=PRESIGNED_URL_EXPIRY)
+            download_url = await self._storage_client.create_signed_download_url(storage_path, expires_in=PRESIGNED_URL_EXPIRY)
         except Exception as exc:
             logger.error("Storage download URL generation failed: %s", exc)
             raise StorageError("Unable to generate download URL. Please try again.") from exc
 
-        return DownloadURLResponse(file_id=uuid.UUID(file_id), download_url=download_url, expires_in=PRESIGNED_URL_EXPIRY)
+        if self._download_url_cache:
+            await self._download_url_cache.aset(storage_path, download_url, expires_at)
+        return existing, download_url, PRESIGNED_URL_EXPIRY
 
-    def delete_file(self, user_id: str, file_id: str) -> None:
-        existing = self._file_repo.get_by_id(file_id, user_id)
-        if not existing:
-            raise FileNotFoundError("File not found or access denied.")
+    async def get_download_urls(self, user_id: str, file_ids: list[str]) -> BatchDownloadURLResponse:
+        """
+        Issue download URLs for many files with one ownership query and one
+        bulk signing call. Failures are reported per file instead of failing
+        the whole batch.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        rows = {row["id"]: row for row in await self._file_repo.get_by_ids(file_ids, user_id)}
+
+        results: dict[str, BatchDownloadURLItem] = {}
+        downloadable: dict[str, list[str]] = {}  # storage_path -> file_ids (deduplicated files share a path)
+        for file_id in file_ids:
+            error = self._download_error(rows.get(file_id))
+            if error:
+                results[file_id] = BatchDownloadURLItem(file_id=uuid.UUID(file_id), error=error)
+            else:
+                downloadable.setdefault(rows[file_id]["storage_path"], []).append(file_id)
+
+        # One cache round trip for the whole batch.
+        cached_urls = await self._download_url_cache.amget(list(downloadable)) if self._download_url_cache and downloadable else {}
+        to_sign: dict[str, list[str]] = {}
+        for storage_path, path_file_ids in downloadable.items():
+            cached = cached_urls.get(storage_path)
+            if not cached:
+                to_sign[storage_path] = path_file_ids
+                continue
+            for file_id in path_file_ids:
+                results[file_id] = BatchDownloadURLItem(file_id=uuid.UUID(file_id), download_url=cached[0], expires_in=cached[1])
+
+        if to_sign:
+            expires_at = time.time() + PRESIGNED_URL_EXPIRY
+            try:
+                signed_urls = await self._storage_client.create_signed_download_urls(list(to_sign), expires_in=PRESIGNED_URL_EXPIRY)
+            except Exception as exc:
+                logger.error("Storage bulk download URL generation failed: %s", exc)
+                raise StorageError("Unable to generate download URLs. Please try again.") from exc
+
+            for storage_path, path_file_ids in to_sign.items():
+                download_url = signed_urls.get(storage_path)
+                for file_id in path_file_ids:
+                    if download_url:
+                        results[file_id] = BatchDownloadURLItem(file_id=uuid.UUID(file_id), download_url=download_url, expires_in=PRESIGNED_URL_EXPIRY)
+                    else:
+                        results[file_id] = BatchDownloadURLItem(file_id=uuid.UUID(file_id), error="Unable to generate download URL.")
+            if self._download_url_cache:
+                await self._download_url_cache.amset({path: url for path, url in signed_urls.items() if path in to_sign and url}, expires_at)
 
-        self._safe_delete_storage(existing["storage_path"])
-        self._file_repo.delete(file_id, user_id)
+        return BatchDownloadURLResponse(results=[results[file_id] for file_id in file_ids])
+
+    async def delete_file(self, user_id: str, file_id: str) -> None:
+        existing = self._ensure_exists(await self._file_repo.get_by_id(file_id, user_id))
+
+        await self._safe_abort_multipart(existing)
+        await self._file_repo.delete(file_id, user_id)
+        for storage_path in await self._unreferenced_storage_paths([existing]):
+            await self._safe_delete_storage(storage_path)
+        await self._invalidate_listing(user_id)
         logger.info("File deleted: file_id=%s, user_id=%s", file_id, user_id)
 
-    @staticmethod
-    def _build_storage_path(user_id: str, file_id: str, filename: str) -> str:
-        return f"{user_id}/{file_id}/{filename}"
+    async def delete_files(self, user_id: str, file_ids: list[str]) -> BulkDeleteResponse:
+        """
+        Delete many files: one lookup query, concurrent chunked Storage removals
+        and one row-delete statement, instead of three round trips per file.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        rows = await self._file_repo.get_by_ids(file_ids, user_id)
+        found_ids = [row["id"] for row in rows]
+
+        if found_ids:
+            # Unfinished resumable uploads leave parts behind that the reaper cannot find once the row is gone.
+            await asyncio.gather(*(self._safe_abort_multipart(row) for row in rows if row.get("upload_id")))
+            await self._file_repo.delete_many(found_ids, user_id)
+            await self._safe_delete_storage_many(await self._unreferenced_storage_paths(rows))
+            await self._invalidate_listing(user_id)
+        logger.info("Bulk delete: %d of %d files deleted, user_id=%s", len(found_ids), len(file_ids), user_id)
+
+        return self._build_bulk_delete_response(file_ids, set(found_ids))
+
+    async def get_usage(self, user_id: str) -> StorageUsageResponse:
+        """The user's storage usage and quota, read from the per-user counters in one lookup."""
+        return self._build_usage_response(await self._usage.get(user_id), AppConfig().storage_quota_bytes)
+
+    async def _ensure_within_quota(self, user_id: str, size_bytes: int) -> None:
+        """
+        Raise :class:`QuotaExceededError` before anything is signed if the upload would not fit.
+        Only a fast pre-check: :meth:`_create_records` enforces the quota atomically.
+        """
+        quota = AppConfig().storage_quota_bytes
+        if self._usage_repo is None or quota <= 0:
+            return
+        error = self._quota_error(await self._usage_repo.get(user_id), quota, size_bytes)
+        if error:
+            raise QuotaExceededError(error)
+
+    async def _create_records(self, user_id: str, records: list[dict]) -> list[dict]:
+        """
+        Insert new records of the user and return those inserted. With a quota configured, the
+        database reserves their bytes atomically and skips records that no longer fit.
+        """
+        quota = AppConfig().storage_quota_bytes
+        if self._usage_repo is None or quota <= 0:
+            return await self._file_repo.create_many(records)
+        return await self._file_repo.create_within_quota(user_id, records, quota)
+
+    async def _create_record(self, user_id: str, record: dict) -> dict:
+        """Single-record :meth:`_create_records`; raises :class:`QuotaExceededError` if it no longer fits."""
+        created = await self._create_records(user_id, [record])
+        if not created:
+            raise QuotaExceededError("Upload exceeds the storage quota.")
+        return created[0]
+
+    async def _verify_upload(self, existing: dict) -> None:
+        """
+        Check the uploaded object against the record using Storage metadata
+        only (existence, size and optionally MIME type) — the object itself is
+        never downloaded. Raises :class:`FileValidationError` on a mismatch.
+        """
+        config = AppConfig()
+        storage_path, size_bytes = existing["storage_path"], existing["size_bytes"]
+        if not config.upload_verify_enabled or (self._verification_cache and await self._verification_cache.aget(storage_path, size_bytes)):
+            return
+
+        try:
+            info = await self._storage_client.get_file_info(storage_path)
+        except Exception as exc:
+            raise StorageError("Unable to verify the uploaded file. Please try again.") from exc
+
+        error = self._verification_error(existing, info, config.upload_verify_mime_type)
+        if error:
+            logger.warning("Upload verification failed: file_id=%s, %s", existing["id"], error)
+            raise FileValidationError(error)
+        if self._verification_cache:
+            await self._verification_cache.aset(storage_path, size_bytes)
 
-    def _safe_delete_storage(self, storage_path: str) -> None:
+    async def _listing_version(self, user_id: str) -> str | None:
+        """The user's listing cache version, or ``None`` without a lookup when the cache is off."""
+        if self._listing_cache and self._listing_cache.enabled:
+            return await self._listing_cache.aversion(user_id)
+        return None
+
+    async def _invalidate_listing(self, user_id: str) -> None:
+        if self._listing_cache and self._listing_cache.enabled:
+            await self._listing_cache.ainvalidate(user_id)
+        if self._single_flight:
+            self._single_flight.forget("list_files", user_id)
+            self._single_flight.forget("search_files", user_id)
+
+    async def _unreferenced_storage_paths(self, rows: list[dict]) -> list[str]:
+        """
+        Storage objects to remove once ``rows`` are deleted: each row's own object,
+        plus shared blobs whose reference count just dropped to zero.
+        """
+        storage_paths, blobs = self._split_by_blob(rows)
+        if blobs and self._blob_repo:
+            storage_paths.extend(blob["storage_path"] for blob in await self._blob_repo.release(blobs))
+        return storage_paths
+
+    async def _safe_delete_storage(self, storage_path: str) -> None:
+        if self._download_url_cache:
+            await self._download_url_cache.aevict(storage_path)
         try:
-            self._storage_client.delete_file(storage_path)
+            await self._storage_client.delete_file(storage_path)
         except Exception as exc:
             logger.warning("Failed to delete storage object at '%s': %s", storage_path, exc)
+            await self._queue_failed_deletes([storage_path], exc)
+
+    async def _safe_abort_multipart(self, existing: dict) -> None:
+        """Drop the stored parts of a resumable upload that was never finalized."""
+        if not existing.get("upload_id") or existing["status"] != FileStatus.UPLOADING.value:
+            return
+        try:
+            await asyncio.to_thread(self._multipart.abort, existing["storage_path"], existing["upload_id"])
+        except Exception as exc:
+            logger.warning("Failed to abort multipart upload for '%s': %s", existing["storage_path"], exc)
+
+    async def _safe_delete_storage_many(self, storage_paths: list[str]) -> None:
+        if self._download_url_cache:
+            for storage_path in storage_paths:
+                await self._download_url_cache.aevict(storage_path)
+        chunks = [list(chunk) for chunk in chunked(storage_paths, STORAGE_REMOVE_CHUNK_SIZE)]
+        outcomes = await asyncio.gather(*(self._storage_client.delete_files(chunk) for chunk in chunks), return_exceptions=True)
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Failed to delete %d storage objects: %s", len(chunk), outcome)
+                await self._queue_failed_deletes(chunk, outcome)
+
+    async def _queue_failed_deletes(self, storage_paths: list[str], error: Exception) -> None:
+        """Hand failed deletes to the durable retry queue drained by the upload reaper."""
+        if not self._delete_queue:
+            return
+        try:
+            await self._delete_queue.enqueue(storage_paths, str(error))
+        except Exception as exc:
+            logger.error("Failed to queue %d storage deletes for retry: %s", len(storage_paths), exc)
@@ -0,0 +1,50 @@
+"""
+Single-leader scheduling for the background jobs.
+
+The app lifespan starts every job in every worker process, on every host.
+Each pass is preceded by :meth:`JobLease.acquire`: only the worker holding
+the job's lease runs it, the others sleep until their next turn. The leader
+renews the lease on each pass. The lease outlives two intervals, so a
+leader that dies is replaced within two intervals.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import uuid
+
+from app.core.db import AsyncDBClient
+from app.repositories.job_lease_repository import AsyncJobLeaseRepository
+from app.utils.logger import logger
+
+
+class JobLease:
+
+    def __init__(self, name: str, interval: float, repository: AsyncJobLeaseRepository | None = None) -> None:
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.ttl = 2 * interval
+        self._repo = repository or AsyncJobLeaseRepository(AsyncDBClient())
+        self._held = False
+
+    async def acquire(self) -> bool:
+        """Whether this process leads ``name`` for the next pass. Any database error counts as not leading."""
+        try:
+            held = await self._repo.acquire(self.name, self.holder, self.ttl)
+        except Exception as exc:
+            logger.error("Failed to acquire job lease %s: %s", self.name, exc)
+            held = False
+        if held != self._held:
+            logger.info("%s job lease %s (holder=%s).", "Acquired" if held else "Lost", self.name, self.holder)
+        self._held = held
+        return held
+
+    async def release(self) -> None:
+        if not self._held:
+            return
+        self._held = False
+        try:
+            await self._repo.release(self.name, self.holder)
+        except Exception as exc:
+            logger.warning("Failed to release job lease %s: %s", self.name, exc)
@@ -0,0 +1,220 @@
+"""
+Background reaper for abandoned uploads and orphaned storage objects.
+
+Each run has two phases, both paged in rate-limited batches:
+
+1. Stale uploads — ``user_files`` rows still ``uploading`` with no activity
+   (``updated_at``) for ``reaper_stale_after`` seconds are hard-deleted, their
+   multipart sessions aborted and their storage objects (or last blob
+   reference) removed. Fetching resumable part URLs or status counts as
+   activity, so a long transfer is not reaped while it is still running.
+2. Retry queue — storage deletes that failed earlier (queued by the file
+   facade or by phase 1) are retried with exponential backoff.
+
+The reaper runs as a task started from the app lifespan in every worker; a
+job lease (:mod:`app.jobs.lease`) makes only one of them run the passes. It
+can also be run once from the command line, e.g. from cron when
+``REAPER_ENABLED=false``:
+
+    python -m app.jobs.upload_reaper [--stale-after SECONDS] [--max-batches N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.constants.constants import STORAGE_REMOVE_CHUNK_SIZE
+from app.core.config import AppConfig
+from app.core.db import AsyncDBClient
+from app.core.http import HTTPClientPool
+from app.core.multipart import MultipartUploadClient
+from app.core.storage import AsyncStorageClient
+from app.jobs.lease import JobLease
+from app.repositories.blob_repository import AsyncBlobRepository
+from app.repositories.file_repository import AsyncFileRepository
+from app.repositories.storage_delete_queue_repository import AsyncStorageDeleteQueueRepository
+from app.utils.batching import chunked
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+from app.utils.tracing import Tracer
+
+
+@dataclass
+class ReaperMetrics:
+    """Cumulative counters since process start, plus details of the last run."""
+
+    runs: int = 0
+    failed_runs: int = 0
+    stale_rows_reaped: int = 0
+    multipart_uploads_aborted: int = 0
+    storage_objects_deleted: int = 0
+    storage_deletes_queued: int = 0
+    queued_deletes_retried: int = 0
+    queued_deletes_failed: int = 0
+    last_run_started_at: float | None = None
+    last_run_duration: float | None = None
+    last_error: str | None = None
+
+
+class UploadReaper(metaclass=SingletonMeta):
+
+    def __init__(
+        self,
+        file_repository: AsyncFileRepository | None = None,
+        blob_repository: AsyncBlobRepository | None = None,
+        delete_queue: AsyncStorageDeleteQueueRepository | None = None,
+        storage_client: AsyncStorageClient | None = None,
+        multipart_client: MultipartUploadClient | None = None,
+        lease: JobLease | None = None,
+    ) -> None:
+        config = AppConfig()
+        self._file_repo = file_repository or AsyncFileRepository(AsyncDBClient())
+        self._blob_repo = blob_repository or AsyncBlobRepository(AsyncDBClient())
+        self._delete_queue = delete_queue or AsyncStorageDeleteQueueRepository(AsyncDBClient())
+        self._storage_client = storage_client or AsyncStorageClient()
+        self._multipart_client = multipart_client or MultipartUploadClient()
+
+        self.interval = config.reaper_interval
+        self.stale_after = config.reaper_stale_after
+        self.batch_size = config.reaper_batch_size
+        self.max_batches = config.reaper_max_batches
+        self.batch_pause = config.reaper_batch_pause
+        self._retry_base_delay = config.reaper_retry_base_delay
+        self._retry_max_delay = config.reaper_retry_max_delay
+        self._max_attempts = config.reaper_max_attempts
+        self._lease = lease or JobLease("upload_reaper", self.interval)
+
+        self.metrics = ReaperMetrics()
+
+    async def run_forever(self) -> None:
+        """Run a pass every ``reaper_interval`` seconds, while this worker holds the job lease, until cancelled."""
+        try:
+            while True:
+                if await self._lease.acquire():
+                    await self.run_once()
+                await asyncio.sleep(self.interval)
+        finally:
+            await self._lease.release()
+
+    async def run_once(self) -> ReaperMetrics:
+        started = time.monotonic()
+        self.metrics.runs += 1
+        self.metrics.last_run_started_at = time.time()
+        try:
+            # Background passes have no request, so each run is its own trace.
+            with Tracer().root_span("UploadReaper.run_once"):
+                await self._reap_stale_uploads()
+                await self._retry_queued_deletes()
+            self.metrics.last_error = None
+        except Exception as exc:
+            self.metrics.failed_runs += 1
+            self.metrics.last_error = str(exc)
+            logger.error("Upload reaper run failed: %s", exc)
+        finally:
+            self.metrics.last_run_duration = time.monotonic() - started
+            logger.info("Upload reaper run finished: %s", asdict(self.metrics))
+        return self.metrics
+
+    async def _reap_stale_uploads(self) -> None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)).isoformat()
+        for batch_number in range(self.max_batches):
+            if batch_number:
+                await asyncio.sleep(self.batch_pause)
+            rows = await self._file_repo.get_stale_uploads(cutoff, self.batch_size)
+            if not rows:
+                return
+
+            purged = await self._file_repo.purge_stale_uploads([row["id"] for row in rows], cutoff)
+            self.metrics.stale_rows_reaped += len(purged)
+            await self._abort_multipart_uploads([row for row in purged if row.get("upload_id")])
+            await self._delete_storage(await self._unreferenced_storage_paths(purged))
+            logger.info("Reaped %d stale uploads (batch %d)", len(purged), batch_number + 1)
+
+            if len(rows) < self.batch_size:
+                return
+
+    async def _abort_multipart_uploads(self, rows: list[dict]) -> None:
+        for row in rows:
+            try:
+                await asyncio.to_thread(self._multipart_client.abort, row["storage_path"], row["upload_id"])
+                self.metrics.multipart_uploads_aborted += 1
+            except Exception as exc:
+                logger.warning("Failed to abort multipart upload for '%s': %s", row["storage_path"], exc)
+
+    async def _unreferenced_storage_paths(self, rows: list[dict]) -> list[str]:
+        storage_paths = [row["storage_path"] for row in rows if not row.get("blob_sha256")]
+        blobs = [(row["user_id"], row["blob_sha256"]) for row in rows if row.get("blob_sha256")]
+        if blobs:
+            storage_paths.extend(blob["storage_path"] for blob in await self._blob_repo.release(blobs))
+        return storage_paths
+
+    async def _delete_storage(self, storage_paths: list[str]) -> None:
+        for chunk in chunked(storage_paths, STORAGE_REMOVE_CHUNK_SIZE):
+            chunk = list(chunk)
+            try:
+                await self._storage_client.delete_files(chunk)
+                self.metrics.storage_objects_deleted += len(chunk)
+            except Exception as exc:
+                await self._delete_queue.enqueue(chunk, str(exc))
+                self.metrics.storage_deletes_queued += len(chunk)
+
+    async def _retry_queued_deletes(self) -> None:
+        limit = min(self.batch_size, STORAGE_REMOVE_CHUNK_SIZE)
+        for batch_number in range(self.max_batches):
+            if batch_number:
+                await asyncio.sleep(self.batch_pause)
+            now = datetime.now(timezone.utc)
+            entries = await self._delete_queue.get_due(now.isoformat(), limit, self._max_attempts)
+            if not entries:
+                return
+
+            storage_paths = [entry["storage_path"] for entry in entries]
+            try:
+                await self._storage_client.delete_files(storage_paths)
+            except Exception as exc:
+                await self._delete_queue.reschedule([self._rescheduled(entry, now, exc) for entry in entries])
+                self.metrics.queued_deletes_failed += len(entries)
+                # Storage is still failing; leave the rest of the queue for the next run.
+                return
+
+            await self._delete_queue.remove(storage_paths)
+            self.metrics.queued_deletes_retried += len(entries)
+            if len(entries) < limit:
+                return
+
+    def _rescheduled(self, entry: dict, now: datetime, error: Exception) -> dict:
+        attempts = entry["attempts"] + 1
+        delay = min(self._retry_base_delay * 2 ** (attempts - 1), self._retry_max_delay)
+        return {
+            "storage_path": entry["storage_path"],
+            "attempts": attempts,
+            "last_error": str(error)[:500],
+            "next_attempt_at": (now + timedelta(seconds=delay)).isoformat(),
+        }
+
+
+async def _run_cli(args: argparse.Namespace) -> None:
+    reaper = UploadReaper()
+    if args.stale_after is not None:
+        reaper.stale_after = args.stale_after
+    if args.max_batches is not None:
+        reaper.max_batches = args.max_batches
+    try:
+        metrics = await reaper.run_once()
+    finally:
+        await HTTPClientPool().aclose()
+    print(json.dumps(asdict(metrics), indent=2))
+    if metrics.last_error:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one upload reaper pass and print its metrics.")
+    parser.add_argument("--stale-after", type=float, default=None, help="Seconds of inactivity after which an 'uploading' row is stale.")
+    parser.add_argument("--max-batches", type=int, default=None, help="Max batches per phase.")
+    asyncio.run(_run_cli(parser.parse_args()))
@@ -0,0 +1,120 @@
+"""
+Background reconciliation of the per-user storage usage counters.
+
+The counters in ``user_storage_usage`` are kept by a trigger on
+``user_files``, so they only drift through out-of-band changes (manual SQL
+with triggers disabled, restores, writes racing the migration's backfill).
+Each run walks every user's counters in ``user_id`` order, in rate-limited
+batches, and has the ``reconcile_user_storage_usage`` database function
+recompute them from ``user_files``. Users whose counters had drifted are
+logged.
+
+The reconciler runs as a task started from the app lifespan in every worker;
+a job lease (:mod:`app.jobs.lease`) makes only one of them run the passes.
+It can also be run once from the command line, e.g. from cron when
+``USAGE_RECONCILE_ENABLED=false``:
+
+    python -m app.jobs.usage_reconciler
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+
+from app.core.config import AppConfig
+from app.core.db import AsyncDBClient
+from app.core.http import HTTPClientPool
+from app.jobs.lease import JobLease
+from app.repositories.usage_repository import AsyncUsageRepository
+from app.utils.logger import logger
+from app.utils.singleton import SingletonMeta
+from app.utils.tracing import Tracer
+
+
+@dataclass
+class ReconcilerMetrics:
+    """Cumulative counters since process start, plus details of the last run."""
+
+    runs: int = 0
+    failed_runs: int = 0
+    users_checked: int = 0
+    users_corrected: int = 0
+    last_run_started_at: float | None = None
+    last_run_duration: float | None = None
+    last_error: str | None = None
+
+
+class UsageReconciler(metaclass=SingletonMeta):
+
+    def __init__(self, usage_repository: AsyncUsageRepository | None = None, lease: JobLease | None = None) -> None:
+        config = AppConfig()
+        self._usage_repo = usage_repository or AsyncUsageRepository(AsyncDBClient())
+        self.interval = config.usage_reconcile_interval
+        self.batch_size = config.usage_reconcile_batch_size
+        self.batch_pause = config.usage_reconcile_batch_pause
+        self._lease = lease or JobLease("usage_reconciler", self.interval)
+        self.metrics = ReconcilerMetrics()
+
+    async def run_forever(self) -> None:
+        """Run a pass every ``usage_reconcile_interval`` seconds, while this worker holds the job lease, until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)  # the counters start out correct; nothing to check at startup
+                if await self._lease.acquire():
+                    await self.run_once()
+        finally:
+            await self._lease.release()
+
+    async def run_once(self) -> ReconcilerMetrics:
+        started = time.monotonic()
+        self.metrics.runs += 1
+        self.metrics.last_run_started_at = time.time()
+        try:
+            with Tracer().root_span("UsageReconciler.run_once"):
+                await self._reconcile_all()
+            self.metrics.last_error = None
+        except Exception as exc:
+            self.metrics.failed_runs += 1
+            self.metrics.last_error = str(exc)
+            logger.error("Usage reconciler run failed: %s", exc)
+        finally:
+            self.metrics.last_run_duration = time.monotonic() - started
+            logger.info("Usage reconciler run finished: %s", asdict(self.metrics))
+        return self.metrics
+
+    async def _reconcile_all(self) -> None:
+        after: str | None = None
+        while True:
+            rows = await self._usage_repo.reconcile(after, self.batch_size)
+            self.metrics.users_checked += len(rows)
+            for row in rows:
+                if row["bytes_used_drift"] or row["file_count_drift"] or row["bytes_pending_drift"]:
+                    self.metrics.users_corrected += 1
+                    logger.warning("Corrected storage usage drift: %s", row)
+            if len(rows) < self.batch_size:
+                return
+            after = rows[-1]["user_id"]
+            await asyncio.sleep(self.batch_pause)
+
+
+async def _run_cli(args: argparse.Namespace) -> None:
+    reconciler = UsageReconciler()
+    if args.batch_size is not None:
+        reconciler.batch_size = args.batch_size
+    try:
+        metrics = await reconciler.run_once()
+    finally:
+        await HTTPClientPool().aclose()
+    print(json.dumps(asdict(metrics), indent=2))
+    if metrics.last_error:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one storage usage reconciliation pass and print its metrics.")
+    parser.add_argument("--batch-size", type=int, default=None, help="Users reconciled per database call.")
+    asyncio.run(_run_cli(parser.parse_args()))
@@ -1,25 +1,63 @@
 from __future__ import annotations
-from contextlib import asynccontextmanager
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from typing import AsyncGenerator
+from anyio import to_thread
 from fastapi import FastAPI
 from app.core.config import AppConfig
-from app.core.db import DBClient
-from app.core.storage import StorageClient
+from app.core.db import AsyncDBClient
+from app.core.http import HTTPClientPool
+from app.core.security import SupabaseJWKSClient
+from app.core.storage import AsyncStorageClient
+from app.core.tracing import configure_tracing
+from app.jobs.upload_reaper import UploadReaper
+from app.jobs.usage_reconciler import UsageReconciler
 from app.utils.logger import logger
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    logger.info("Application starting up")
+    logger.info("Application starting up (pid=%d)", os.getpid())
 
     config = AppConfig()
     logger.info("Environment: %s | Port: %d | Bucket: %s", config.environment, config.port, config.supabase_storage_bucket)
 
-    DBClient()
-    StorageClient()
+    # Everything below is per process and runs inside each worker, never in the supervisor before it starts workers.
+    # Threadpools: anyio's runs sync handlers/dependencies, the loop's default executor runs asyncio.to_thread.
+    to_thread.current_default_thread_limiter().total_tokens = config.threadpool_size
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=config.threadpool_size, thread_name_prefix="to-thread"))
+
+    tracer = configure_tracing()
+
+    # The shared transport must exist before any client that borrows it.
+    http_pool = HTTPClientPool()
+    AsyncDBClient()
+    AsyncStorageClient()
+    jwks_client = SupabaseJWKSClient()
+
+    # Warm the signing keys before serving so no request pays for the first JWKS fetch.
+    await asyncio.to_thread(jwks_client.refresh)
+    jwks_refresh_task = asyncio.create_task(jwks_client.run_refresh_loop())
+    background_tasks = [jwks_refresh_task]
+
+    if config.reaper_enabled:
+        background_tasks.append(asyncio.create_task(UploadReaper().run_forever()))
+    if config.usage_reconcile_enabled:
+        background_tasks.append(asyncio.create_task(UsageReconciler().run_forever()))
 
     logger.info("All core services initialised — ready to serve.")
 
     yield
 
     logger.info("Application shutting down…")
+
+    for task in background_tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    # Flush buffered spans before the process exits.
+    await asyncio.to_thread(tracer.shutdown)
+    await http_pool.aclose()
@@ -8,6 +8,8 @@ Run with:
     uvicorn app.main:app --reload
 or:
     python -m app.main
+In production use the multi-worker entry point instead:
+    python -m app.server
 """
 
 from __future__ import annotations
@@ -15,19 +17,35 @@ import uvicorn
 import os
 from fastapi import FastAPI
 from app.api.routes.files import router as files_router
+from app.api.routes.local_storage import router as local_storage_router
+from app.api.routes.metrics import router as metrics_router
+from app.core.config import AppConfig
 from app.lifespan import lifespan
 from app.middleware.cors_middleware import CustomCORSMiddleware
+from app.middleware.logging_middleware import LogContextMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+from app.middleware.tracing_middleware import TracingMiddleware
 from app.utils.exceptions import register_exception_handlers
 from app.utils.logger import logger
 
 app = FastAPI(title="Dropbox API", version="1.0.0", description="Simplified Dropbox-like file storage service.", lifespan=lifespan)
 
-# Middleware stack (order matters — outermost is added last). Execution order: CORS → Route handler
+# Middleware stack (order matters — outermost is added last).
+# Execution order: Metrics → Tracing → Log context → CORS → Rate limit → Route handler
+# (rate limiting sits inside CORS so browsers can read its 429 responses)
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(CustomCORSMiddleware)
+app.add_middleware(LogContextMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 register_exception_handlers(app)
 
 app.include_router(files_router)
+app.include_router(metrics_router)
+if AppConfig().storage_backend == "local":
+    app.include_router(local_storage_router)  # serves the signed URLs issued by the local storage backend
 logger.info("Server initialised successfully.")
 
 if __name__ == "__main__":
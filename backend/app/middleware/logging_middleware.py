@@ -0,0 +1,17 @@
+from __future__ import annotations
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.utils.logger import logger_metadata_scope
+
+
+class LogContextMiddleware:
+    """Scopes logger metadata (user id, email, ...) to a single request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with logger_metadata_scope():
+            await self.app(scope, receive, send)
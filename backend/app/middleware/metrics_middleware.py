@@ -0,0 +1,39 @@
+from __future__ import annotations
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Records request duration per route template (``/api/v1/files/{file_id}``,
+    not the concrete path, to keep label cardinality bounded), method and
+    response status. Pure ASGI so streamed bodies are timed to the last byte.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # reported if the app raises before starting a response
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=scope["method"], route=route, status=str(status_code))
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.admission import RateLimiter
+from app.core.security import VerifiedClaimsCache, get_jwks_client, verify_token
+from app.utils.exceptions import AuthenticationError, retry_after_header
+
+RATE_LIMITED_PATH_PREFIX = "/api/"
+
+
+class RateLimitMiddleware:
+    """
+    Per-client token-bucket limit on the API, answered with 429 and ``Retry-After``
+    before any routing, dependency or upstream work is done.
+
+    Runs before ``validate_token``, so it identifies the caller itself: a
+    valid bearer token is charged to ``user:<sub>``. Claims come from the
+    verified-claims cache; on a miss (first use of a token) the token is
+    verified here, on the threadpool, and cached for ``validate_token``.
+    Keying first-use requests by address instead would put every user behind
+    the same proxy or NAT into one bucket. Missing and invalid tokens are
+    charged to ``ip:<client address>``, which bounds floods of unverifiable
+    tokens.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._limiter = RateLimiter()
+        self._claims_cache = VerifiedClaimsCache()
+
+    async def _client_key(self, scope: Scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                token = token.strip()
+                if scheme.lower() == "bearer" and token:
+                    claims = self._claims_cache.get(self._claims_cache.key_for(token))
+                    if claims is None:
+                        try:
+                            claims = await run_in_threadpool(verify_token, token, get_jwks_client(), self._claims_cache)
+                        except AuthenticationError:
+                            claims = None
+                    if claims:
+                        return f"user:{claims['sub']}"
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._limiter.enabled or not scope["path"].startswith(RATE_LIMITED_PATH_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self._limiter.acheck(await self._client_key(scope))
+        if retry_after > 0:
+            response = JSONResponse(status_code=429, content={"detail": "Too many requests. Please slow down."}, headers=retry_after_header(retry_after))
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.tracing import Tracer
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+class TracingMiddleware:
+    """
+    Opens the root span of each request (continuing an incoming W3C
+    ``traceparent``) and returns its trace id in ``X-Trace-Id`` so a client
+    report can be matched to logs and spans.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = Headers(scope=scope).get("traceparent")
+        with Tracer().root_span(f"{scope['method']} {scope['path']}", traceparent=traceparent, kind="server") as span:
+
+            async def send_with_trace_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    MutableHeaders(scope=message)[TRACE_ID_HEADER] = span.trace_id
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    # Name by template, not concrete path, so spans group per endpoint.
+                    span.name = f"{scope['method']} {route}"
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("http.route", route or scope["path"])
@@ -28,3 +28,10 @@ class SupabaseOperatorType(str, Enum):
     IN = "in_"
     IS = "is_"
     IS_NOT_NULL = "is_not_null"
+    OR = "or_"
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
-from app.constants.constants import MAX_FILE_SIZE_BYTES
-from app.models.enums import AllowedMimeType, FileStatus
+from app.constants.constants import (
+    DEFAULT_PAGE_LIMIT,
+    MAX_BATCH_SIZE,
+    MAX_BULK_DELETE_SIZE,
+    MAX_FILE_SIZE_BYTES,
+    MAX_PAGE_LIMIT,
+    MAX_RESUMABLE_FILE_SIZE_BYTES,
+)
+from app.models.enums import AllowedMimeType, CountMode, FileStatus
+from app.utils.paths import is_safe_path_segment
 
 
 class UploadURLRequest(BaseModel):
@@ -28,6 +37,19 @@ class UploadURLRequest(BaseModel):
         description="MIME type of the file.",
         examples=["application/pdf", "image/png"],
     )
+    sha256: str | None = Field(
+        default=None,
+        pattern=r"^[0-9a-fA-F]{64}$",
+        description="Hex SHA-256 of the file contents. When given, identical content the user already uploaded is reused instead of re-uploaded.",
+    )
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        # The name becomes the last segment of the storage path, so it must not be able to leave {user_id}/{file_id}/.
+        if not is_safe_path_segment(v):
+            raise ValueError("File name must not be '.' or '..' or contain '/', '\\' or control characters.")
+        return v
 
     @field_validator("mime_type")
     @classmethod
@@ -37,6 +59,11 @@ class UploadURLRequest(BaseModel):
             raise ValueError(f"Unsupported file type '{v}'. " f"Allowed types: {', '.join(sorted(allowed_values))}")
         return v
 
+    @field_validator("sha256")
+    @classmethod
+    def normalise_sha256(cls, v: str | None) -> str | None:
+        return v.lower() if v else v
+
     @field_validator("size_bytes")
     @classmethod
     def validate_file_size(cls, v: int) -> int:
@@ -59,8 +86,11 @@ class ConfirmUploadRequest(BaseModel):
 
 class UploadURLResponse(BaseModel):
     file_id: UUID
-    upload_url: str
+    upload_url: str | None = Field(default=None, description="Presigned upload URL; null when `already_present` is true.")
     storage_path: str
+    already_present: bool = Field(
+        default=False, description="The content is already stored; the file is 'uploaded' and needs no transfer or confirm."
+    )
 
 
 class ConfirmUploadResponse(BaseModel):
@@ -83,9 +113,46 @@ class FileResponse(BaseModel):
 
 class FileListResponse(BaseModel):
     files: list[FileResponse]
-    total: int
+    total: int | None = Field(default=None, description="Total matching files; null when count=none.")
     skip: int
     limit: int
+    next_cursor: str | None = Field(default=None, description="Opaque cursor for the next page; null on the last page.")
+
+
+class FileSearchQuery(BaseModel):
+    """Query parameters of ``GET /api/v1/files/search``; all filters are optional and combined with AND."""
+
+    q: str | None = Field(default=None, min_length=1, max_length=255, description="Case-insensitive substring of the file name.")
+    prefix: str | None = Field(default=None, min_length=1, max_length=255, description="Case-insensitive prefix of the file name.")
+    mime_type: list[AllowedMimeType] | None = Field(default=None, description="Only these MIME types; repeat the parameter for several.")
+    min_size: int | None = Field(default=None, ge=0, description="Minimum size in bytes (inclusive).")
+    max_size: int | None = Field(default=None, ge=0, description="Maximum size in bytes (inclusive).")
+    created_after: datetime | None = Field(default=None, description="Created at or after this time.")
+    created_before: datetime | None = Field(default=None, description="Created before this time.")
+    limit: int = Field(default=DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT, description="Max rows to return")
+    cursor: str | None = Field(default=None, description="Opaque `next_cursor` from the previous page of the same search.")
+    count: CountMode = Field(default=CountMode.NONE, description="How to compute `total`: exact, estimated or none")
+
+    @field_validator("created_after", "created_before")
+    @classmethod
+    def assume_utc(cls, v: datetime | None) -> datetime | None:
+        return v.replace(tzinfo=timezone.utc) if v and v.tzinfo is None else v
+
+    @model_validator(mode="after")
+    def validate_ranges(self) -> FileSearchQuery:
+        if self.min_size is not None and self.max_size is not None and self.min_size > self.max_size:
+            raise ValueError("min_size must not exceed max_size.")
+        if self.created_after and self.created_before and self.created_after >= self.created_before:
+            raise ValueError("created_after must be earlier than created_before.")
+        return self
+
+
+class StorageUsageResponse(BaseModel):
+    bytes_used: int = Field(description="Total size of the user's uploaded files.")
+    file_count: int
+    bytes_pending: int = Field(description="Total size of uploads in progress; counted against the quota.")
+    quota_bytes: int | None = Field(default=None, description="Storage quota; null when unlimited.")
+    bytes_available: int | None = Field(default=None, description="Bytes that can still be uploaded; null when unlimited.")
 
 
 class DownloadURLResponse(BaseModel):
@@ -95,3 +162,98 @@ class DownloadURLResponse(BaseModel):
         default=3600,
         description="Seconds until the download URL expires.",
     )
+
+
+class BatchDownloadURLRequest(BaseModel):
+    file_ids: list[UUID] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Files to sign download URLs for.")
+
+
+class BatchDownloadURLItem(BaseModel):
+    file_id: UUID
+    download_url: str | None = None
+    expires_in: int | None = None
+    error: str | None = Field(default=None, description="Why no URL was issued for this file; null on success.")
+
+
+class BatchDownloadURLResponse(BaseModel):
+    results: list[BatchDownloadURLItem]
+
+
+class BulkDeleteRequest(BaseModel):
+    file_ids: list[UUID] = Field(..., min_length=1, max_length=MAX_BULK_DELETE_SIZE, description="Files to delete.")
+
+
+class BulkDeleteItem(BaseModel):
+    file_id: UUID
+    deleted: bool
+    error: str | None = Field(default=None, description="Why the file was not deleted; null on success.")
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted_count: int
+    results: list[BulkDeleteItem]
+
+
+class BatchUploadURLRequest(BaseModel):
+    files: list[dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="One UploadURLRequest object per file. Each item is validated on its own so one bad item does not reject the batch.",
+    )
+
+
+class BatchUploadURLItem(BaseModel):
+    index: int = Field(..., description="Position of the item in the request.")
+    file_id: UUID | None = None
+    upload_url: str | None = None
+    storage_path: str | None = None
+    error: str | None = Field(default=None, description="Validation or storage error for this item; null on success.")
+
+
+class BatchUploadURLResponse(BaseModel):
+    results: list[BatchUploadURLItem]
+
+
+class ResumableUploadRequest(UploadURLRequest):
+    """Same fields as :class:`UploadURLRequest`, with the larger resumable size cap."""
+
+    @field_validator("size_bytes")
+    @classmethod
+    def validate_file_size(cls, v: int) -> int:
+        if v > MAX_RESUMABLE_FILE_SIZE_BYTES:
+            max_gb = MAX_RESUMABLE_FILE_SIZE_BYTES / (1024 * 1024 * 1024)
+            raise ValueError(f"File size ({v} bytes) exceeds the maximum allowed size of {max_gb:.0f} GB.")
+        return v
+
+
+class ResumableUploadSessionResponse(BaseModel):
+    file_id: UUID
+    storage_path: str
+    chunk_size: int = Field(..., description="Bytes per part; every part except the last must be exactly this size.")
+    total_parts: int
+    max_concurrency: int = Field(..., description="Suggested number of parts to upload in parallel.")
+
+
+class ResumableUploadStatusResponse(BaseModel):
+    file_id: UUID
+    size_bytes: int
+    chunk_size: int
+    total_parts: int
+    received_bytes: int
+    received_ranges: list[tuple[int, int]] = Field(..., description="Merged [start, end) byte ranges already stored.")
+    missing_parts: list[int] = Field(..., description="1-based part numbers still to upload.")
+
+
+class ResumablePartURLsRequest(BaseModel):
+    part_numbers: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="1-based part numbers to sign.")
+
+
+class ResumablePartURL(BaseModel):
+    part_number: int
+    upload_url: str
+
+
+class ResumablePartURLsResponse(BaseModel):
+    parts: list[ResumablePartURL]
+    expires_in: int
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.constants.constants import FILE_BLOBS_TABLE
+from app.core.db import AsyncDBClient
+from app.models.enums import FileStatus, SupabaseOperatorType
+from app.utils.logger import logger
+from app.utils.tracing import traced_methods
+
+
+class _BaseBlobRepository:
+    """
+    Content-addressed blobs shared by one user's ``user_files`` rows, keyed by
+    ``(user_id, sha256)``: the hash comes from the client, so a blob is never
+    shared across users. Reference counts are only changed through the
+    ``retain_file_blob`` / ``release_file_blobs`` database functions so
+    concurrent uploads and deletes stay consistent.
+    """
+
+    @staticmethod
+    def _blob_conditions(user_id: str, sha256: str) -> dict:
+        return {"user_id": (SupabaseOperatorType.EQ.value, user_id), "sha256": (SupabaseOperatorType.EQ.value, sha256)}
+
+    @staticmethod
+    def _new_blob_record(user_id: str, sha256: str, storage_path: str, size_bytes: int) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        return {
+            "user_id": user_id,
+            "sha256": sha256,
+            "storage_path": storage_path,
+            "size_bytes": size_bytes,
+            "status": FileStatus.UPLOADING.value,
+            "ref_count": 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    @staticmethod
+    def _uploaded_update() -> dict:
+        return {"status": FileStatus.UPLOADED.value, "updated_at": datetime.now(timezone.utc).isoformat()}
+
+
+@traced_methods
+class AsyncBlobRepository(_BaseBlobRepository):
+
+    def __init__(self, db_client: AsyncDBClient) -> None:
+        self._db = db_client
+
+    async def get(self, user_id: str, sha256: str) -> dict | None:
+        return await self._db.get_single_row(FILE_BLOBS_TABLE, "*", where_condition_dict=self._blob_conditions(user_id, sha256))
+
+    async def create(self, user_id: str, sha256: str, storage_path: str, size_bytes: int) -> dict | None:
+        """Claim ``sha256`` for a new upload of the user (ref_count=1). Returns ``None`` if the blob already exists."""
+        logger.info("Creating blob record: user_id=%s, sha256=%s", user_id, sha256)
+        return await self._db.insert_row_if_absent(
+            FILE_BLOBS_TABLE, self._new_blob_record(user_id, sha256, storage_path, size_bytes), on_conflict="user_id,sha256"
+        )
+
+    async def retain(self, user_id: str, sha256: str) -> bool:
+        """Take another reference on one of the user's uploaded blobs. ``False`` if it is missing or still uploading."""
+        return await self._db.call_function("retain_file_blob", {"p_user_id": user_id, "p_sha256": sha256}) is not None
+
+    async def mark_uploaded(self, user_id: str, sha256: str) -> None:
+        await self._db.update_row(FILE_BLOBS_TABLE, data=self._uploaded_update(), where_condition_dict=self._blob_conditions(user_id, sha256))
+
+    async def release(self, blobs: list[tuple[str, str]]) -> list[dict]:
+        """
+        Drop one reference per ``(user_id, sha256)`` in ``blobs`` (repeats allowed).
+        Blobs whose count reaches zero are deleted; the storage objects no blob
+        refers to any more are returned as ``{user_id, sha256, storage_path}``
+        so the caller can remove them.
+        """
+        params = {"p_user_ids": [user_id for user_id, _ in blobs], "p_sha256": [sha256 for _, sha256 in blobs]}
+        released = await self._db.call_function("release_file_blobs", params) or []
+        logger.info("Released %d blob references; %d blobs now unreferenced.", len(blobs), len(released))
+        return released
@@ -2,55 +2,206 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from app.constants.constants import USER_FILES_TABLE
-from app.core.db import DBClient
+from app.constants.constants import MAX_IN_FILTER_SIZE, USER_FILES_TABLE
+from app.core.db import AsyncDBClient
 from app.models.enums import FileStatus, SupabaseOperatorType
+from app.utils.batching import chunked
 from app.utils.logger import logger
+from app.utils.tracing import traced_methods
 
 
-class FileRepository:
+class _BaseFileRepository:
+    """Filter builders for ``user_files`` queries."""
 
-    def __init__(self, db_client: DBClient) -> None:
+    @staticmethod
+    def _owned_file_conditions(file_id: str, user_id: str) -> dict:
+        return {"id": (SupabaseOperatorType.EQ.value, file_id), "user_id": (SupabaseOperatorType.EQ.value, user_id)}
+
+    @staticmethod
+    def _owned_files_conditions(file_ids: list[str], user_id: str) -> dict:
+        return {"id": (SupabaseOperatorType.IN.value, file_ids), "user_id": (SupabaseOperatorType.EQ.value, user_id)}
+
+    @staticmethod
+    def _listable_file_conditions(user_id: str, after: tuple[str, str] | None = None) -> dict:
+        conditions = {
+            "user_id": (SupabaseOperatorType.EQ.value, user_id),
+            "status": (SupabaseOperatorType.EQ.value, FileStatus.UPLOADED.value),
+            "is_deleted": (SupabaseOperatorType.EQ.value, False),
+        }
+        if after:
+            # Keyset predicate for (created_at, id) DESC: rows strictly after the previous page's last row.
+            created_at, file_id = after
+            conditions["keyset"] = (
+                SupabaseOperatorType.OR.value,
+                f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{file_id})',
+            )
+        return conditions
+
+    @staticmethod
+    def _like_literal(term: str) -> str:
+        """
+        Escape LIKE wildcards in user input. PostgREST reads ``*`` as ``%`` whether or not it is
+        escaped, so ``*`` becomes the one-character wildcard ``_`` instead.
+        """
+        return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_").replace("*", "_")
+
+    @classmethod
+    def _search_conditions(
+        cls,
+        user_id: str,
+        after: tuple[str, str] | None = None,
+        name_contains: str | None = None,
+        name_prefix: str | None = None,
+        mime_types: list[str] | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        created_after: str | None = None,
+        created_before: str | None = None,
+    ) -> dict:
+        conditions = cls._listable_file_conditions(user_id, after)
+        name, size, created = [], [], []
+        if name_contains:
+            name.append((SupabaseOperatorType.ILIKE.value, f"%{cls._like_literal(name_contains)}%"))
+        if name_prefix:
+            name.append((SupabaseOperatorType.ILIKE.value, f"{cls._like_literal(name_prefix)}%"))
+        if min_size is not None:
+            size.append((SupabaseOperatorType.GTE.value, min_size))
+        if max_size is not None:
+            size.append((SupabaseOperatorType.LTE.value, max_size))
+        if created_after:
+            created.append((SupabaseOperatorType.GTE.value, created_after))
+        if created_before:
+            created.append((SupabaseOperatorType.LT.value, created_before))
+        for column, filters in (("name", name), ("size_bytes", size), ("created_at", created)):
+            if filters:
+                conditions[column] = filters
+        if mime_types:
+            conditions["mime_type"] = (SupabaseOperatorType.IN.value, mime_types)
+        return conditions
+
+    @staticmethod
+    def _stale_upload_conditions(cutoff: str, file_ids: list[str] | None = None) -> dict:
+        conditions = {
+            "status": (SupabaseOperatorType.EQ.value, FileStatus.UPLOADING.value),
+            "updated_at": (SupabaseOperatorType.LT.value, cutoff),
+        }
+        if file_ids is not None:
+            conditions["id"] = (SupabaseOperatorType.IN.value, file_ids)
+        return conditions
+
+    @staticmethod
+    def _status_update(status: str) -> dict:
+        return {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}
+
+
+@traced_methods
+class AsyncFileRepository(_BaseFileRepository):
+
+    def __init__(self, db_client: AsyncDBClient) -> None:
         self._db = db_client
 
-    def create(self, data: dict) -> dict:
+    async def create(self, data: dict) -> dict:
         logger.info("Creating file record: name=%s, user_id=%s", data.get("name"), data.get("user_id"))
-        return self._db.insert_row(USER_FILES_TABLE, data)
+        return await self._db.insert_row(USER_FILES_TABLE, data)
+
+    async def create_many(self, data: list[dict]) -> list[dict]:
+        logger.info("Creating %d file records: user_id=%s", len(data), data[0].get("user_id") if data else None)
+        return await self._db.insert_rows(USER_FILES_TABLE, data)
+
+    async def create_within_quota(self, user_id: str, data: list[dict], quota: int) -> list[dict]:
+        """
+        Insert the user's records in order, skipping any that would take their storage usage past
+        ``quota`` bytes, and return the ones inserted. The database checks and reserves atomically,
+        so concurrent uploads cannot overshoot the quota together.
+        """
+        logger.info("Creating %d file records within quota: user_id=%s", len(data), user_id)
+        return await self._db.call_function("insert_user_files_within_quota", {"p_user_id": user_id, "p_rows": data, "p_quota": quota}) or []
 
-    def get_by_id(self, file_id: str, user_id: str) -> dict | None:
-        return self._db.get_single_row(
+    async def get_by_id(self, file_id: str, user_id: str) -> dict | None:
+        return await self._db.get_single_row(USER_FILES_TABLE, "*", where_condition_dict=self._owned_file_conditions(file_id, user_id))
+
+    async def get_by_ids(self, file_ids: list[str], user_id: str) -> list[dict]:
+        """
+        Fetch the user's files among ``file_ids``; ids not owned by the user are absent.
+        One query per ``MAX_IN_FILTER_SIZE`` ids.
+        """
+        rows: list[dict] = []
+        for chunk in chunked(file_ids, MAX_IN_FILTER_SIZE):
+            chunk_rows, _ = await self._db.get_rows(
+                USER_FILES_TABLE, "*", where_condition_dict=self._owned_files_conditions(list(chunk), user_id), count=None
+            )
+            rows.extend(chunk_rows)
+        return rows
+
+    async def list_by_user(
+        self, user_id: str, skip: int | None = 0, limit: int = 20, after: tuple[str, str] | None = None, count: str | None = "exact"
+    ) -> tuple[list[dict], int | None]:
+        """
+        List uploaded, non-deleted files for the user (newest first). Returns (rows, total_count).
+
+        ``after`` is the ``(created_at, id)`` of the last row already seen; when given, rows are
+        fetched by keyset instead of offset. ``count=None`` skips the total count.
+        """
+        return await self._db.get_rows(
             USER_FILES_TABLE,
             "*",
-            where_condition_dict={"id": (SupabaseOperatorType.EQ.value, file_id), "user_id": (SupabaseOperatorType.EQ.value, user_id)},
+            where_condition_dict=self._listable_file_conditions(user_id, after),
+            order_by_columns=[("created_at", True), ("id", True)],
+            skip=skip,
+            limit=limit,
+            count=count,
         )
 
-    def list_by_user(self, user_id: str, skip: int = 0, limit: int = 20) -> tuple[list[dict], int]:
-        """List uploaded, non-deleted files for the user (newest first). Returns (rows, total_count)."""
-        return self._db.get_rows(
+    async def search_by_user(
+        self, user_id: str, limit: int = 20, after: tuple[str, str] | None = None, count: str | None = None, **filters
+    ) -> tuple[list[dict], int | None]:
+        """
+        Like :meth:`list_by_user` (keyset only), narrowed by the filters of ``_search_conditions``:
+        ``name_contains``, ``name_prefix``, ``mime_types``, ``min_size``/``max_size`` (inclusive)
+        and ``created_after`` (inclusive)/``created_before`` (exclusive) as ISO timestamps.
+        """
+        return await self._db.get_rows(
             USER_FILES_TABLE,
             "*",
-            where_condition_dict={
-                "user_id": (SupabaseOperatorType.EQ.value, user_id),
-                "status": (SupabaseOperatorType.EQ.value, FileStatus.UPLOADED.value),
-                "is_deleted": (SupabaseOperatorType.EQ.value, False),
-            },
-            order_by_columns=[("created_at", True)],
-            skip=skip,
-            limit=limit
+            where_condition_dict=self._search_conditions(user_id, after, **filters),
+            order_by_columns=[("created_at", True), ("id", True)],
+            limit=limit,
+            count=count,
         )
 
-    def update_status(self, file_id: str, user_id: str, status: str) -> dict | None:
+    async def update_status(self, file_id: str, user_id: str, status: str) -> dict | None:
         logger.info("Updating file status: file_id=%s, status=%s", file_id, status)
-        return self._db.update_row(
-            USER_FILES_TABLE,
-            data={"status": status, "updated_at": datetime.now(timezone.utc).isoformat()},
-            where_condition_dict={"id": (SupabaseOperatorType.EQ.value, file_id), "user_id": (SupabaseOperatorType.EQ.value, user_id)},
+        return await self._db.update_row(
+            USER_FILES_TABLE, data=self._status_update(status), where_condition_dict=self._owned_file_conditions(file_id, user_id)
         )
 
-    def delete(self, file_id: str, user_id: str) -> None:
+    async def touch(self, file_id: str, user_id: str) -> None:
+        """Record activity on an ``uploading`` row so the reaper does not treat a live upload as abandoned."""
+        conditions = self._owned_file_conditions(file_id, user_id) | {"status": (SupabaseOperatorType.EQ.value, FileStatus.UPLOADING.value)}
+        await self._db.update_row(USER_FILES_TABLE, data={"updated_at": datetime.now(timezone.utc).isoformat()}, where_condition_dict=conditions)
+
+    async def delete(self, file_id: str, user_id: str) -> None:
         """Hard-delete the file record."""
         logger.info("Deleting file record: file_id=%s, user_id=%s", file_id, user_id)
-        self._db.delete_row(
-            USER_FILES_TABLE,
-            where_condition_dict={"id": (SupabaseOperatorType.EQ.value, file_id), "user_id": (SupabaseOperatorType.EQ.value, user_id)},
+        await self._db.delete_row(USER_FILES_TABLE, where_condition_dict=self._owned_file_conditions(file_id, user_id))
+
+    async def delete_many(self, file_ids: list[str], user_id: str) -> None:
+        """Hard-delete many file records with one statement per ``MAX_IN_FILTER_SIZE`` ids."""
+        logger.info("Deleting %d file records: user_id=%s", len(file_ids), user_id)
+        for chunk in chunked(file_ids, MAX_IN_FILTER_SIZE):
+            await self._db.delete_row(USER_FILES_TABLE, where_condition_dict=self._owned_files_conditions(list(chunk), user_id))
+
+    async def get_stale_uploads(self, cutoff: str, limit: int) -> list[dict]:
+        """Least recently active rows of any user still ``uploading`` and last touched before ``cutoff`` (ISO timestamp)."""
+        rows, _ = await self._db.get_rows(
+            USER_FILES_TABLE, "*", where_condition_dict=self._stale_upload_conditions(cutoff), order_by_columns=[("updated_at", False)], limit=limit, count=None
         )
+        return rows
+
+    async def purge_stale_uploads(self, file_ids: list[str], cutoff: str) -> list[dict]:
+        """
+        Hard-delete the given rows if they are still stale and return the ones deleted.
+        A row confirmed since it was read no longer matches and is left alone.
+        """
+        logger.info("Purging %d stale upload records", len(file_ids))
+        return await self._db.delete_row(USER_FILES_TABLE, where_condition_dict=self._stale_upload_conditions(cutoff, file_ids))
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from app.constants.constants import JOB_LEASES_TABLE
+from app.core.db import AsyncDBClient
+from app.models.enums import SupabaseOperatorType
+from app.utils.tracing import traced_methods
+
+
+class _BaseJobLeaseRepository:
+    """
+    Expiring leases that elect one leader per background job across workers
+    and hosts (see ``migrations/008_job_leases.sql``).
+    """
+
+    @staticmethod
+    def _held_conditions(name: str, holder: str) -> dict:
+        return {"name": (SupabaseOperatorType.EQ.value, name), "holder": (SupabaseOperatorType.EQ.value, holder)}
+
+
+@traced_methods
+class AsyncJobLeaseRepository(_BaseJobLeaseRepository):
+
+    def __init__(self, db_client: AsyncDBClient) -> None:
+        self._db = db_client
+
+    async def acquire(self, name: str, holder: str, ttl_seconds: float) -> bool:
+        """Take or renew the lease on ``name`` for ``ttl_seconds``; ``False`` while someone else holds it."""
+        return bool(await self._db.call_function("acquire_job_lease", {"p_name": name, "p_holder": holder, "p_ttl_seconds": ttl_seconds}))
+
+    async def release(self, name: str, holder: str) -> None:
+        """Give the lease up early so another worker can take over without waiting for it to expire."""
+        await self._db.delete_row(JOB_LEASES_TABLE, where_condition_dict=self._held_conditions(name, holder))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.constants.constants import STORAGE_DELETE_QUEUE_TABLE
+from app.core.db import AsyncDBClient
+from app.models.enums import SupabaseOperatorType
+from app.utils.logger import logger
+from app.utils.tracing import traced_methods
+
+
+class _BaseStorageDeleteQueueRepository:
+    """
+    Durable queue of storage objects whose deletion failed. Entries are keyed
+    by storage path, so re-queuing a path that is already waiting is a no-op.
+    """
+
+    @staticmethod
+    def _new_entries(storage_paths: list[str], error: str) -> list[dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        return [
+            {"storage_path": path, "attempts": 0, "last_error": error[:500], "next_attempt_at": now, "created_at": now}
+            for path in dict.fromkeys(storage_paths)
+        ]
+
+    @staticmethod
+    def _due_conditions(now: str, max_attempts: int) -> dict:
+        return {
+            "next_attempt_at": (SupabaseOperatorType.LTE.value, now),
+            "attempts": (SupabaseOperatorType.LT.value, max_attempts),
+        }
+
+    @staticmethod
+    def _paths_conditions(storage_paths: list[str]) -> dict:
+        return {"storage_path": (SupabaseOperatorType.IN.value, storage_paths)}
+
+
+@traced_methods
+class AsyncStorageDeleteQueueRepository(_BaseStorageDeleteQueueRepository):
+
+    def __init__(self, db_client: AsyncDBClient) -> None:
+        self._db = db_client
+
+    async def enqueue(self, storage_paths: list[str], error: str) -> None:
+        logger.info("Queueing %d storage deletes for retry", len(storage_paths))
+        await self._db.upsert_rows(
+            STORAGE_DELETE_QUEUE_TABLE, self._new_entries(storage_paths, error), on_conflict="storage_path", ignore_duplicates=True
+        )
+
+    async def get_due(self, now: str, limit: int, max_attempts: int) -> list[dict]:
+        """Entries whose retry time has come, oldest first; entries past ``max_attempts`` are left for inspection."""
+        rows, _ = await self._db.get_rows(
+            STORAGE_DELETE_QUEUE_TABLE,
+            "*",
+            where_condition_dict=self._due_conditions(now, max_attempts),
+            order_by_columns=[("next_attempt_at", False)],
+            limit=limit,
+            count=None,
+        )
+        return rows
+
+    async def reschedule(self, entries: list[dict]) -> None:
+        """Write back ``attempts`` / ``last_error`` / ``next_attempt_at`` for failed entries in one statement."""
+        await self._db.upsert_rows(STORAGE_DELETE_QUEUE_TABLE, entries, on_conflict="storage_path")
+
+    async def remove(self, storage_paths: list[str]) -> None:
+        await self._db.delete_row(STORAGE_DELETE_QUEUE_TABLE, where_condition_dict=self._paths_conditions(storage_paths))
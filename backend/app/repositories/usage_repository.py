@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from app.constants.constants import USER_STORAGE_USAGE_TABLE
+from app.core.db import AsyncDBClient
+from app.models.enums import SupabaseOperatorType
+from app.utils.logger import logger
+from app.utils.tracing import traced_methods
+
+
+class _BaseUsageRepository:
+    """
+    Per-user storage counters. They are maintained by a trigger on
+    ``user_files`` (see ``migrations/006_user_storage_usage.sql``), so this
+    repository only reads them and runs the reconciliation function.
+    """
+
+    EMPTY_USAGE = {"bytes_used": 0, "file_count": 0, "bytes_pending": 0}
+
+    @staticmethod
+    def _user_conditions(user_id: str) -> dict:
+        return {"user_id": (SupabaseOperatorType.EQ.value, user_id)}
+
+
+@traced_methods
+class AsyncUsageRepository(_BaseUsageRepository):
+
+    def __init__(self, db_client: AsyncDBClient) -> None:
+        self._db = db_client
+
+    async def get(self, user_id: str) -> dict:
+        """The user's counters; zeros for a user who never uploaded."""
+        row = await self._db.get_single_row(USER_STORAGE_USAGE_TABLE, "*", where_condition_dict=self._user_conditions(user_id))
+        return row or dict(self.EMPTY_USAGE, user_id=user_id)
+
+    async def reconcile(self, after: str | None, limit: int) -> list[dict]:
+        """
+        Recompute the counters of up to ``limit`` users ordered after ``after``
+        and return ``{user_id, bytes_used_drift, file_count_drift, bytes_pending_drift}`` per user.
+        """
+        rows = await self._db.call_function("reconcile_user_storage_usage", {"p_after": after, "p_limit": limit}) or []
+        logger.info("Reconciled storage usage of %d users", len(rows))
+        return rows
@@ -0,0 +1,89 @@
+"""
+Production serving entry point.
+
+Runs the API under uvicorn with ``SERVER_WORKERS`` processes (default: one
+per core), so JWT verification and response serialisation scale past the
+GIL. uvloop and httptools are used when installed, with asyncio and h11 as
+the fallback.
+
+Workers are started with the ``spawn`` method and import ``app.main`` by
+themselves. This supervisor never imports the app, so every per-process
+singleton (HTTP pool, Supabase clients, caches, JWKS client, log and span
+export threads) is created inside each worker by its own lifespan.
+
+Each worker has its own ``CACHE_BACKEND=memory`` caches, and a write
+invalidates the listing cache only in the worker that served it; the other
+workers would keep serving the old listing for up to ``LIST_CACHE_TTL``
+seconds. So with more than one worker the listing cache defaults to off
+unless ``CACHE_BACKEND=redis``, and an explicit ``LIST_CACHE_TTL`` on the
+memory backend is refused at startup.
+
+On SIGTERM, each worker stops accepting connections and lets in-flight
+requests finish for up to ``SERVER_GRACEFUL_SHUTDOWN_TIMEOUT`` seconds. It
+then runs the lifespan shutdown: background tasks are cancelled, spans
+flushed and the pool closed.
+
+Run:
+    python -m app.server
+"""
+
+from __future__ import annotations
+
+import importlib.util
+
+import uvicorn
+
+from app.core.config import AppConfig
+from app.utils.logger import logger
+
+
+def _event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def _http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def _check_cache_coherence(config: AppConfig) -> None:
+    if config.server_workers > 1 and config.cache_backend == "memory" and config.list_cache_ttl > 0:
+        raise EnvironmentError(
+            "LIST_CACHE_TTL > 0 with CACHE_BACKEND=memory and SERVER_WORKERS > 1 would serve stale file listings "
+            "from workers that did not see a write; use CACHE_BACKEND=redis or set LIST_CACHE_TTL=0."
+        )
+
+
+def serve() -> None:
+    config = AppConfig()
+    _check_cache_coherence(config)
+    loop, http = _event_loop(), _http_protocol()
+    logger.info(
+        "Starting %d worker(s) on %s:%d (loop=%s, http=%s, backlog=%d, keep-alive=%ds, threadpool=%d).",
+        config.server_workers,
+        config.server_host,
+        config.port,
+        loop,
+        http,
+        config.server_backlog,
+        config.server_keepalive_timeout,
+        config.threadpool_size,
+    )
+    uvicorn.run(
+        "app.main:app",  # import string: each worker imports the app itself
+        host=config.server_host,
+        port=config.port,
+        workers=config.server_workers,
+        loop=loop,
+        http=http,
+        backlog=config.server_backlog,
+        timeout_keep_alive=config.server_keepalive_timeout,
+        timeout_graceful_shutdown=config.server_graceful_shutdown_timeout,
+        limit_concurrency=config.server_limit_concurrency or None,
+        proxy_headers=True,
+        access_log=False,  # request logging is handled by metrics/tracing; the access log costs a write per request
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from typing import Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Yield consecutive slices of ``items`` holding at most ``size`` elements."""
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
@@ -0,0 +1,31 @@
+"""
+Opaque keyset-pagination cursors.
+
+A cursor is the URL-safe base64 of a compact JSON object holding the sort
+key of the last row on a page. Clients must treat it as an opaque string.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+
+from app.utils.exceptions import FileValidationError
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *keys: str) -> dict:
+    """Decode ``cursor`` and check it carries every key in ``keys``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError) as exc:
+        raise FileValidationError("Invalid pagination cursor.") from exc
+    if not isinstance(values, dict) or any(not isinstance(values.get(key), str) for key in keys):
+        raise FileValidationError("Invalid pagination cursor.")
+    return values
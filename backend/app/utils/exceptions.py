@@ -1,3 +1,5 @@
+import math
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
@@ -41,12 +43,35 @@ class FileValidationError(DropboxAppException):
         super().__init__(message)
 
 
+class QuotaExceededError(DropboxAppException):
+
+    def __init__(self, message: str = "Storage quota exceeded."):
+        super().__init__(message)
+
+
 class StorageError(DropboxAppException):
 
     def __init__(self, message: str = "Storage operation failed."):
         super().__init__(message)
 
 
+class ServiceOverloadedError(DropboxAppException):
+
+    def __init__(self, message: str = "Service temporarily overloaded.", retry_after: float = 1):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class CircuitOpenError(ServiceOverloadedError):
+
+    def __init__(self, message: str = "Service temporarily unavailable.", retry_after: float = 1):
+        super().__init__(message, retry_after)
+
+
+def retry_after_header(seconds: float) -> dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
 def register_exception_handlers(app: FastAPI) -> None:
     @app.exception_handler(AuthenticationError)
     async def _handle_authentication_error(request: Request, exc: AuthenticationError) -> JSONResponse:
@@ -73,8 +98,21 @@ def register_exception_handlers(app: FastAPI) -> None:
         logger.info("FileValidationError: %s", exc.message)
         return JSONResponse(status_code=400, content={"detail": exc.message})
 
+    @app.exception_handler(QuotaExceededError)
+    async def _handle_quota_exceeded(request: Request, exc: QuotaExceededError) -> JSONResponse:
+        logger.info("QuotaExceededError: %s", exc.message)
+        return JSONResponse(status_code=413, content={"detail": exc.message})
+
+    @app.exception_handler(ServiceOverloadedError)
+    async def _handle_service_overloaded(request: Request, exc: ServiceOverloadedError) -> JSONResponse:
+        logger.warning("ServiceOverloadedError: %s", exc.message)
+        return JSONResponse(status_code=503, content={"detail": exc.message}, headers=retry_after_header(exc.retry_after))
+
     @app.exception_handler(StorageError)
     async def _handle_storage_error(request: Request, exc: StorageError) -> JSONResponse:
+        if isinstance(exc.__cause__, ServiceOverloadedError):
+            # The facade wraps upstream failures in StorageError; a shed call is still a retryable 503, not a 502.
+            return await _handle_service_overloaded(request, exc.__cause__)
         logger.error("StorageError: %s", exc.message)
         return JSONResponse(status_code=502, content={"detail": exc.message})
 
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import mmap
+import os
+import stat
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+
+class MappedFileResponse(FileResponse):
+    """
+    ``FileResponse`` that streams whole-file ``GET`` responses from a memory map
+    in large slices, so each chunk costs one page-cache copy instead of a
+    ``read`` syscall and file object round trip. Everything else (``HEAD``,
+    ``Range``/``If-Range`` requests, and servers supporting the ASGI
+    ``http.response.pathsend`` extension, which get the file for ``sendfile``)
+    is left to ``FileResponse`` itself. Only its public interface is used:
+    ``__call__`` picks the path and the headers are ``FileResponse``'s own.
+
+    The mapped file must not be truncated in place while it is being served.
+    """
+
+    chunk_size = 1024 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["method"].upper() != "GET"
+            or "http.response.pathsend" in scope.get("extensions", {})
+            or "range" in Headers(scope=scope)
+            or not self.stat_result
+            or not self.stat_result.st_size
+        ):
+            await super().__call__(scope, receive, send)
+            return
+
+        await self._send_mapped(send)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_mapped(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            size = len(mapped)
+            for offset in range(0, size, self.chunk_size):
+                end = min(offset + self.chunk_size, size)
+                # Slicing may fault pages in from disk, so it runs off the event loop.
+                chunk = await anyio.to_thread.run_sync(mapped.__getitem__, slice(offset, end))
+                await send({"type": "http.response.body", "body": chunk, "more_body": end < size})
+
+
+def stat_regular_file(path: str) -> os.stat_result | None:
+    """``os.stat`` of ``path`` if it is a regular file, else ``None``."""
+    try:
+        stat_result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
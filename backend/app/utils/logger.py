@@ -1,33 +1,161 @@
+"""
+Application logger.
+
+Records are handed to a ``QueueListener`` thread that formats and writes
+them, so a request never blocks on stdout: ``QueueHandler`` only snapshots
+the record (message, metadata, trace id) and enqueues it without waiting.
+When the queue is full, because stdout is backed up under log-shipper
+pressure, new records are dropped and counted rather than stalling the caller.
+
+Format, level, per-level sampling and queue size come from ``AppConfig``
+(``LOG_FORMAT``, ``LOG_LEVEL``, ``LOG_SAMPLE_RATES``, ``LOG_QUEUE_SIZE``).
+"""
+
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+from contextlib import contextmanager
 from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator
+
+from app.core.config import AppConfig
+from app.utils.metrics import Counter
+from app.utils.tracing import current_trace_id
 
-logger_metadata_ctx: ContextVar[dict] = ContextVar("logger_metadata", default={})
+# Request-scoped metadata. ``None`` outside :func:`logger_metadata_scope`; never a shared default dict.
+logger_metadata_ctx: ContextVar[dict | None] = ContextVar("logger_metadata", default=None)
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full.")
+LOG_RECORDS_SAMPLED_OUT = Counter("log_records_sampled_out_total", "Log records skipped by per-level sampling.", ("level",))
 
 
 class StructuredFormatter(logging.Formatter):
+    """Plain-text lines prefixed with ``[key=value]`` metadata; handy for local development."""
 
     def format(self, record: logging.LogRecord) -> str:
-        metadata: dict = logger_metadata_ctx.get({})
+        metadata: dict = getattr(record, "metadata", None) or {}
         prefix: str = " ".join([f"[{key}={value}]" for key, value in metadata.items()])
         original: str = super().format(record)
         return f"{prefix} {original}" if prefix else original
 
 
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record; metadata fields (user id, trace id, ...) become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "metadata", None) or {})
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LevelSamplingFilter(logging.Filter):
+    """Keeps each record with the probability configured for its level."""
+
+    def __init__(self, rates: dict[int, float]) -> None:
+        super().__init__()
+        self._rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self._rates.get(record.levelno)
+        if rate is None or rate >= 1 or random.random() < rate:
+            return True
+        LOG_RECORDS_SAMPLED_OUT.inc(level=record.levelname)
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the caller's thread, the only place the request's context variables are visible.
+        metadata = dict(logger_metadata_ctx.get() or {})
+        trace_id = current_trace_id()
+        if trace_id:
+            metadata["trace_id"] = trace_id
+        record.metadata = metadata
+        # Resolve the message and traceback now, like QueueHandler does, so the listener never touches live objects.
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
 def create_logger() -> logging.Logger:
+    config = AppConfig()
     _logger = logging.getLogger("dropbox_app")
-    _logger.setLevel(logging.INFO)  # Set minimum logging level
-    handler = logging.StreamHandler(sys.stdout)  # Output logs to stdout
-    handler.setFormatter(StructuredFormatter(fmt="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
-    _logger.addHandler(handler)
+    _logger.setLevel(config.log_level)  # Set minimum logging level
+
+    stream_handler = logging.StreamHandler(sys.stdout)  # Output logs to stdout, from the listener thread only
+    if config.log_format == "text":
+        stream_handler.setFormatter(StructuredFormatter(fmt="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    else:
+        stream_handler.setFormatter(JSONFormatter())
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=config.log_queue_size))
+    sample_rates = {logging.getLevelName(level.upper()): rate for level, rate in config.log_sample_rates.items()}
+    queue_handler.addFilter(LevelSamplingFilter(sample_rates))
+    _logger.addHandler(queue_handler)
     _logger.propagate = False  # Prevent logs from being propagated to the root logger
+
+    def _start_listener() -> QueueListener:
+        started = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+        started.start()
+        return started
+
+    listener = _start_listener()
+    atexit.register(lambda: listener.stop())  # flushes whatever is still queued, from whichever listener is current
+
+    def _restart_after_fork() -> None:
+        # Threads do not survive fork(): a forking server (e.g. gunicorn --preload) needs a fresh queue and listener
+        # per worker. The parent's listener cannot be restarted in the child (it still references the dead thread).
+        nonlocal listener
+        queue_handler.queue = queue.Queue(maxsize=config.log_queue_size)
+        listener = _start_listener()
+
+    os.register_at_fork(after_in_child=_restart_after_fork)
     return _logger
 
 
 logger: logging.Logger = create_logger()
 
 
+@contextmanager
+def logger_metadata_scope() -> Iterator[dict]:
+    """
+    Give the current request its own metadata dict. Threadpool workers run
+    in a copy of the request's context, so they see and update this same dict.
+    """
+    token = logger_metadata_ctx.set({})
+    try:
+        yield logger_metadata_ctx.get()
+    finally:
+        logger_metadata_ctx.reset(token)
+
+
 def add_logger_metadata(metadata: dict) -> None:
-    current = logger_metadata_ctx.get({})
-    current.update(metadata)
-    logger_metadata_ctx.set(current)
+    current = logger_metadata_ctx.get()
+    if current is None:
+        # Outside a request scope: bind a fresh dict to this context only.
+        logger_metadata_ctx.set(dict(metadata))
+    else:
+        current.update(metadata)
@@ -0,0 +1,210 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms with labels. An update is one lock
+acquisition and a dict lookup (histograms add a bisect over the bucket
+bounds), so instrumentation is cheap enough to leave on in production.
+Values are per process: with several workers, scrape each one.
+
+Usage:
+    REQUESTS = Counter("requests_total", "Requests handled.", ("route",))
+    REQUESTS.inc(route="/files")
+    MetricsRegistry().render()
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from app.utils.singleton import SingletonMeta
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    rendered = ",".join(f'{key}="{_escape_label_value(val)}"' for key, val in labels.items())
+    return f"{name}{{{rendered}}} {_format_value(value)}"
+
+
+class _Metric:
+    """Base class: label handling, registration and rendering of HELP/TYPE headers."""
+
+    type_name: str = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        MetricsRegistry().register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(_format_sample(name, labels, value) for name, labels, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down per label set. An unlabelled gauge can
+    instead be bound to a callback with :meth:`set_function`, evaluated at
+    render time.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        if self.labelnames:
+            raise ValueError("Only unlabelled gauges can be bound to a function.")
+        self._function = function
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        if self._function is not None:
+            yield self.name, {}, float(self._function())
+            return
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, plus their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._bounds: tuple[float, ...] = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last slot is +Inf) and the running sum.
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self._bounds) + 1)
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self._bounds + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry(metaclass=SingletonMeta):
+    """Process-wide set of metrics; every metric registers itself on creation."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered.")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
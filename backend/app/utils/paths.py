@@ -0,0 +1,26 @@
+"""
+Storage path checks.
+
+Object paths are ``/``-joined segments (``{user_id}/{file_id}/{name}`` or
+``{user_id}/blobs/{prefix}/{sha256}``). A segment that is ``.`` or ``..``, holds a
+separator or a control character could make a path resolve outside the
+prefix it was issued for, so such segments are refused wherever a path or
+a client-supplied file name enters the system.
+"""
+
+from __future__ import annotations
+
+
+def is_safe_path_segment(segment: str) -> bool:
+    """Whether ``segment`` is a plain name that can only ever refer to itself."""
+    if segment in ("", ".", ".."):
+        return False
+    return not any(char in "/\\" or ord(char) < 32 or ord(char) == 127 for char in segment)
+
+
+def split_storage_path(path: str) -> list[str]:
+    """The segments of ``path``; raises ``ValueError`` if any of them is not a plain name."""
+    segments = path.split("/")
+    if not all(is_safe_path_segment(segment) for segment in segments):
+        raise ValueError(f"Invalid storage path: {path!r}")
+    return segments
@@ -0,0 +1,64 @@
+"""
+Single-flight call coalescing.
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the function, and callers arriving while it is in flight
+wait for and receive the same result or exception. Nothing is kept once the
+call completes, so this is not a cache. A call that starts after the leader
+finished runs again.
+
+``AsyncSingleFlight`` runs the shared call as its own task, so a waiter that
+is cancelled (e.g. its client disconnected) does not cancel the call for the
+others.
+
+There is no threadpool (sync) variant: every route, job and repository runs
+on the event loop since the sync client graph was removed, so a blocking
+twin would have no callers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from app.utils.metrics import Counter
+from app.utils.singleton import SingletonMeta
+
+T = TypeVar("T")
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total", "Coalescable calls by operation; 'shared' calls reused an in-flight result.", ("operation", "result")
+)
+
+
+def _operation(key: Hashable) -> str:
+    return str(key[0]) if isinstance(key, tuple) and key else "unknown"
+
+
+class AsyncSingleFlight(metaclass=SingletonMeta):
+    """Process-wide coalescing for coroutines on the running event loop. Keys are tuples whose first item names the operation."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved, in case every waiter was cancelled
+
+    def forget(self, *prefix: Hashable) -> None:
+        """Make the next calls whose key starts with ``prefix`` run afresh instead of joining a call already in flight."""
+        for key in [key for key in self._calls if isinstance(key, tuple) and key[: len(prefix)] == prefix]:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None or task.done():  # a finished task awaits its done callback; never hand out its result
+            SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), result="leader")
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            SINGLE_FLIGHT_CALLS.inc(operation=_operation(key), result="shared")
+        return await asyncio.shield(task)
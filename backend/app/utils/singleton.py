@@ -16,7 +16,7 @@ import threading
 class SingletonMeta(type):
 
     _instances: dict = {}
-    _lock: threading.Lock = threading.Lock()
+    _lock: threading.RLock = threading.RLock()  # re-entrant: singletons may build other singletons in __init__
 
     def __call__(cls, *args, **kwargs):
         if cls not in cls._instances:
@@ -0,0 +1,275 @@
+"""
+Lightweight request tracing.
+
+A trace is a tree of timed spans: ``TracingMiddleware`` opens the root span
+for each request, and :func:`traced` / :func:`traced_methods` record child
+spans around facade, repository and client calls. The active span lives in a
+``ContextVar``, so it follows the request through ``await`` points and into
+``asyncio.to_thread`` / threadpool workers.
+
+Sampling is decided once per trace, at the root (an incoming W3C
+``traceparent`` header's sampled flag wins over the local ratio). Unsampled
+traces still get a trace id, for log correlation, but record no child spans.
+Finished spans of sampled traces are handed to a :class:`SpanExporter` from a
+background thread in batches, so exporting never blocks a request.
+
+Usage:
+    Tracer().configure(exporter, sample_ratio=0.1)
+
+    @traced()
+    def get_by_id(...): ...
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import logging
+import queue
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, TypeVar
+
+from app.utils.singleton import SingletonMeta
+
+F = TypeVar("F", bound=Callable)
+C = TypeVar("C", bound=type)
+
+# The app logger imports this module for trace ids, so look it up by name rather than importing it.
+_logger = logging.getLogger("dropbox_app")
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+current_span_ctx: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    sampled: bool
+    kind: str = "internal"  # "server" for request roots
+    start_time_ns: int = field(default_factory=time.time_ns)
+    end_time_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float | None:
+        return None if self.end_time_ns is None else (self.end_time_ns - self.start_time_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start_time_ns": self.start_time_ns,
+            "end_time_ns": self.end_time_ns,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_trace_id() -> str | None:
+    span = current_span_ctx.get()
+    return span.trace_id if span is not None else None
+
+
+class SpanExporter(ABC):
+
+    @abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Ship a batch of finished spans. Called from the export thread only."""
+
+    def shutdown(self) -> None:
+        """Release resources; called once after the final flush."""
+
+
+class _BatchSpanProcessor:
+    """
+    Buffers finished spans in a bounded queue and exports them from a daemon
+    thread every ``interval`` seconds or once ``batch_size`` are waiting.
+    When the queue is full new spans are dropped rather than blocking.
+    """
+
+    def __init__(self, exporter: SpanExporter, batch_size: int, interval: float, max_queue_size: int) -> None:
+        self._exporter = exporter
+        self._batch_size = batch_size
+        self._interval = interval
+        self._queue: queue.Queue[Span] = queue.Queue(maxsize=max_queue_size)
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._queue.qsize() >= self._batch_size:
+            self._wakeup.set()
+
+    def _drain(self) -> list[Span]:
+        batch: list[Span] = []
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export_pending(self) -> None:
+        while batch := self._drain():
+            try:
+                self._exporter.export(batch)
+            except Exception as exc:
+                _logger.warning("Failed to export %d spans: %s", len(batch), exc)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            self._export_pending()
+
+    def shutdown(self, timeout: float) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._export_pending()
+        self._exporter.shutdown()
+
+
+class Tracer(metaclass=SingletonMeta):
+    """
+    Process-wide tracer. Until :meth:`configure` is called with an exporter,
+    every trace is unsampled: requests still get trace ids for their logs,
+    but no spans are recorded.
+    """
+
+    def __init__(self) -> None:
+        self._processor: _BatchSpanProcessor | None = None
+        self._sample_ratio: float = 0.0
+
+    def configure(
+        self,
+        exporter: SpanExporter | None,
+        sample_ratio: float,
+        batch_size: int = 512,
+        export_interval: float = 5.0,
+        max_queue_size: int = 8192,
+    ) -> None:
+        self.shutdown()
+        self._sample_ratio = sample_ratio if exporter is not None else 0.0
+        self._processor = _BatchSpanProcessor(exporter, batch_size, export_interval, max_queue_size) if exporter is not None else None
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush buffered spans and stop the export thread."""
+        if self._processor is not None:
+            self._processor.shutdown(timeout)
+            self._processor = None
+
+    def _should_sample(self) -> bool:
+        return self._processor is not None and random.random() < self._sample_ratio
+
+    def _finish(self, span: Span) -> None:
+        span.end_time_ns = time.time_ns()
+        if span.sampled and self._processor is not None:
+            self._processor.submit(span)
+
+    @contextmanager
+    def root_span(self, name: str, traceparent: str | None = None, kind: str = "internal", **attributes: Any) -> Iterator[Span]:
+        """Start a new trace, continuing the caller's trace when a valid ``traceparent`` is given."""
+        match = _TRACEPARENT_RE.match(traceparent) if traceparent else None
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            sampled = self._processor is not None and int(flags, 16) & 1 == 1
+        else:
+            trace_id, parent_id, sampled = _new_trace_id(), None, self._should_sample()
+        span = Span(name, trace_id, _new_span_id(), parent_id, sampled, kind=kind, attributes=attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Child of the active span; a no-op yielding ``None`` outside a sampled trace."""
+        parent = current_span_ctx.get()
+        if parent is None or not parent.sampled:
+            yield None
+            return
+        span = Span(name, parent.trace_id, _new_span_id(), parent.span_id, True, attributes=attributes)
+        with self._activate(span):
+            yield span
+
+    @contextmanager
+    def _activate(self, span: Span) -> Iterator[None]:
+        token = current_span_ctx.set(span)
+        try:
+            yield
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            current_span_ctx.reset(token)
+            self._finish(span)
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """Record a child span (named after the function's qualname by default) around every call."""
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with Tracer().span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Tracer().span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_methods(cls: C) -> C:
+    """Class decorator: apply :func:`traced` to every public method defined on ``cls``."""
+    for attr_name, value in list(vars(cls).items()):
+        if not attr_name.startswith("_") and inspect.isfunction(value):
+            setattr(cls, attr_name, traced()(value))
+    return cls
@@ -0,0 +1,64 @@
+"""
+Thread-safe, size-bounded LRU cache with per-entry expiry.
+
+Entries expire at an absolute wall-clock time (``time.time()`` seconds), so
+callers can key expiry directly off upstream timestamps such as a JWT's
+``exp`` claim. When the cache is full the least recently used entry is
+evicted.
+
+Usage:
+    cache = TTLCache(maxsize=1024, default_ttl=60)
+    cache.set("key", value)
+    cache.get("key")
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+
+    def __init__(self, maxsize: int, default_ttl: float | None = None) -> None:
+        self._maxsize = maxsize
+        self._default_ttl = default_ttl
+        self._entries: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, expires_at: float | None = None) -> None:
+        """Store ``value``; ``expires_at`` wins over ``ttl``, which wins over the default TTL."""
+        if expires_at is None:
+            ttl = ttl if ttl is not None else self._default_ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry else default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,417 @@
+"""
+Local stand-in for the Supabase HTTP APIs the backend talks to, for benchmarks.
+
+Implements just enough of each API for ``AsyncDBClient``,
+``AsyncStorageClient`` and ``SupabaseJWKSClient``:
+
+- PostgREST (``/rest/v1``): select with eq/neq/lt/lte/gt/gte/in/is/like/ilike filters,
+  ``or=(...)`` logic trees, order, limit/offset, ``Prefer: count=``,
+  single-object responses, insert/upsert, update, delete, the blob RPCs and
+  the quota-checked file insert and the job lease RPC.
+- Storage (``/storage/v1``): signed upload/download URLs, upload to a signed
+  URL, object info and bulk remove.
+- Auth: ``/auth/v1/.well-known/jwks.json`` serving the key set from ``BENCH_JWKS``.
+
+Every request sleeps for the configured latency (plus uniform jitter) before
+it is answered, to mimic a remote Supabase project. State is in memory only.
+
+Run:
+    python -m benchmarks.fake_supabase --port 54321 --db-latency-ms 5 --storage-latency-ms 15 --jitter-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+TABLE_DEFAULTS: dict[str, dict[str, Any]] = {
+    "user_files": {"is_deleted": False, "blob_sha256": None, "upload_id": None, "chunk_size": None},
+    "file_blobs": {"ref_count": 1, "status": "uploading"},
+    "storage_delete_queue": {"attempts": 0},
+}
+
+_OBJECT_HEADER = "application/vnd.pgrst.object+json"
+
+
+class FakeState:
+
+    def __init__(self, db_latency: float, storage_latency: float, jitter: float, jwks: dict) -> None:
+        self.db_latency = db_latency
+        self.storage_latency = storage_latency
+        self.jitter = jitter
+        self.jwks = jwks
+        self.tables: dict[str, list[dict]] = {}
+        self.objects: dict[str, dict] = {}
+
+    async def delay(self, base: float) -> None:
+        latency = base + random.uniform(0, self.jitter)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+
+# --- PostgREST filter parsing -------------------------------------------------------------------
+
+
+def _split_top_level(raw: str) -> list[str]:
+    """Split on commas that are outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in raw:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _compare(row_value: Any, operator: str, raw: str) -> bool:
+    if operator == "is":
+        target = {"null": None, "true": True, "false": False}[raw]
+        return row_value is target
+    if operator == "in":
+        options = {_unquote(item) for item in _split_top_level(raw[1:-1])}
+        return _as_text(row_value) in options
+    if row_value is None:
+        return False
+    value = _unquote(raw)
+    if operator in ("like", "ilike"):
+        return _like_regex(value, ignore_case=operator == "ilike").fullmatch(_as_text(row_value)) is not None
+    if isinstance(row_value, bool):
+        # Postgres reads booleans case-insensitively, and postgrest-py sends Python's "True"/"False".
+        left, right = _as_text(row_value), value.lower()
+    elif isinstance(row_value, (int, float)):
+        left, right = float(row_value), float(value)
+    else:
+        left, right = _as_text(row_value), value
+    return {
+        "eq": left == right,
+        "neq": left != right,
+        "lt": left < right,
+        "lte": left <= right,
+        "gt": left > right,
+        "gte": left >= right,
+    }[operator]
+
+
+def _like_regex(pattern: str, ignore_case: bool) -> re.Pattern:
+    """A LIKE pattern as a regex. PostgREST turns every ``*`` into ``%`` first; ``\\`` escapes the next character."""
+    parts, chars = [], iter(pattern.replace("*", "%"))
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "\\")))
+        else:
+            parts.append({"%": ".*", "_": "."}.get(char) or re.escape(char))
+    return re.compile("".join(parts), re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _condition(column: str, expression: str):
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, raw = expression.partition(".")
+
+    def matches(row: dict) -> bool:
+        return _compare(row.get(column), operator, raw) != negate
+
+    return matches
+
+
+def _logic_tree(kind: str, body: str):
+    """``and``/``or`` over ``col.op.value`` items and nested ``and(...)``/``or(...)`` groups."""
+    predicates = []
+    for item in _split_top_level(body):
+        nested = re.match(r"^(and|or)\((.*)\)$", item)
+        if nested:
+            predicates.append(_logic_tree(nested.group(1), nested.group(2)))
+        else:
+            column, _, expression = item.partition(".")
+            predicates.append(_condition(column, expression))
+    combine = all if kind == "and" else any
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _row_filter(request: Request):
+    predicates = []
+    for key, value in request.query_params.multi_items():
+        if key in _RESERVED_PARAMS:
+            continue
+        if key in ("or", "and"):
+            predicates.append(_logic_tree(key, value[1:-1]))
+        else:
+            predicates.append(_condition(key, value))
+    return lambda row: all(predicate(row) for predicate in predicates)
+
+
+def _ordered(rows: list[dict], request: Request) -> list[dict]:
+    orders = [item for value in request.query_params.getlist("order") for item in value.split(",")]
+    for item in reversed(orders):
+        column, _, direction = item.partition(".")
+        rows = sorted(rows, key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+    return rows
+
+
+def _count_requested(request: Request) -> bool:
+    return "count=" in request.headers.get("prefer", "")
+
+
+def _rows_response(request: Request, rows: list[dict], total: int | None = None, status_code: int = 200) -> Response:
+    headers = {}
+    if _count_requested(request):
+        total = len(rows) if total is None else total
+        headers["content-range"] = f"0-{max(len(rows) - 1, 0)}/{total}" if rows else f"*/{total}"
+    if request.headers.get("accept") == _OBJECT_HEADER:
+        if len(rows) != 1:
+            return JSONResponse(
+                {
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                },
+                status_code=406,
+            )
+        return JSONResponse(rows[0], headers=headers, status_code=status_code)
+    return JSONResponse(rows, headers=headers, status_code=status_code)
+
+
+# --- PostgREST handlers ---------------------------------------------------------------------
+
+
+async def rest_table(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.db_latency)
+    table = state.tables.setdefault(request.path_params["table"], [])
+
+    if request.method == "GET":
+        predicate = _row_filter(request)
+        matching = _ordered([row for row in table if predicate(row)], request)
+        offset = int(request.query_params.get("offset", 0))
+        limit = request.query_params.get("limit")
+        page = matching[offset : offset + int(limit)] if limit is not None else matching[offset:]
+        return _rows_response(request, page, total=len(matching))
+
+    if request.method == "POST":
+        return await _insert(request, table)
+
+    predicate = _row_filter(request)
+    if request.method == "PATCH":
+        changes = await request.json()
+        updated = [row for row in table if predicate(row)]
+        for row in updated:
+            row.update(changes)
+        return _rows_response(request, updated)
+
+    # DELETE
+    removed = [row for row in table if predicate(row)]
+    table[:] = [row for row in table if not predicate(row)]
+    return _rows_response(request, removed)
+
+
+async def _insert(request: Request, table: list[dict]) -> Response:
+    payload = await request.json()
+    rows = payload if isinstance(payload, list) else [payload]
+    defaults = TABLE_DEFAULTS.get(request.path_params["table"], {})
+    prefer = request.headers.get("prefer", "")
+    conflict_columns = request.query_params.get("on_conflict", "id" if "resolution=" in prefer else "")
+    conflict_columns = [column for column in conflict_columns.split(",") if column]
+
+    written: list[dict] = []
+    for incoming in rows:
+        key = tuple(incoming.get(column) for column in conflict_columns)
+        existing = next((row for row in table if conflict_columns and tuple(row.get(c) for c in conflict_columns) == key), None)
+        if existing is not None:
+            if "resolution=ignore-duplicates" in prefer:
+                continue
+            if "resolution=merge-duplicates" not in prefer:
+                return JSONResponse({"code": "23505", "message": "duplicate key value violates unique constraint", "details": None, "hint": None}, status_code=409)
+            existing.update(incoming)
+            written.append(existing)
+            continue
+        row = {**defaults, **incoming}
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        table.append(row)
+        written.append(row)
+    return _rows_response(request, written, status_code=201)
+
+
+async def rest_rpc(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.db_latency)
+    params = await request.json()
+    blobs = state.tables.setdefault("file_blobs", [])
+    function = request.path_params["function"]
+    if function == "retain_file_blob":
+        blob = next((row for row in blobs if (row["user_id"], row["sha256"]) == (params["p_user_id"], params["p_sha256"])), None)
+        if blob is None:
+            return JSONResponse(None)
+        blob["ref_count"] += 1
+        return JSONResponse(blob["ref_count"])
+    if function == "release_file_blobs":
+        released = []
+        for key in zip(params["p_user_ids"], params["p_sha256"]):
+            blob = next((row for row in blobs if (row["user_id"], row["sha256"]) == key), None)
+            if blob is None:
+                continue
+            blob["ref_count"] -= 1
+            if blob["ref_count"] <= 0:
+                blobs.remove(blob)
+                released.append({"user_id": blob["user_id"], "sha256": blob["sha256"], "storage_path": blob["storage_path"]})
+        return JSONResponse(released)
+    if function == "acquire_job_lease":
+        leases = state.tables.setdefault("job_leases", [])
+        now = time.time()
+        lease = next((row for row in leases if row["name"] == params["p_name"]), None)
+        if lease is None:
+            lease = {"name": params["p_name"]}
+            leases.append(lease)
+        elif lease["holder"] != params["p_holder"] and lease["expires_at"] >= now:
+            return JSONResponse(False)
+        lease.update(holder=params["p_holder"], expires_at=now + params["p_ttl_seconds"])
+        return JSONResponse(True)
+    if function == "insert_user_files_within_quota":
+        files = state.tables.setdefault("user_files", [])
+        reserved = sum(
+            row["size_bytes"] for row in files
+            if row["user_id"] == params["p_user_id"] and (row["status"] == "uploading" or (row["status"] == "uploaded" and not row["is_deleted"]))
+        )
+        inserted = []
+        for incoming in params["p_rows"]:
+            if params["p_quota"] > 0 and reserved + incoming["size_bytes"] > params["p_quota"]:
+                continue
+            row = {**TABLE_DEFAULTS["user_files"], **incoming}
+            files.append(row)
+            inserted.append(row)
+            reserved += row["size_bytes"]
+        return JSONResponse(inserted)
+    return JSONResponse({"code": "PGRST202", "message": f"Could not find the function {function}", "details": None, "hint": None}, status_code=404)
+
+
+# --- Storage handlers -------------------------------------------------------------------------
+
+
+def _storage_error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse({"statusCode": str(status_code), "error": "not_found", "message": message}, status_code=400)
+
+
+async def storage_sign_upload(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.storage_latency)
+    bucket, path = request.path_params["bucket"], request.path_params["path"]
+    return JSONResponse({"url": f"/object/upload/sign/{bucket}/{path}?token={uuid.uuid4().hex}"})
+
+
+async def storage_upload(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    body = await request.body()
+    path = request.path_params["path"]
+    state.objects[path] = {"size": len(body), "content_type": request.headers.get("content-type", "application/octet-stream")}
+    return JSONResponse({"Key": f"{request.path_params['bucket']}/{path}"})
+
+
+async def storage_sign_download(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.storage_latency)
+    bucket, path = request.path_params["bucket"], request.path_params["path"]
+    return JSONResponse({"signedURL": f"/object/sign/{bucket}/{path}?token={uuid.uuid4().hex}"})
+
+
+async def storage_sign_downloads(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.storage_latency)
+    bucket = request.path_params["bucket"]
+    payload = await request.json()
+    return JSONResponse(
+        [{"path": path, "signedURL": f"/object/sign/{bucket}/{path}?token={uuid.uuid4().hex}", "error": None} for path in payload["paths"]]
+    )
+
+
+async def storage_info(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.storage_latency)
+    info = state.objects.get(request.path_params["path"])
+    if info is None:
+        return _storage_error(404, "Object not found")
+    return JSONResponse(info)
+
+
+async def storage_remove(request: Request) -> Response:
+    state: FakeState = request.app.state.fake
+    await state.delay(state.storage_latency)
+    payload = await request.json()
+    removed = [{"name": path} for path in payload["prefixes"] if state.objects.pop(path, None) is not None]
+    return JSONResponse(removed)
+
+
+async def jwks(request: Request) -> Response:
+    return JSONResponse(request.app.state.fake.jwks)
+
+
+def create_app(state: FakeState) -> Starlette:
+    app = Starlette(
+        routes=[
+            Route("/rest/v1/rpc/{function}", rest_rpc, methods=["POST"]),
+            Route("/rest/v1/{table}", rest_table, methods=["GET", "POST", "PATCH", "DELETE"]),
+            Route("/storage/v1/object/upload/sign/{bucket}/{path:path}", storage_sign_upload, methods=["POST"]),
+            Route("/storage/v1/object/upload/sign/{bucket}/{path:path}", storage_upload, methods=["PUT"]),
+            Route("/storage/v1/object/sign/{bucket}/{path:path}", storage_sign_download, methods=["POST"]),
+            Route("/storage/v1/object/sign/{bucket}", storage_sign_downloads, methods=["POST"]),
+            Route("/storage/v1/object/info/{bucket}/{path:path}", storage_info, methods=["GET"]),
+            Route("/storage/v1/object/{bucket}", storage_remove, methods=["DELETE"]),
+            Route("/auth/v1/.well-known/jwks.json", jwks, methods=["GET"]),
+            Route("/health", lambda request: JSONResponse({"status": "ok"}), methods=["GET"]),
+        ]
+    )
+    app.state.fake = state
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the fake Supabase server used by the benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Injected latency per PostgREST request.")
+    parser.add_argument("--storage-latency-ms", type=float, default=0.0, help="Injected latency per Storage request.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random extra latency added to each request.")
+    args = parser.parse_args()
+    fake_state = FakeState(
+        db_latency=args.db_latency_ms / 1000,
+        storage_latency=args.storage_latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        jwks=json.loads(os.environ.get("BENCH_JWKS", '{"keys": []}')),
+    )
+    uvicorn.run(create_app(fake_state), host=args.host, port=args.port, log_level="warning")
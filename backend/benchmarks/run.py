@@ -0,0 +1,398 @@
+"""
+End-to-end benchmark suite.
+
+Starts the fake Supabase server (``benchmarks.fake_supabase``) and the API
+(``uvicorn app.main:app``) as subprocesses, seeds data through the fake's own
+PostgREST/Storage endpoints, then drives each scenario at increasing
+concurrency with real signed ES256 tokens:
+
+- ``list_offset_d<N>`` / ``list_cursor_d<N>``: a listing page N rows deep, by offset or by keyset cursor
+- ``upload_url``: presigned upload URL issuance
+- ``confirm``: confirming an uploaded file (including Storage verification)
+- ``download_url``: presigned download URL issuance
+- ``delete``: deleting a file and its storage object
+
+Each (scenario, concurrency) pair reports throughput and p50/p95/p99 latency.
+Results are written as JSON; pass an earlier file as ``--baseline`` to
+compare and fail on regressions.
+
+Usage (from ``backend/``):
+    python -m benchmarks.run --concurrency 1,8,32 --requests 200 --output bench.json
+    python -m benchmarks.run --db-latency-ms 5 --storage-latency-ms 15 --baseline bench.json --max-regression 15
+    python -m benchmarks.run --scenarios list_offset,upload_url --app-env LIST_CACHE_TTL=0
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Iterator
+
+import httpx
+
+from benchmarks.tokens import BenchTokenIssuer
+
+BUCKET = "bench"
+PAGE_LIMIT = 20
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    concurrency: int
+    requests: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    latency_ms: dict[str, float]
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def running_servers(args: argparse.Namespace, issuer: BenchTokenIssuer) -> Iterator[tuple[str, str]]:
+    """Start the fake Supabase and the API; yields ``(fake_url, app_url)``."""
+    fake_port, app_port = _free_port(), _free_port()
+    fake_url, app_url = f"http://127.0.0.1:{fake_port}", f"http://127.0.0.1:{app_port}"
+    processes: list[subprocess.Popen] = []
+    try:
+        fake_cmd = [
+            sys.executable, "-m", "benchmarks.fake_supabase", "--port", str(fake_port),
+            "--db-latency-ms", str(args.db_latency_ms), "--storage-latency-ms", str(args.storage_latency_ms), "--jitter-ms", str(args.jitter_ms),
+        ]  # fmt: skip
+        processes.append(subprocess.Popen(fake_cmd, cwd=BACKEND_DIR, env={**os.environ, "BENCH_JWKS": json.dumps(issuer.jwks())}))
+        _wait_until_ready(f"{fake_url}/health", processes[-1])
+
+        app_env = {
+            **os.environ,
+            "SUPABASE_URL": fake_url,
+            "SUPABASE_KEY": "bench-service-key",
+            "SUPABASE_STORAGE_BUCKET": BUCKET,
+            "REAPER_ENABLED": "false",
+            "LOG_LEVEL": "WARNING",
+            **dict(item.split("=", 1) for item in args.app_env),
+        }
+        app_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"]
+        processes.append(subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=app_env))
+        _wait_until_ready(f"{app_url}/metrics", processes[-1])
+        yield fake_url, app_url
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+class BenchContext:
+    """HTTP clients, users and seeding helpers shared by the scenarios."""
+
+    def __init__(self, app_client: httpx.AsyncClient, fake_client: httpx.AsyncClient, issuer: BenchTokenIssuer, users: int) -> None:
+        self.app = app_client
+        self.fake = fake_client
+        self.user_ids = [str(uuid.uuid4()) for _ in range(users)]
+        self.tokens = {user_id: issuer.mint(user_id) for user_id in self.user_ids}
+
+    def headers(self, user_id: str) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[user_id]}"}
+
+    def user_for(self, index: int) -> str:
+        return self.user_ids[index % len(self.user_ids)]
+
+    async def seed_files(self, owners: list[str], status: str = "uploaded", with_objects: bool = True, size_bytes: int = 1024) -> list[dict]:
+        """Insert one ``user_files`` row per owner (and its storage object) straight into the fake."""
+        base = datetime.now(timezone.utc)
+        rows = []
+        for index, user_id in enumerate(owners):
+            file_id = str(uuid.uuid4())
+            created_at = (base - timedelta(microseconds=index)).isoformat()
+            rows.append(
+                {
+                    "id": file_id,
+                    "user_id": user_id,
+                    "name": f"seed-{index}.txt",
+                    "storage_path": f"{user_id}/{file_id}/seed-{index}.txt",
+                    "size_bytes": size_bytes,
+                    "mime_type": "text/plain",
+                    "status": status,
+                    "is_deleted": False,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            )
+        for start in range(0, len(rows), 1000):
+            response = await self.fake.post("/rest/v1/user_files", json=rows[start : start + 1000], headers={"Prefer": "return=minimal"})
+            response.raise_for_status()
+        if with_objects:
+            body = b"x" * size_bytes
+            for row in rows:
+                response = await self.fake.put(
+                    f"/storage/v1/object/upload/sign/{BUCKET}/{row['storage_path']}", content=body, headers={"Content-Type": "text/plain"}
+                )
+                response.raise_for_status()
+        return rows
+
+
+@dataclass
+class Scenario:
+    name: str
+    expected_status: int
+    # Builds the per-request arguments for ``n`` requests (seeding as needed); not timed.
+    prepare: Callable[[BenchContext, int], Awaitable[list[Any]]]
+    # Issues one request.
+    request: Callable[[BenchContext, Any], Awaitable[httpx.Response]]
+
+
+def _list_offset_scenario(depth: int, listing_user: dict) -> Scenario:
+    async def prepare(ctx: BenchContext, n: int) -> list[Any]:
+        return [listing_user["id"]] * n
+
+    async def request(ctx: BenchContext, user_id: str) -> httpx.Response:
+        return await ctx.app.get("/api/v1/files", params={"skip": depth, "limit": PAGE_LIMIT}, headers=ctx.headers(user_id))
+
+    return Scenario(f"list_offset_d{depth}", 200, prepare, request)
+
+
+def _list_cursor_scenario(depth: int, listing_user: dict) -> Scenario:
+    async def prepare(ctx: BenchContext, n: int) -> list[Any]:
+        user_id, cursor = listing_user["id"], None
+        for _ in range(depth // PAGE_LIMIT):
+            params = {"limit": PAGE_LIMIT, "count": "none", **({"cursor": cursor} if cursor else {})}
+            response = await ctx.app.get("/api/v1/files", params=params, headers=ctx.headers(user_id))
+            response.raise_for_status()
+            cursor = response.json().get("next_cursor")
+        return [(user_id, cursor)] * n
+
+    async def request(ctx: BenchContext, arg: tuple[str, str | None]) -> httpx.Response:
+        user_id, cursor = arg
+        params = {"limit": PAGE_LIMIT, "count": "none", **({"cursor": cursor} if cursor else {})}
+        return await ctx.app.get("/api/v1/files", params=params, headers=ctx.headers(user_id))
+
+    return Scenario(f"list_cursor_d{depth}", 200, prepare, request)
+
+
+async def _users_for(ctx: BenchContext, n: int) -> list[Any]:
+    return [ctx.user_for(index) for index in range(n)]
+
+
+async def _upload_url_request(ctx: BenchContext, user_id: str) -> httpx.Response:
+    payload = {"name": f"bench-{uuid.uuid4().hex[:8]}.txt", "size_bytes": 1024, "mime_type": "text/plain"}
+    return await ctx.app.post("/api/v1/files/upload-url", json=payload, headers=ctx.headers(user_id))
+
+
+async def _pending_uploads(ctx: BenchContext, n: int) -> list[Any]:
+    return await ctx.seed_files([ctx.user_for(index) for index in range(n)], status="uploading")
+
+
+async def _uploaded_files(ctx: BenchContext, n: int) -> list[Any]:
+    return await ctx.seed_files([ctx.user_for(index) for index in range(n)])
+
+
+async def _confirm_request(ctx: BenchContext, row: dict) -> httpx.Response:
+    return await ctx.app.patch(f"/api/v1/files/{row['id']}/confirm", json={"status": "uploaded"}, headers=ctx.headers(row["user_id"]))
+
+
+async def _download_url_request(ctx: BenchContext, row: dict) -> httpx.Response:
+    return await ctx.app.get(f"/api/v1/files/{row['id']}/download-url", headers=ctx.headers(row["user_id"]))
+
+
+async def _delete_request(ctx: BenchContext, row: dict) -> httpx.Response:
+    return await ctx.app.delete(f"/api/v1/files/{row['id']}", headers=ctx.headers(row["user_id"]))
+
+
+async def run_level(ctx: BenchContext, scenario: Scenario, concurrency: int, requests: int) -> ScenarioResult:
+    pending = list(await scenario.prepare(ctx, requests))
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while pending:
+            arg = pending.pop()
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(ctx, arg)
+                ok = response.status_code == scenario.expected_status
+            except httpx.HTTPError:
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return ScenarioResult(
+        scenario=scenario.name,
+        concurrency=concurrency,
+        requests=len(latencies),
+        errors=errors,
+        duration_s=round(duration, 4),
+        throughput_rps=round(len(latencies) / duration, 2) if duration else 0.0,
+        latency_ms={
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    )
+
+
+def build_scenarios(ctx: BenchContext, list_depths: list[int], listing_user: dict) -> list[Scenario]:
+    scenarios = [_list_offset_scenario(depth, listing_user) for depth in list_depths]
+    scenarios += [_list_cursor_scenario(depth, listing_user) for depth in list_depths]
+    scenarios += [
+        Scenario("upload_url", 201, _users_for, _upload_url_request),
+        Scenario("confirm", 200, _pending_uploads, _confirm_request),
+        Scenario("download_url", 200, _uploaded_files, _download_url_request),
+        Scenario("delete", 204, _uploaded_files, _delete_request),
+    ]
+    return scenarios
+
+
+def _selected(scenario: Scenario, filters: list[str]) -> bool:
+    return not filters or any(scenario.name == name or scenario.name.startswith(f"{name}_d") for name in filters)
+
+
+async def run_suite(args: argparse.Namespace, fake_url: str, app_url: str, issuer: BenchTokenIssuer) -> list[ScenarioResult]:
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2, max_keepalive_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=60) as app_client, httpx.AsyncClient(base_url=fake_url, timeout=60) as fake_client:
+        ctx = BenchContext(app_client, fake_client, issuer, args.users)
+        listing_owner = str(uuid.uuid4())
+        ctx.tokens[listing_owner] = issuer.mint(listing_owner)
+        await ctx.seed_files([listing_owner] * (max(args.list_depths) + PAGE_LIMIT), with_objects=False)
+        listing_user = {"id": listing_owner}
+
+        # Warm-up: JWKS, connection pools and lazy imports, not recorded.
+        for _ in range(args.warmup):
+            await app_client.get("/api/v1/files", params={"limit": PAGE_LIMIT}, headers=ctx.headers(listing_owner))
+
+        results = []
+        for scenario in build_scenarios(ctx, args.list_depths, listing_user):
+            if not _selected(scenario, args.scenarios):
+                continue
+            for concurrency in args.concurrency:
+                result = await run_level(ctx, scenario, concurrency, args.requests)
+                results.append(result)
+                print(
+                    f"{result.scenario:<20} c={result.concurrency:<4} {result.throughput_rps:>9.1f} req/s  "
+                    f"p50={result.latency_ms['p50']:>8.2f}ms  p95={result.latency_ms['p95']:>8.2f}ms  "
+                    f"p99={result.latency_ms['p99']:>8.2f}ms  errors={result.errors}",
+                    flush=True,
+                )
+        return results
+
+
+def compare_with_baseline(results: list[ScenarioResult], baseline_path: str, max_regression: float) -> bool:
+    """Print per-level deltas against a previous run; returns ``False`` if any p95 or throughput regressed beyond the limit."""
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = {(item["scenario"], item["concurrency"]): item for item in json.load(baseline_file)["results"]}
+    ok = True
+    print(f"\nComparison with {baseline_path} (limit {max_regression:.1f}%):")
+    for result in results:
+        previous = baseline.get((result.scenario, result.concurrency))
+        if previous is None:
+            continue
+        p95_delta = (result.latency_ms["p95"] / previous["latency_ms"]["p95"] - 1) * 100 if previous["latency_ms"]["p95"] else 0.0
+        rps_delta = (result.throughput_rps / previous["throughput_rps"] - 1) * 100 if previous["throughput_rps"] else 0.0
+        regressed = p95_delta > max_regression or rps_delta < -max_regression
+        ok = ok and not regressed
+        print(f"{result.scenario:<20} c={result.concurrency:<4} p95 {p95_delta:+7.1f}%  throughput {rps_delta:+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def _int_list(raw: str) -> list[int]:
+    return [int(item) for item in raw.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API benchmark suite against a local fake Supabase.")
+    parser.add_argument("--scenarios", type=lambda raw: [item.strip() for item in raw.split(",") if item.strip()], default=[], help="Comma-separated scenario names (default: all).")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32, 64], help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level.")
+    parser.add_argument("--list-depths", type=_int_list, default=[0, 100, 1000], help="Listing depths (rows skipped) to benchmark.")
+    parser.add_argument("--users", type=int, default=50, help="Distinct users requests are spread over.")
+    parser.add_argument("--warmup", type=int, default=20, help="Unrecorded warm-up requests.")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0, help="Injected latency per PostgREST request.")
+    parser.add_argument("--storage-latency-ms", type=float, default=5.0, help="Injected latency per Storage request.")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="Uniform random extra latency per upstream request.")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the API process (repeatable).")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against.")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed p95/throughput regression in percent.")
+    args = parser.parse_args()
+
+    issuer = BenchTokenIssuer()
+    started_at = datetime.now(timezone.utc).isoformat()
+    with running_servers(args, issuer) as (fake_url, app_url):
+        results = asyncio.run(run_suite(args, fake_url, app_url, issuer))
+
+    report = {
+        "meta": {
+            "started_at": started_at,
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": [asdict(result) for result in results],
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline and not compare_with_baseline(results, args.baseline, args.max_regression):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Locally generated ES256 signing key, its JWKS and Supabase-shaped access tokens for benchmark users."""
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwt.algorithms import ECAlgorithm
+
+
+class BenchTokenIssuer:
+
+    def __init__(self) -> None:
+        self._private_key = ec.generate_private_key(ec.SECP256R1())
+        self.kid = uuid.uuid4().hex
+
+    def jwks(self) -> dict:
+        jwk = json.loads(ECAlgorithm.to_jwk(self._private_key.public_key()))
+        jwk.update({"kid": self.kid, "alg": "ES256", "use": "sig"})
+        return {"keys": [jwk]}
+
+    def mint(self, user_id: str, ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "sub": user_id,
+            "email": f"{user_id}@bench.local",
+            "aud": "authenticated",
+            "role": "authenticated",
+            "iat": now,
+            "exp": now + ttl,
+        }
+        return jwt.encode(claims, self._private_key, algorithm="ES256", headers={"kid": self.kid})
@@ -0,0 +1,6 @@
+-- Supports keyset pagination for GET /api/v1/files.
+-- Matches the listing filter (user_id, status, is_deleted) and its sort order
+-- (created_at DESC, id DESC) so each page is an index range seek.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_files_listing_keyset_idx
+    ON public.user_files (user_id, created_at DESC, id DESC)
+    WHERE status = 'uploaded' AND is_deleted = false;
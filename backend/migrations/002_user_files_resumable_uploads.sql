@@ -0,0 +1,6 @@
+-- Session state for resumable (multipart) uploads.
+-- upload_id is the storage multipart upload id and chunk_size the part size
+-- handed to the client; both stay NULL for single-URL uploads.
+ALTER TABLE public.user_files
+    ADD COLUMN IF NOT EXISTS upload_id text,
+    ADD COLUMN IF NOT EXISTS chunk_size bigint;
@@ -0,0 +1,58 @@
+-- Content-addressed blob layer for upload deduplication.
+-- A blob is one storage object identified by the SHA-256 of its bytes;
+-- user_files rows that uploaded identical content share it via blob_sha256.
+CREATE TABLE IF NOT EXISTS public.file_blobs (
+    sha256       text PRIMARY KEY CHECK (sha256 ~ '^[0-9a-f]{64}$'),
+    storage_path text        NOT NULL,
+    size_bytes   bigint      NOT NULL,
+    status       text        NOT NULL DEFAULT 'uploading',
+    ref_count    integer     NOT NULL DEFAULT 1 CHECK (ref_count >= 0),
+    created_at   timestamptz NOT NULL DEFAULT now(),
+    updated_at   timestamptz NOT NULL DEFAULT now()
+);
+
+-- Only the API (service role) reads or writes blobs: a client able to change
+-- ref_count or storage_path could get an object deleted early, or someone else's.
+ALTER TABLE public.file_blobs ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.file_blobs FROM anon, authenticated;
+
+ALTER TABLE public.user_files
+    ADD COLUMN IF NOT EXISTS blob_sha256 text REFERENCES public.file_blobs (sha256);
+
+CREATE INDEX IF NOT EXISTS user_files_blob_sha256_idx
+    ON public.user_files (blob_sha256)
+    WHERE blob_sha256 IS NOT NULL;
+
+-- Take a reference on an uploaded blob; NULL when it is missing or still uploading.
+CREATE OR REPLACE FUNCTION public.retain_file_blob(p_sha256 text)
+RETURNS integer
+LANGUAGE sql
+AS $$
+    UPDATE public.file_blobs
+    SET ref_count = ref_count + 1, updated_at = now()
+    WHERE sha256 = p_sha256 AND status = 'uploaded'
+    RETURNING ref_count;
+$$;
+
+-- Drop one reference per array element (repeats allowed), delete blobs that
+-- reach zero and return them so the caller can remove their storage objects.
+CREATE OR REPLACE FUNCTION public.release_file_blobs(p_sha256 text[])
+RETURNS TABLE (sha256 text, storage_path text)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    UPDATE public.file_blobs b
+    SET ref_count = b.ref_count - c.n, updated_at = now()
+    FROM (SELECT s, count(*)::int AS n FROM unnest(p_sha256) AS s GROUP BY s) c
+    WHERE b.sha256 = c.s;
+
+    RETURN QUERY
+    DELETE FROM public.file_blobs b
+    WHERE b.sha256 = ANY (p_sha256) AND b.ref_count <= 0
+    RETURNING b.sha256, b.storage_path;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.retain_file_blob(text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.release_file_blobs(text[]) FROM PUBLIC, anon, authenticated;
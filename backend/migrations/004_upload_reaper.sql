@@ -0,0 +1,23 @@
+-- Supports the upload reaper.
+
+-- Stale-upload scan: oldest 'uploading' rows first.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_files_uploading_created_at_idx
+    ON public.user_files (created_at)
+    WHERE status = 'uploading';
+
+-- Durable retry queue for storage deletes that failed.
+CREATE TABLE IF NOT EXISTS public.storage_delete_queue (
+    storage_path    text PRIMARY KEY,
+    attempts        integer     NOT NULL DEFAULT 0,
+    last_error      text,
+    next_attempt_at timestamptz NOT NULL DEFAULT now(),
+    created_at      timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS storage_delete_queue_next_attempt_idx
+    ON public.storage_delete_queue (next_attempt_at);
+
+-- Only the API (service role) reads or writes the queue: a client able to
+-- insert a path here could have the reaper delete someone else's object.
+ALTER TABLE public.storage_delete_queue ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.storage_delete_queue FROM anon, authenticated;
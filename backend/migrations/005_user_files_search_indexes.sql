@@ -0,0 +1,21 @@
+-- Supports GET /api/v1/files/search.
+-- Run each statement on its own (CREATE INDEX CONCURRENTLY cannot run in a transaction).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- Name substring and prefix filters (name ILIKE '%term%' / 'term%').
+-- btree_gin puts user_id in the same GIN index, so the trigram lookup is
+-- limited to one user's files instead of intersecting with another index.
+-- Terms shorter than three characters have no trigrams to look up; those
+-- searches walk user_files_listing_keyset_idx (001) in page order instead.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_files_search_name_trgm_idx
+    ON public.user_files USING gin (user_id, name gin_trgm_ops)
+    WHERE status = 'uploaded' AND is_deleted = false;
+
+-- Searches without a name filter: the (user_id, status, is_deleted, created_at)
+-- path is user_files_listing_keyset_idx, a partial index with status and
+-- is_deleted fixed by its predicate. Date-range filters are range seeks on it.
+-- MIME-type filters get their own index in the same page order.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_files_search_mime_type_idx
+    ON public.user_files (user_id, mime_type, created_at DESC, id DESC)
+    WHERE status = 'uploaded' AND is_deleted = false;
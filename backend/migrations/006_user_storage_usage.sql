@@ -0,0 +1,144 @@
+-- Per-user storage usage counters for GET /api/v1/files/usage and upload quotas.
+--
+-- Counters are kept by a trigger on user_files, in the same transaction as
+-- the row change, so every path that uploads or removes a file (confirm,
+-- dedup, resumable finalize, single and bulk delete, the reaper) updates
+-- them atomically without the API issuing extra statements:
+--   bytes_used / file_count: rows with status 'uploaded' and not is_deleted
+--   bytes_pending:           rows still 'uploading' (reserved against the quota)
+-- Run each statement on its own (CREATE INDEX CONCURRENTLY cannot run in a transaction).
+CREATE TABLE IF NOT EXISTS public.user_storage_usage (
+    user_id       uuid PRIMARY KEY,
+    bytes_used    bigint      NOT NULL DEFAULT 0,
+    file_count    bigint      NOT NULL DEFAULT 0,
+    bytes_pending bigint      NOT NULL DEFAULT 0,
+    updated_at    timestamptz NOT NULL DEFAULT now()
+);
+
+-- Add signed deltas to a user's counters, creating the row on first use.
+CREATE OR REPLACE FUNCTION public.adjust_user_storage_usage(p_user_id uuid, p_bytes_used bigint, p_file_count bigint, p_bytes_pending bigint)
+RETURNS void
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_storage_usage AS u (user_id, bytes_used, file_count, bytes_pending)
+    VALUES (p_user_id, p_bytes_used, p_file_count, p_bytes_pending)
+    ON CONFLICT (user_id) DO UPDATE
+    SET bytes_used    = u.bytes_used + EXCLUDED.bytes_used,
+        file_count    = u.file_count + EXCLUDED.file_count,
+        bytes_pending = u.bytes_pending + EXCLUDED.bytes_pending,
+        updated_at    = now();
+$$;
+
+-- SECURITY DEFINER: writes to user_files by any role keep the counters current,
+-- while adjust_user_storage_usage itself stays closed to clients.
+CREATE OR REPLACE FUNCTION public.track_user_storage_usage()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        IF OLD.status = 'uploaded' AND NOT OLD.is_deleted THEN
+            PERFORM public.adjust_user_storage_usage(OLD.user_id, -OLD.size_bytes, -1, 0);
+        ELSIF OLD.status = 'uploading' THEN
+            PERFORM public.adjust_user_storage_usage(OLD.user_id, 0, 0, -OLD.size_bytes);
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        IF NEW.status = 'uploaded' AND NOT NEW.is_deleted THEN
+            PERFORM public.adjust_user_storage_usage(NEW.user_id, NEW.size_bytes, 1, 0);
+        ELSIF NEW.status = 'uploading' THEN
+            PERFORM public.adjust_user_storage_usage(NEW.user_id, 0, 0, NEW.size_bytes);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER user_files_storage_usage_insert_delete
+    AFTER INSERT OR DELETE ON public.user_files
+    FOR EACH ROW EXECUTE FUNCTION public.track_user_storage_usage();
+
+-- Status changes only; updated_at-only writes skip the trigger.
+CREATE OR REPLACE TRIGGER user_files_storage_usage_update
+    AFTER UPDATE OF user_id, status, is_deleted, size_bytes ON public.user_files
+    FOR EACH ROW
+    WHEN (
+        OLD.user_id IS DISTINCT FROM NEW.user_id
+        OR OLD.status IS DISTINCT FROM NEW.status
+        OR OLD.is_deleted IS DISTINCT FROM NEW.is_deleted
+        OR OLD.size_bytes IS DISTINCT FROM NEW.size_bytes
+    )
+    EXECUTE FUNCTION public.track_user_storage_usage();
+
+-- Per-user 'uploading' rows for reconciliation (uploaded rows use user_files_listing_keyset_idx).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_files_uploading_user_id_idx
+    ON public.user_files (user_id)
+    WHERE status = 'uploading';
+
+-- Recompute the counters of up to p_limit users after p_after (by user_id)
+-- from user_files, and return each user with the drift that was corrected.
+-- Each user's counter row is locked before its files are summed, so a
+-- concurrent upload or delete is counted exactly once: either it committed
+-- before the sum, or its trigger waits for the lock and applies its delta
+-- on top of the corrected value.
+CREATE OR REPLACE FUNCTION public.reconcile_user_storage_usage(p_after uuid, p_limit integer)
+RETURNS TABLE (user_id uuid, bytes_used_drift bigint, file_count_drift bigint, bytes_pending_drift bigint)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    counter record;
+    actual  record;
+BEGIN
+    FOR counter IN
+        SELECT u.user_id, u.bytes_used, u.file_count, u.bytes_pending
+        FROM public.user_storage_usage u
+        WHERE p_after IS NULL OR u.user_id > p_after
+        ORDER BY u.user_id
+        LIMIT p_limit
+        FOR UPDATE
+    LOOP
+        SELECT
+            coalesce(sum(f.size_bytes) FILTER (WHERE f.status = 'uploaded' AND NOT f.is_deleted), 0)::bigint AS bytes_used,
+            count(*) FILTER (WHERE f.status = 'uploaded' AND NOT f.is_deleted) AS file_count,
+            coalesce(sum(f.size_bytes) FILTER (WHERE f.status = 'uploading'), 0)::bigint AS bytes_pending
+        INTO actual
+        FROM public.user_files f
+        WHERE f.user_id = counter.user_id AND f.status IN ('uploaded', 'uploading');
+
+        IF (actual.bytes_used, actual.file_count, actual.bytes_pending) IS DISTINCT FROM (counter.bytes_used, counter.file_count, counter.bytes_pending) THEN
+            UPDATE public.user_storage_usage u
+            SET bytes_used = actual.bytes_used, file_count = actual.file_count, bytes_pending = actual.bytes_pending, updated_at = now()
+            WHERE u.user_id = counter.user_id;
+        END IF;
+
+        user_id := counter.user_id;
+        bytes_used_drift := counter.bytes_used - actual.bytes_used;
+        file_count_drift := counter.file_count - actual.file_count;
+        bytes_pending_drift := counter.bytes_pending - actual.bytes_pending;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$;
+
+-- Backfill users who already have files. Users whose first file arrives
+-- later get their row from the trigger. Writes that race the backfill are
+-- corrected by the first reconciliation run.
+INSERT INTO public.user_storage_usage (user_id, bytes_used, file_count, bytes_pending)
+SELECT
+    user_id,
+    coalesce(sum(size_bytes) FILTER (WHERE status = 'uploaded' AND NOT is_deleted), 0),
+    count(*) FILTER (WHERE status = 'uploaded' AND NOT is_deleted),
+    coalesce(sum(size_bytes) FILTER (WHERE status = 'uploading'), 0)
+FROM public.user_files
+GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
+
+-- Only the API (service role) reads the counters; a client able to write them could lower its usage past the quota.
+ALTER TABLE public.user_storage_usage ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.user_storage_usage FROM anon, authenticated;
+
+REVOKE ALL ON FUNCTION public.adjust_user_storage_usage(uuid, bigint, bigint, bigint) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.reconcile_user_storage_usage(uuid, integer) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,9 @@
+-- The upload reaper judges staleness by last activity (updated_at) rather than
+-- age, so resumable uploads that keep requesting part URLs are never reaped.
+-- Run each statement on its own (CREATE INDEX CONCURRENTLY cannot run in a transaction).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS user_files_uploading_updated_at_idx
+    ON public.user_files (updated_at)
+    WHERE status = 'uploading';
+
+-- Replaced by the index above (004).
+DROP INDEX CONCURRENTLY IF EXISTS public.user_files_uploading_created_at_idx;
@@ -0,0 +1,35 @@
+-- Leader election for the background jobs (upload reaper, usage reconciler).
+--
+-- Every API worker starts the jobs, but only the holder of a job's lease runs
+-- its passes. A session-level advisory lock would not outlive the PostgREST
+-- request that took it, so leadership is a row with an expiry instead: the
+-- holder renews it before every pass, and another worker takes it over once
+-- it has expired (the holder died or stopped renewing).
+CREATE TABLE IF NOT EXISTS public.job_leases (
+    name       text PRIMARY KEY,
+    holder     text        NOT NULL,
+    expires_at timestamptz NOT NULL
+);
+
+-- Take or renew the lease on p_name for p_ttl_seconds. Returns whether
+-- p_holder holds it now; false while another holder's lease is unexpired.
+CREATE OR REPLACE FUNCTION public.acquire_job_lease(p_name text, p_holder text, p_ttl_seconds double precision)
+RETURNS boolean
+LANGUAGE sql
+AS $$
+    WITH acquired AS (
+        INSERT INTO public.job_leases AS l (name, holder, expires_at)
+        VALUES (p_name, p_holder, now() + make_interval(secs => p_ttl_seconds))
+        ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder, expires_at = EXCLUDED.expires_at
+        WHERE l.holder = EXCLUDED.holder OR l.expires_at < now()
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM acquired);
+$$;
+
+-- Only the API (service role) may take or drop leases: a client holding one
+-- would stop the reaper and the reconciler from running.
+ALTER TABLE public.job_leases ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.job_leases FROM anon, authenticated;
+REVOKE ALL ON FUNCTION public.acquire_job_lease(text, text, double precision) FROM PUBLIC, anon, authenticated;
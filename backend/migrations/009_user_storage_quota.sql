@@ -0,0 +1,41 @@
+-- Atomic storage quota enforcement for new uploads.
+--
+-- The API pre-checks the quota against user_storage_usage (006) before
+-- signing anything, but two concurrent uploads can both pass that check.
+-- New user_files rows are therefore inserted through this function, which
+-- makes the check and the reservation one step: it locks the user's counter
+-- row, so concurrent calls for the same user run one after another, and each
+-- row it inserts is added to bytes_pending / bytes_used by the trigger in the
+-- same transaction, before the lock is released.
+--
+-- p_rows are user_files rows of p_user_id as JSON objects. They are inserted
+-- in order; rows that would take the user past p_quota bytes (0 = unlimited)
+-- are skipped. Returns the rows inserted.
+CREATE OR REPLACE FUNCTION public.insert_user_files_within_quota(p_user_id uuid, p_rows jsonb, p_quota bigint)
+RETURNS SETOF public.user_files
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    reserved bigint;
+    file     public.user_files;
+BEGIN
+    INSERT INTO public.user_storage_usage (user_id) VALUES (p_user_id) ON CONFLICT (user_id) DO NOTHING;
+    SELECT u.bytes_used + u.bytes_pending INTO reserved
+    FROM public.user_storage_usage u
+    WHERE u.user_id = p_user_id
+    FOR UPDATE;
+
+    FOR file IN SELECT * FROM jsonb_populate_recordset(NULL::public.user_files, p_rows) LOOP
+        IF file.user_id IS DISTINCT FROM p_user_id THEN
+            RAISE EXCEPTION 'insert_user_files_within_quota: row % does not belong to user %', file.id, p_user_id;
+        END IF;
+        CONTINUE WHEN p_quota > 0 AND reserved + file.size_bytes > p_quota;
+        INSERT INTO public.user_files SELECT file.* RETURNING * INTO file;
+        reserved := reserved + file.size_bytes;
+        RETURN NEXT file;
+    END LOOP;
+END;
+$$;
+
+-- Callers choose the user, the rows and the quota, so only the API (service role) may call it.
+REVOKE ALL ON FUNCTION public.insert_user_files_within_quota(uuid, jsonb, bigint) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,89 @@
+-- Scope upload deduplication to one user.
+--
+-- Blob hashes are supplied by the client and are not verified against the
+-- uploaded bytes. With blobs shared across users, anyone who knew a file's
+-- hash and size could get a reference to another user's object, or upload
+-- different bytes under a hash first and have later uploaders of the real
+-- content share them. Blobs are therefore keyed by (user_id, sha256): a
+-- user can only ever deduplicate against their own uploads. New blobs live
+-- under the owner's prefix ({user_id}/blobs/...).
+--
+-- Existing blobs are split into one row per user referencing them. Those rows
+-- keep the old shared storage_path; release_file_blobs only reports a path
+-- for deletion once no blob row refers to it any more.
+
+ALTER TABLE public.user_files DROP CONSTRAINT IF EXISTS user_files_blob_sha256_fkey;
+ALTER TABLE public.file_blobs DROP CONSTRAINT IF EXISTS file_blobs_pkey;
+ALTER TABLE public.file_blobs ADD COLUMN IF NOT EXISTS user_id uuid;
+
+INSERT INTO public.file_blobs (user_id, sha256, storage_path, size_bytes, status, ref_count, created_at, updated_at)
+SELECT f.user_id, b.sha256, b.storage_path, b.size_bytes, b.status, count(*), b.created_at, now()
+FROM public.file_blobs b
+JOIN public.user_files f ON f.blob_sha256 = b.sha256
+WHERE b.user_id IS NULL
+GROUP BY f.user_id, b.sha256, b.storage_path, b.size_bytes, b.status, b.created_at;
+
+-- Legacy rows are now either split or unreferenced.
+DELETE FROM public.file_blobs WHERE user_id IS NULL;
+
+ALTER TABLE public.file_blobs ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE public.file_blobs ADD PRIMARY KEY (user_id, sha256);
+ALTER TABLE public.user_files
+    ADD CONSTRAINT user_files_blob_fkey FOREIGN KEY (user_id, blob_sha256) REFERENCES public.file_blobs (user_id, sha256);
+
+CREATE INDEX IF NOT EXISTS file_blobs_storage_path_idx ON public.file_blobs (storage_path);
+
+DROP FUNCTION IF EXISTS public.retain_file_blob(text);
+DROP FUNCTION IF EXISTS public.release_file_blobs(text[]);
+
+-- Take a reference on one of the user's uploaded blobs; NULL when it is missing or still uploading.
+CREATE OR REPLACE FUNCTION public.retain_file_blob(p_user_id uuid, p_sha256 text)
+RETURNS integer
+LANGUAGE sql
+AS $$
+    UPDATE public.file_blobs
+    SET ref_count = ref_count + 1, updated_at = now()
+    WHERE user_id = p_user_id AND sha256 = p_sha256 AND status = 'uploaded'
+    RETURNING ref_count;
+$$;
+
+-- Drop one reference per (p_user_ids[i], p_sha256[i]) pair (repeats allowed)
+-- and delete blobs that reach zero. Returns the storage objects no blob row
+-- refers to any more, so the caller can remove them.
+CREATE OR REPLACE FUNCTION public.release_file_blobs(p_user_ids uuid[], p_sha256 text[])
+RETURNS TABLE (user_id uuid, sha256 text, storage_path text)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+    UPDATE public.file_blobs b
+    SET ref_count = b.ref_count - c.n, updated_at = now()
+    FROM (SELECT u, s, count(*)::int AS n FROM unnest(p_user_ids, p_sha256) AS r(u, s) GROUP BY u, s) c
+    WHERE b.user_id = c.u AND b.sha256 = c.s;
+
+    -- The outer query sees file_blobs as it was before the DELETE, so rows
+    -- deleted by this same statement are excluded from the "still referenced"
+    -- check explicitly.
+    RETURN QUERY
+    WITH released AS (
+        DELETE FROM public.file_blobs b
+        USING unnest(p_user_ids, p_sha256) AS r(u, s)
+        WHERE b.user_id = r.u AND b.sha256 = r.s AND b.ref_count <= 0
+        RETURNING b.user_id, b.sha256, b.storage_path
+    )
+    SELECT DISTINCT ON (d.storage_path) d.user_id, d.sha256, d.storage_path
+    FROM released d
+    WHERE NOT EXISTS (
+        SELECT 1 FROM public.file_blobs o
+        WHERE o.storage_path = d.storage_path
+          AND NOT EXISTS (SELECT 1 FROM released x WHERE x.user_id = o.user_id AND x.sha256 = o.sha256)
+    );
+END;
+$$;
+
+-- Repeated from 003 for databases that applied it before the table was closed to clients.
+ALTER TABLE public.file_blobs ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON public.file_blobs FROM anon, authenticated;
+
+REVOKE ALL ON FUNCTION public.retain_file_blob(uuid, text) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.release_file_blobs(uuid[], text[]) FROM PUBLIC, anon, authenticated;
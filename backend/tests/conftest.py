@@ -0,0 +1,117 @@
+"""
+Shared fixtures. Upstream Supabase is replaced by the in-process fake from
+:mod:`benchmarks.fake_supabase`, served to the shared HTTP pool over an ASGI
+transport, so tests run the real repositories, facade and routes without a
+network.
+"""
+
+from __future__ import annotations
+
+import os
+
+# AppConfig refuses to start without these; set before any app module reads them.
+os.environ.setdefault("SUPABASE_URL", "http://supabase.test")
+os.environ.setdefault("SUPABASE_KEY", "test-key")
+os.environ.setdefault("SUPABASE_STORAGE_BUCKET", "files")
+
+import httpx
+import pytest
+
+from app.utils.singleton import SingletonMeta
+from benchmarks.fake_supabase import FakeState, create_app
+
+TEST_ENV = {
+    "SERVER_WORKERS": "1",
+    "CACHE_BACKEND": "memory",
+    "RATE_LIMIT_ENABLED": "false",
+    "UPLOAD_VERIFY_ENABLED": "true",
+    "STORAGE_QUOTA_BYTES": "0",
+    "REAPER_ENABLED": "false",
+    "REAPER_BATCH_PAUSE": "0",
+}
+
+
+@pytest.fixture(autouse=True)
+def app_env(monkeypatch):
+    """Fresh singletons per test, so each one re-reads ``AppConfig`` from the environment it sets."""
+    for name, value in TEST_ENV.items():
+        monkeypatch.setenv(name, value)
+    SingletonMeta._instances.clear()
+    yield monkeypatch
+    SingletonMeta._instances.clear()
+
+
+@pytest.fixture
+def fake_supabase() -> FakeState:
+    """The fake's state (``tables``, ``objects``), wired into the shared async HTTP client."""
+    from app.core.http import HTTPClientPool
+
+    state = FakeState(db_latency=0, storage_latency=0, jitter=0, jwks={"keys": []})
+    HTTPClientPool().async_client._transport = httpx.ASGITransport(app=create_app(state))
+    return state
+
+
+@pytest.fixture
+def upstream_requests(fake_supabase) -> list[tuple[str, str]]:
+    """``(method, path)`` of every request the app sends to the fake, in order."""
+    from app.core.http import HTTPClientPool
+
+    requests: list[tuple[str, str]] = []
+
+    async def record(request: httpx.Request) -> None:
+        requests.append((request.method, request.url.path))
+
+    HTTPClientPool().async_client.event_hooks["request"].append(record)
+    return requests
+
+
+@pytest.fixture
+def file_facade(fake_supabase):
+    from app.core.cache import DownloadURLCache, ListingCache
+    from app.core.db import AsyncDBClient
+    from app.core.storage import AsyncStorageClient
+    from app.facades.file_facade import AsyncFileFacade
+    from app.repositories.blob_repository import AsyncBlobRepository
+    from app.repositories.file_repository import AsyncFileRepository
+    from app.repositories.storage_delete_queue_repository import AsyncStorageDeleteQueueRepository
+    from app.repositories.usage_repository import AsyncUsageRepository
+
+    db = AsyncDBClient()
+    return AsyncFileFacade(
+        AsyncFileRepository(db),
+        AsyncStorageClient(),
+        listing_cache=ListingCache(),
+        download_url_cache=DownloadURLCache(),
+        blob_repository=AsyncBlobRepository(db),
+        delete_queue=AsyncStorageDeleteQueueRepository(db),
+        usage_repository=AsyncUsageRepository(db),
+    )
+
+
+@pytest.fixture
+def put_object(fake_supabase):
+    """Upload to a signed URL the way a client would, through the faked Storage API."""
+    from app.core.http import HTTPClientPool
+
+    async def put(upload_url: str, data: bytes, content_type: str = "text/plain") -> None:
+        response = await HTTPClientPool().async_client.put(upload_url, content=data, headers={"content-type": content_type})
+        response.raise_for_status()
+
+    return put
+
+
+@pytest.fixture
+def upload_file(file_facade, put_object):
+    """Sign, transfer and confirm one file; returns the ``UploadURLResponse``."""
+    from app.models.enums import FileStatus
+    from app.models.schemas import ConfirmUploadRequest, UploadURLRequest
+
+    async def upload(user_id: str, name: str, data: bytes = b"data", sha256: str | None = None):
+        request = UploadURLRequest(name=name, size_bytes=len(data), mime_type="text/plain", sha256=sha256)
+        response = await file_facade.generate_upload_url(user_id, request)
+        if response.upload_url:
+            await put_object(response.upload_url, data)
+            await file_facade.confirm_upload(user_id, str(response.file_id), ConfirmUploadRequest(status=FileStatus.UPLOADED))
+        return response
+
+    return upload
@@ -0,0 +1,136 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+from app.core import security
+from app.core.security import SupabaseJWKSClient, VerifiedClaimsCache, _PooledPyJWKClient, validate_token
+from app.utils import ttl_cache
+from app.utils.exceptions import AuthenticationError
+from benchmarks.tokens import BenchTokenIssuer
+
+JWKS_URL = "http://supabase.test/auth/v1/.well-known/jwks.json"
+
+
+class JWKSEndpoint:
+    """Serves the issuer's key set until ``fail`` is set; counts fetches."""
+
+    def __init__(self, issuer: BenchTokenIssuer) -> None:
+        self.issuer = issuer
+        self.fetches = 0
+        self.fail = False
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        if self.fail:
+            return httpx.Response(503)
+        return httpx.Response(200, json=self.issuer.jwks())
+
+
+@pytest.fixture
+def issuer() -> BenchTokenIssuer:
+    return BenchTokenIssuer()
+
+
+@pytest.fixture
+def jwks_endpoint(issuer) -> JWKSEndpoint:
+    return JWKSEndpoint(issuer)
+
+
+@pytest.fixture
+def jwks_client(jwks_endpoint) -> _PooledPyJWKClient:
+    return _PooledPyJWKClient(JWKS_URL, httpx.Client(transport=httpx.MockTransport(jwks_endpoint)), lifespan=60)
+
+
+@pytest.fixture
+def decodes(monkeypatch) -> list[str]:
+    """Tokens passed to ``jwt.decode``, i.e. full signature verifications."""
+    decoded: list[str] = []
+    decode = security.jwt.decode
+
+    def counting_decode(token, *args, **kwargs):
+        decoded.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    return decoded
+
+
+def authenticate(token: str, jwks_client, claims_cache) -> Request:
+    request = Request({"type": "http", "headers": []})
+    validate_token(request, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), jwks_client, claims_cache)
+    return request
+
+
+def test_verified_claims_are_reused_until_the_token_expires(issuer, jwks_client, jwks_endpoint, decodes):
+    claims_cache = VerifiedClaimsCache()
+    token = issuer.mint("user-1")
+
+    requests = [authenticate(token, jwks_client, claims_cache) for _ in range(3)]
+
+    assert [request.state.user_id for request in requests] == ["user-1"] * 3
+    assert decodes == [token]
+    assert jwks_endpoint.fetches == 1
+
+
+def test_cached_claims_expire_with_the_token(issuer, jwks_client, monkeypatch):
+    claims_cache = VerifiedClaimsCache()
+    token = issuer.mint("user-1", ttl=60)
+    authenticate(token, jwks_client, claims_cache)
+    expires_at = claims_cache.get(claims_cache.key_for(token))["exp"]
+
+    monkeypatch.setattr(ttl_cache.time, "time", lambda: expires_at - 1)
+    assert claims_cache.get(claims_cache.key_for(token)) is not None
+    monkeypatch.setattr(ttl_cache.time, "time", lambda: expires_at)
+    assert claims_cache.get(claims_cache.key_for(token)) is None
+
+
+def test_invalid_and_expired_tokens_are_rejected_and_not_cached(issuer, jwks_client):
+    claims_cache = VerifiedClaimsCache()
+
+    with pytest.raises(AuthenticationError, match="expired"):
+        authenticate(issuer.mint("user-1", ttl=-60), jwks_client, claims_cache)
+    header, _, signature = issuer.mint("user-1").split(".")
+    forged = ".".join((header, issuer.mint("admin").split(".")[1], signature))
+    with pytest.raises(AuthenticationError, match="Invalid token"):
+        authenticate(forged, jwks_client, claims_cache)
+    with pytest.raises(AuthenticationError, match="Not authenticated"):
+        authenticate(BenchTokenIssuer().mint("user-1"), jwks_client, claims_cache)  # signed with a key the JWKS does not have
+    assert len(claims_cache) == 0
+
+
+def test_failed_jwks_fetch_keeps_the_cached_keys(issuer, jwks_client, jwks_endpoint):
+    jwks_client.get_signing_keys()
+    jwks_endpoint.fail = True
+
+    with pytest.raises(Exception):
+        jwks_client.get_signing_keys(refresh=True)
+
+    assert jwks_client.get_signing_key_from_jwt(issuer.mint("user-1")).key_id == issuer.kid
+    assert jwks_endpoint.fetches == 2
+
+
+async def test_refresh_loop_refetches_the_key_set_in_the_background(app_env, monkeypatch):
+    app_env.setenv("JWKS_REFRESH_INTERVAL", "0.01")
+    jwks = SupabaseJWKSClient()
+    refreshes: list[float] = []
+    monkeypatch.setattr(jwks, "refresh", lambda: refreshes.append(1))
+
+    loop = asyncio.create_task(jwks.run_refresh_loop())
+    await asyncio.sleep(0.2)
+    loop.cancel()
+
+    assert len(refreshes) >= 2
+
+
+def test_refresh_failure_is_logged_not_raised(issuer, jwks_client, jwks_endpoint, app_env):
+    jwks = SupabaseJWKSClient()
+    jwks._client = jwks_client
+    jwks_client.get_signing_keys()
+    jwks_endpoint.fail = True
+
+    jwks.refresh()
+
+    assert jwks_client.get_signing_key_from_jwt(issuer.mint("user-1")).key_id == issuer.kid
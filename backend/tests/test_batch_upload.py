@@ -0,0 +1,35 @@
+import uuid
+
+
+def item(name: str, mime_type: str = "text/plain", size_bytes: int = 10) -> dict:
+    return {"name": name, "size_bytes": size_bytes, "mime_type": mime_type}
+
+
+async def test_invalid_items_do_not_reject_the_batch(file_facade, fake_supabase, upstream_requests):
+    user_id = str(uuid.uuid4())
+
+    response = await file_facade.generate_upload_urls(user_id, [item("a.txt"), item("../b.txt"), item("c.exe", "application/x-foo"), item("d.txt")])
+
+    assert [result.index for result in response.results] == [0, 1, 2, 3]
+    assert [result.error is None for result in response.results] == [True, False, False, True]
+    assert all(result.upload_url and result.file_id for result in (response.results[0], response.results[3]))
+    assert {row["id"] for row in fake_supabase.tables["user_files"]} == {str(response.results[0].file_id), str(response.results[3].file_id)}
+    assert upstream_requests.count(("POST", "/rest/v1/user_files")) == 1
+
+
+async def test_signing_failure_is_reported_for_that_item_only(file_facade, fake_supabase):
+    user_id = str(uuid.uuid4())
+    sign = file_facade._storage_client.create_signed_upload_url
+
+    async def flaky_sign(path: str) -> str:
+        if path.endswith("/broken.txt"):
+            raise RuntimeError("storage unavailable")
+        return await sign(path)
+
+    file_facade._storage_client.create_signed_upload_url = flaky_sign
+
+    response = await file_facade.generate_upload_urls(user_id, [item("ok.txt"), item("broken.txt")])
+
+    assert response.results[0].error is None and response.results[0].upload_url
+    assert response.results[1].error and response.results[1].upload_url is None
+    assert [row["name"] for row in fake_supabase.tables["user_files"]] == ["ok.txt"]
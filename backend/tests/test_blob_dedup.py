@@ -0,0 +1,48 @@
+import hashlib
+import uuid
+
+DATA = b"hello world"
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+def blob(state, user_id: str) -> dict | None:
+    return next((row for row in state.tables.get("file_blobs", []) if row["user_id"] == user_id and row["sha256"] == SHA256), None)
+
+
+async def test_same_user_reuses_uploaded_blob(upload_file, fake_supabase):
+    user_id = str(uuid.uuid4())
+
+    first = await upload_file(user_id, "a.txt", DATA, SHA256)
+    second = await upload_file(user_id, "b.txt", DATA, SHA256)
+
+    assert not first.already_present
+    assert second.already_present and second.upload_url is None
+    assert second.storage_path == first.storage_path == f"{user_id}/blobs/{SHA256[:2]}/{SHA256}"
+    assert blob(fake_supabase, user_id)["ref_count"] == 2
+
+
+async def test_other_user_never_shares_a_blob(upload_file, fake_supabase):
+    owner, other = str(uuid.uuid4()), str(uuid.uuid4())
+
+    first = await upload_file(owner, "a.txt", DATA, SHA256)
+    second = await upload_file(other, "a.txt", DATA, SHA256)
+
+    assert not second.already_present and second.upload_url
+    assert second.storage_path != first.storage_path
+    assert second.storage_path.startswith(f"{other}/")
+    assert blob(fake_supabase, owner)["ref_count"] == 1
+    assert blob(fake_supabase, other)["ref_count"] == 1
+
+
+async def test_object_deleted_only_with_last_reference(file_facade, upload_file, fake_supabase):
+    user_id = str(uuid.uuid4())
+    first = await upload_file(user_id, "a.txt", DATA, SHA256)
+    second = await upload_file(user_id, "b.txt", DATA, SHA256)
+
+    await file_facade.delete_file(user_id, str(first.file_id))
+    assert blob(fake_supabase, user_id)["ref_count"] == 1
+    assert first.storage_path in fake_supabase.objects
+
+    await file_facade.delete_file(user_id, str(second.file_id))
+    assert blob(fake_supabase, user_id) is None
+    assert first.storage_path not in fake_supabase.objects
@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime, timezone
+
+
+class RecordingMultipartClient:
+
+    def __init__(self) -> None:
+        self.aborted: list[tuple[str, str]] = []
+
+    def abort(self, path: str, upload_id: str) -> None:
+        self.aborted.append((path, upload_id))
+
+
+def add_resumable_upload(state, user_id: str) -> dict:
+    file_id, now = str(uuid.uuid4()), datetime.now(timezone.utc).isoformat()
+    row = {
+        "id": file_id,
+        "user_id": user_id,
+        "name": "big.bin",
+        "storage_path": f"{user_id}/{file_id}/big.bin",
+        "size_bytes": 1,
+        "mime_type": "text/plain",
+        "status": "uploading",
+        "is_deleted": False,
+        "blob_sha256": None,
+        "upload_id": "upload-1",
+        "chunk_size": 1,
+        "created_at": now,
+        "updated_at": now,
+    }
+    state.tables.setdefault("user_files", []).append(row)
+    return row
+
+
+async def test_bulk_delete_reports_each_file(file_facade, upload_file, fake_supabase, upstream_requests):
+    user_id = str(uuid.uuid4())
+    uploads = [await upload_file(user_id, f"{index}.txt") for index in range(3)]
+    others = await upload_file(str(uuid.uuid4()), "theirs.txt")
+    upstream_requests.clear()
+
+    file_ids = [str(upload.file_id) for upload in uploads] + [str(others.file_id)]
+    response = await file_facade.delete_files(user_id, file_ids)
+
+    assert response.deleted_count == 3
+    assert [item.deleted for item in response.results] == [True, True, True, False]
+    assert response.results[3].error
+    assert {row["id"] for row in fake_supabase.tables["user_files"]} == {str(others.file_id)}
+    assert set(fake_supabase.objects) == {others.storage_path}
+    assert [request for request in upstream_requests if request == ("DELETE", "/rest/v1/user_files")] == [("DELETE", "/rest/v1/user_files")]
+
+
+async def test_bulk_delete_aborts_unfinished_resumable_uploads(file_facade, upload_file, fake_supabase):
+    multipart_client = RecordingMultipartClient()
+    file_facade._multipart_client = multipart_client
+    user_id = str(uuid.uuid4())
+    resumable = add_resumable_upload(fake_supabase, user_id)
+    plain = await upload_file(user_id, "a.txt")
+
+    await file_facade.delete_files(user_id, [resumable["id"], str(plain.file_id)])
+
+    assert multipart_client.aborted == [(resumable["storage_path"], "upload-1")]
+    assert fake_supabase.tables["user_files"] == []
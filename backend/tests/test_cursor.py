@@ -0,0 +1,36 @@
+import uuid
+
+import pytest
+
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.exceptions import FileValidationError
+
+
+def test_cursor_round_trip():
+    values = {"created_at": "2024-05-01T12:00:00+00:00", "id": str(uuid.uuid4())}
+    cursor = encode_cursor(values)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "created_at", "id") == values
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor({"id": "x"}), encode_cursor({"created_at": 1, "id": "x"}), "WzFd"])
+def test_invalid_cursor_is_a_validation_error(cursor):
+    with pytest.raises(FileValidationError):
+        decode_cursor(cursor, "created_at", "id")
+
+
+async def test_keyset_pages_cover_every_file_once(file_facade, upload_file):
+    user_id = str(uuid.uuid4())
+    created = {str((await upload_file(user_id, f"{index}.txt")).file_id) for index in range(7)}
+
+    seen, cursor = [], None
+    for _ in range(10):
+        page = await file_facade.list_files(user_id, limit=3, cursor=cursor)
+        assert len(page.files) <= 3
+        seen.extend(str(row.id) for row in page.files)
+        cursor = page.next_cursor
+        if not cursor:
+            break
+
+    assert len(seen) == len(created) and set(seen) == created
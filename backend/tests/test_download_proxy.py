@@ -0,0 +1,133 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.admission import UpstreamAdmission
+from app.core.download_proxy import DownloadProxy, content_disposition, etag_matches
+from app.utils.exceptions import register_exception_handlers
+
+BODY = bytes(range(256)) * 4
+ETAG = '"v1"'
+
+
+class Body(httpx.AsyncByteStream):
+    """Response body that is streamed, as Storage's would be, rather than preloaded."""
+
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+
+    async def __aiter__(self):
+        for start in range(0, len(self._data), 64):
+            yield self._data[start : start + 64]
+
+
+class StorageObjects:
+    """Signed-URL GETs for one object, honouring ``Range`` but, like some Storage setups, ignoring ``If-None-Match``."""
+
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path.endswith("/missing.bin"):
+            return httpx.Response(400, json={"statusCode": "404", "error": "not_found"})
+        headers = {"etag": ETAG, "accept-ranges": "bytes", "content-type": "application/octet-stream"}
+        if "range" in request.headers:
+            start, _, end = request.headers["range"].removeprefix("bytes=").partition("-")
+            start, end = int(start), min(int(end or len(BODY) - 1), len(BODY) - 1)
+            if start >= len(BODY):
+                return httpx.Response(416, stream=Body(b""), headers={"content-range": f"bytes */{len(BODY)}"})
+            headers["content-range"] = f"bytes {start}-{end}/{len(BODY)}"
+            part = BODY[start : end + 1]
+            return httpx.Response(206, stream=Body(part), headers={**headers, "content-length": str(len(part))})
+        return httpx.Response(200, stream=Body(BODY), headers={**headers, "content-length": str(len(BODY))})
+
+
+@pytest.fixture
+def storage(app_env) -> StorageObjects:
+    app_env.setenv("PROXY_DOWNLOAD_CHUNK_SIZE", "100")
+    app_env.setenv("PROXY_DOWNLOAD_MAX_CONCURRENCY", "1")
+    storage = StorageObjects()
+    DownloadProxy(httpx.AsyncClient(transport=httpx.MockTransport(storage)))
+    return storage
+
+
+@pytest.fixture
+async def api(storage):
+    app = FastAPI()
+    register_exception_handlers(app)
+
+    @app.get("/content/{name}")
+    async def content(name: str, request: Request):
+        return await DownloadProxy().stream(f"http://storage.test/object/sign/files/{name}?token=t", request.headers, "résumé.pdf", "application/pdf")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test") as client:
+        yield client
+
+
+def downloads_in_use() -> int:
+    return UpstreamAdmission().limiter("storage_downloads").in_use
+
+
+async def test_streams_the_whole_object(api):
+    response = await api.get("/content/a.bin")
+
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["etag"] == ETAG
+    assert response.headers["content-disposition"] == content_disposition("résumé.pdf")
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert downloads_in_use() == 0
+
+
+async def test_range_is_forwarded_and_partial_content_relayed(api, storage):
+    response = await api.get("/content/a.bin", headers={"range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+    assert storage.requests[-1].headers["range"] == "bytes=10-19"
+    assert storage.requests[-1].headers["accept-encoding"] == "identity"
+
+
+async def test_unsatisfiable_range_is_relayed(api):
+    response = await api.get("/content/a.bin", headers={"range": f"bytes={len(BODY)}-"})
+
+    assert response.status_code == 416
+    assert downloads_in_use() == 0
+
+
+async def test_matching_etag_is_answered_304_without_a_body(api):
+    response = await api.get("/content/a.bin", headers={"if-none-match": f'W/"other", W/{ETAG}'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert "content-length" not in response.headers
+    assert response.headers["etag"] == ETAG
+    assert downloads_in_use() == 0
+
+
+async def test_stale_etag_gets_the_full_object(api):
+    response = await api.get("/content/a.bin", headers={"if-none-match": '"v0"'})
+
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+async def test_missing_object_is_404_and_frees_the_slot(api):
+    response = await api.get("/content/missing.bin")
+
+    assert response.status_code == 404
+    assert downloads_in_use() == 0
+
+
+def test_etag_matching_is_weak():
+    assert etag_matches('W/"v1"', '"v1"')
+    assert etag_matches('"v0", "v1"', 'W/"v1"')
+    assert etag_matches("*", '"v1"')
+    assert not etag_matches('"v0"', '"v1"')
+    assert not etag_matches("*", "")
+
+
+def test_content_disposition_has_ascii_fallback_and_utf8_name():
+    assert content_disposition('rés"umé.pdf') == "attachment; filename=\"r_s_um_.pdf\"; filename*=UTF-8''r%C3%A9s%22um%C3%A9.pdf"
@@ -0,0 +1,103 @@
+import time
+import uuid
+
+from app.core.cache import DownloadURLCache, InMemoryCacheBackend
+
+
+def signing_calls(upstream_requests) -> int:
+    return sum(1 for method, path in upstream_requests if method == "POST" and path.startswith("/storage/v1/object/sign/"))
+
+
+async def test_url_is_served_while_enough_lifetime_remains():
+    cache = DownloadURLCache(InMemoryCacheBackend(100))
+    await cache.aset("a", "https://a", time.time() + 3600)
+
+    url, remaining = await cache.aget("a")
+
+    assert url == "https://a" and 3000 < remaining <= 3600
+
+
+async def test_url_near_expiry_is_not_served(app_env):
+    app_env.setenv("DOWNLOAD_URL_MIN_REMAINING", "300")
+    cache = DownloadURLCache(InMemoryCacheBackend(100))
+
+    await cache.aset("a", "https://a", time.time() + 200)
+
+    assert await cache.aget("a") is None
+
+
+async def test_download_url_is_signed_once(file_facade, upload_file, upstream_requests):
+    user_id = str(uuid.uuid4())
+    file_id = str((await upload_file(user_id, "a.txt")).file_id)
+
+    first = await file_facade.get_download_url(user_id, file_id)
+    second = await file_facade.get_download_url(user_id, file_id)
+
+    assert second.download_url == first.download_url
+    assert second.expires_in <= first.expires_in
+    assert signing_calls(upstream_requests) == 1
+
+
+async def test_deleting_a_file_evicts_its_url(file_facade, upload_file):
+    user_id = str(uuid.uuid4())
+    upload = await upload_file(user_id, "a.txt")
+    await file_facade.get_download_url(user_id, str(upload.file_id))
+    assert await DownloadURLCache().aget(upload.storage_path)
+
+    await file_facade.delete_file(user_id, str(upload.file_id))
+
+    assert await DownloadURLCache().aget(upload.storage_path) is None
+
+
+async def test_batch_urls_are_cached_in_one_round_trip():
+    cache = DownloadURLCache(InMemoryCacheBackend(100))
+    await cache.amset({"a": "https://a", "b": "https://b"}, time.time() + 3600)
+
+    found = await cache.amget(["a", "b", "missing"])
+
+    assert set(found) == {"a", "b"}
+    assert found["a"][0] == "https://a" and found["a"][1] > 3000
+
+
+async def test_batch_reports_errors_per_file(file_facade, upload_file):
+    user_id = str(uuid.uuid4())
+    uploaded = str((await upload_file(user_id, "a.txt")).file_id)
+    others = str((await upload_file(str(uuid.uuid4()), "b.txt")).file_id)
+    missing = str(uuid.uuid4())
+
+    response = await file_facade.get_download_urls(user_id, [uploaded, others, missing, uploaded])
+
+    assert [str(item.file_id) for item in response.results] == [uploaded, others, missing]
+    assert response.results[0].download_url and response.results[0].error is None
+    assert response.results[1].error and response.results[1].download_url is None
+    assert response.results[2].error and response.results[2].download_url is None
+
+
+async def test_batch_signs_in_bulk_and_reuses_cached_urls(file_facade, upload_file, upstream_requests):
+    user_id = str(uuid.uuid4())
+    file_ids = [str((await upload_file(user_id, f"{index}.txt")).file_id) for index in range(3)]
+    single = await file_facade.get_download_url(user_id, file_ids[0])
+    upstream_requests.clear()
+
+    response = await file_facade.get_download_urls(user_id, file_ids)
+
+    assert response.results[0].download_url == single.download_url
+    assert all(item.download_url for item in response.results)
+    assert signing_calls(upstream_requests) == 1  # the two uncached files, in one bulk call
+
+    upstream_requests.clear()
+    await file_facade.get_download_urls(user_id, file_ids)
+    assert signing_calls(upstream_requests) == 0
+
+
+async def test_batch_covers_files_sharing_a_blob(file_facade, upload_file):
+    user_id = str(uuid.uuid4())
+    sha256 = "ab" * 32
+    first = await upload_file(user_id, "a.txt", b"same", sha256)
+    second = await upload_file(user_id, "b.txt", b"same", sha256)
+    assert second.already_present
+
+    for _ in range(2):  # the second round is answered from the cache
+        response = await file_facade.get_download_urls(user_id, [str(first.file_id), str(second.file_id)])
+        assert [item.error for item in response.results] == [None, None]
+        assert response.results[0].download_url == response.results[1].download_url
@@ -0,0 +1,21 @@
+from app.core.db import AsyncDBClient
+
+
+async def test_filters_match_booleans_as_postgres_reads_them(fake_supabase):
+    db = AsyncDBClient()
+    await db.insert_rows("flags", [{"id": "a", "on": True}, {"id": "b", "on": False}])
+
+    rows, total = await db.get_rows("flags", "*", where_condition_dict={"on": ("eq", False)})
+
+    assert [row["id"] for row in rows] == ["b"] and total == 1
+
+
+async def test_or_filters_and_ordering(fake_supabase):
+    db = AsyncDBClient()
+    await db.insert_rows("items", [{"id": str(n), "n": n} for n in range(5)])
+
+    rows, _ = await db.get_rows(
+        "items", "*", where_condition_dict={"keyset": ("or_", "n.lt.1,and(n.gte.3,id.neq.4)")}, order_by_columns=[("n", True)]
+    )
+
+    assert [row["n"] for row in rows] == [3, 0]
@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.core.cache import InMemoryCacheBackend, ListingCache
+from app.utils.singleflight import AsyncSingleFlight
+
+
+class CountingBackend(InMemoryCacheBackend):
+
+    def __init__(self) -> None:
+        super().__init__(100)
+        self.calls = 0
+
+    def get(self, key: str) -> str | None:
+        self.calls += 1
+        return super().get(key)
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        self.calls += 1
+        super().set(key, value, ttl)
+
+
+@pytest.fixture
+def listing_cache_off(app_env):
+    app_env.setenv("LIST_CACHE_TTL", "0")
+
+
+async def test_invalidation_orphans_cached_pages():
+    cache = ListingCache(InMemoryCacheBackend(100))
+    version = await cache.aversion("u")
+    await cache.aset("u", version, (0, 20), "page")
+    assert await cache.aget("u", await cache.aversion("u"), (0, 20)) == "page"
+
+    await cache.ainvalidate("u")
+
+    assert await cache.aversion("u") != version
+    assert await cache.aget("u", await cache.aversion("u"), (0, 20)) is None
+
+
+async def test_listing_is_cached_until_a_mutation(file_facade, upload_file, fake_supabase):
+    user_id = str(uuid.uuid4())
+    first = await upload_file(user_id, "a.txt")
+    assert [str(row.id) for row in (await file_facade.list_files(user_id)).files] == [str(first.file_id)]
+
+    # A row changed behind the facade's back is not seen while the cached page is live...
+    fake_supabase.tables["user_files"][0]["name"] = "renamed.txt"
+    assert (await file_facade.list_files(user_id)).files[0].name == "a.txt"
+
+    # ...but any mutation through the facade drops the user's pages.
+    second = await upload_file(user_id, "b.txt")
+    listed = (await file_facade.list_files(user_id)).files
+    assert {str(row.id) for row in listed} == {str(first.file_id), str(second.file_id)}
+
+    await file_facade.delete_file(user_id, str(second.file_id))
+    assert [str(row.id) for row in (await file_facade.list_files(user_id)).files] == [str(first.file_id)]
+
+
+async def test_disabled_cache_is_never_touched(listing_cache_off, file_facade, upload_file):
+    backend = CountingBackend()
+    file_facade._listing_cache._backend = backend
+    user_id = str(uuid.uuid4())
+
+    await upload_file(user_id, "a.txt")
+    await file_facade.list_files(user_id)
+    await file_facade.delete_files(user_id, [str(uuid.uuid4())])
+
+    assert backend.calls == 0
+
+
+async def test_listing_after_a_mutation_does_not_join_an_older_query(listing_cache_off, file_facade, upload_file):
+    file_facade._single_flight = AsyncSingleFlight()
+    list_by_user = file_facade._file_repo.list_by_user
+
+    async def slow_list_by_user(*args, **kwargs):
+        result = await list_by_user(*args, **kwargs)
+        await asyncio.sleep(0.2)  # the rows are read; the response is still on its way
+        return result
+
+    file_facade._file_repo.list_by_user = slow_list_by_user
+    user_id = str(uuid.uuid4())
+
+    before = asyncio.create_task(file_facade.list_files(user_id))
+    await asyncio.sleep(0.02)
+    created = await upload_file(user_id, "a.txt")
+    after = await file_facade.list_files(user_id)
+
+    assert (await before).files == []
+    assert [str(row.id) for row in after.files] == [str(created.file_id)]
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.storage import LocalStorageBackend
+from app.models.schemas import UploadURLRequest
+from app.utils.paths import is_safe_path_segment, split_storage_path
+
+
+@pytest.mark.parametrize("segment", ["report.pdf", "..hidden", "a..b", "名前.txt", "with space"])
+def test_plain_segments_are_safe(segment):
+    assert is_safe_path_segment(segment)
+
+
+@pytest.mark.parametrize("segment", ["", ".", "..", "a/b", "a\\b", "tab\there", "nul\x00", "del\x7f"])
+def test_segments_that_could_escape_are_refused(segment):
+    assert not is_safe_path_segment(segment)
+
+
+def test_split_storage_path():
+    assert split_storage_path("u/f/report.pdf") == ["u", "f", "report.pdf"]
+    for path in ("u/../x", "/u/f", "u//f", "u/f/"):
+        with pytest.raises(ValueError):
+            split_storage_path(path)
+
+
+@pytest.mark.parametrize("name", ["..", "../etc/passwd", "a/b.txt", "a\\b.txt", "bad\nname.txt"])
+def test_upload_request_rejects_unsafe_names(name):
+    with pytest.raises(ValidationError):
+        UploadURLRequest(name=name, size_bytes=1, mime_type="text/plain")
+
+
+def test_object_path_stays_under_root(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path / "root"), "http://test", "key")
+
+    assert backend.object_path("u/f/a.txt") == os.path.join(backend.root, "u", "f", "a.txt")
+    for path in ("../outside", "u/../../outside", "u/./a.txt"):
+        with pytest.raises(ValueError):
+            backend.object_path(path)
+
+
+def test_object_path_refuses_symlinks(tmp_path):
+    backend = LocalStorageBackend(str(tmp_path / "root"), "http://test", "key")
+    (tmp_path / "elsewhere").mkdir()
+    os.symlink(tmp_path / "elsewhere", os.path.join(backend.root, "u"))
+
+    with pytest.raises(ValueError):
+        backend.object_path("u/a.txt")
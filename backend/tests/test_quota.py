@@ -0,0 +1,59 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.models.schemas import UploadURLRequest
+from app.utils.exceptions import QuotaExceededError
+
+
+@pytest.fixture
+def quota(app_env):
+    app_env.setenv("STORAGE_QUOTA_BYTES", "1000")
+
+
+def request(size_bytes: int, name: str = "a.txt") -> UploadURLRequest:
+    return UploadURLRequest(name=name, size_bytes=size_bytes, mime_type="text/plain")
+
+
+async def test_concurrent_uploads_cannot_overshoot_the_quota(quota, file_facade, fake_supabase):
+    user_id = str(uuid.uuid4())
+
+    results = await asyncio.gather(*(file_facade.generate_upload_url(user_id, request(300)) for _ in range(8)), return_exceptions=True)
+
+    assert sum(not isinstance(result, Exception) for result in results) == 3
+    assert all(isinstance(result, QuotaExceededError) for result in results if isinstance(result, Exception))
+    assert sum(row["size_bytes"] for row in fake_supabase.tables["user_files"]) == 900
+
+
+async def test_batch_items_past_the_quota_are_reported(quota, file_facade, fake_supabase, upload_file):
+    user_id = str(uuid.uuid4())
+    await upload_file(user_id, "existing.txt", b"x" * 700)  # counted by the database, not yet by the pre-check's counters
+
+    response = await file_facade.generate_upload_urls(user_id, [request(300, "b.txt").model_dump(), request(300, "c.txt").model_dump()])
+
+    assert response.results[0].error is None and response.results[0].upload_url
+    assert response.results[1].error == "Upload exceeds the storage quota."
+    assert sorted(row["name"] for row in fake_supabase.tables["user_files"]) == ["b.txt", "existing.txt"]
+
+
+async def test_rejected_dedup_upload_releases_its_blob_reference(quota, file_facade, fake_supabase, upload_file):
+    user_id, sha256 = str(uuid.uuid4()), "cd" * 32
+    await upload_file(user_id, "a.txt", b"x" * 600, sha256)
+
+    with pytest.raises(QuotaExceededError):
+        await file_facade.generate_upload_url(user_id, UploadURLRequest(name="b.txt", size_bytes=600, mime_type="text/plain", sha256=sha256))
+
+    assert fake_supabase.tables["file_blobs"][0]["ref_count"] == 1
+
+
+async def test_usage_reports_what_is_left(quota, file_facade, fake_supabase):
+    user_id = str(uuid.uuid4())
+    fake_supabase.tables["user_storage_usage"] = [{"user_id": user_id, "bytes_used": 600, "file_count": 2, "bytes_pending": 100}]
+
+    usage = await file_facade.get_usage(user_id)
+
+    assert (usage.bytes_used, usage.file_count, usage.bytes_pending) == (600, 2, 100)
+    assert (usage.quota_bytes, usage.bytes_available) == (1000, 300)
+    with pytest.raises(QuotaExceededError):
+        await file_facade.generate_upload_url(user_id, request(301))
@@ -0,0 +1,91 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core import admission
+from app.core.admission import InMemoryRateLimitBackend
+from app.middleware.rate_limit_middleware import RateLimitMiddleware
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    backend = InMemoryRateLimitBackend(max_entries=10)
+
+    assert [backend.consume("k", rate=2, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert backend.consume("k", rate=2, burst=3) == pytest.approx(0.5)
+    assert backend.consume("other", rate=2, burst=3) == 0
+
+    clock.now += 0.5
+    assert backend.consume("k", rate=2, burst=3) == 0
+    assert backend.consume("k", rate=2, burst=3) > 0
+
+
+def test_evicted_bucket_starts_full(clock):
+    backend = InMemoryRateLimitBackend(max_entries=1)
+    backend.consume("a", rate=1, burst=1)
+    assert backend.consume("a", rate=1, burst=1) > 0
+
+    backend.consume("b", rate=1, burst=1)
+
+    assert backend.consume("a", rate=1, burst=1) == 0
+
+
+async def test_middleware_answers_429_with_retry_after(app_env, clock):
+    app_env.setenv("RATE_LIMIT_ENABLED", "true")
+    app_env.setenv("RATE_LIMIT_RATE", "1")
+    app_env.setenv("RATE_LIMIT_BURST", "2")
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+    app.add_api_route("/api/v1/ping", lambda: {"ok": True})
+    app.add_api_route("/health", lambda: {"ok": True})
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test") as client:
+        statuses = [(await client.get("/api/v1/ping")).status_code for _ in range(3)]
+        limited = await client.get("/api/v1/ping")
+        health = [(await client.get("/health")).status_code for _ in range(5)]
+
+    assert statuses == [200, 200, 429]
+    assert limited.status_code == 429 and int(limited.headers["retry-after"]) >= 1
+    assert health == [200] * 5
+
+
+async def test_first_use_tokens_are_charged_to_the_user_not_the_shared_address(app_env, clock):
+    from app.core.security import SupabaseJWKSClient
+    from benchmarks.tokens import BenchTokenIssuer
+
+    app_env.setenv("RATE_LIMIT_ENABLED", "true")
+    app_env.setenv("RATE_LIMIT_RATE", "1")
+    app_env.setenv("RATE_LIMIT_BURST", "2")
+    issuer = BenchTokenIssuer()
+    SupabaseJWKSClient().client.jwk_set_cache.put(issuer.jwks())
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware)
+    app.add_api_route("/api/v1/ping", lambda: {"ok": True})
+
+    def headers(token: str) -> dict[str, str]:
+        return {"authorization": f"Bearer {token}"}
+
+    # Every request comes from the same address, as it would behind a proxy.
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test") as client:
+        alice = [(await client.get("/api/v1/ping", headers=headers(issuer.mint("alice")))).status_code for _ in range(3)]
+        bob = (await client.get("/api/v1/ping", headers=headers(issuer.mint("bob")))).status_code
+        invalid = [(await client.get("/api/v1/ping", headers=headers("not-a-token"))).status_code for _ in range(3)]
+
+    assert alice == [200, 200, 429]
+    assert bob == 200
+    assert invalid == [200, 200, 429]
@@ -0,0 +1,191 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import resilience
+from app.core.resilience import CircuitBreaker, UpstreamResilience, apply_upstream_deadline, resilient, upstream_deadline
+from app.utils.exceptions import CircuitOpenError
+
+
+class Clock:
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FlakyUpstream:
+    """Raises each queued error in turn, then returns ``"ok"``."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def call(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def no_backoff(app_env):
+    app_env.setenv("UPSTREAM_RETRY_ATTEMPTS", "3")
+    app_env.setenv("UPSTREAM_RETRY_BASE_DELAY", "0")
+
+
+def server_error(status: int = 503) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://supabase.test/rest/v1/user_files")
+    return httpx.HTTPStatusError("upstream error", request=request, response=httpx.Response(status, request=request))
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast(clock):
+    breaker = CircuitBreaker("storage", failure_threshold=3, recovery_timeout=30, half_open_max_calls=1)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()  # a success resets the count
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.retry_after == pytest.approx(30)
+
+
+def test_half_open_admits_limited_trials_then_closes(clock):
+    breaker = CircuitBreaker("storage", failure_threshold=1, recovery_timeout=30, half_open_max_calls=1)
+    breaker.record_failure()
+
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("storage", failure_threshold=1, recovery_timeout=30, half_open_max_calls=1)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_backoff_is_full_jitter_capped_exponential(app_env):
+    app_env.setenv("UPSTREAM_RETRY_BASE_DELAY", "0.1")
+    app_env.setenv("UPSTREAM_RETRY_MAX_DELAY", "0.3")
+    policy = UpstreamResilience()
+
+    for attempt, ceiling in ((1, 0.1), (2, 0.2), (3, 0.3), (6, 0.3)):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2  # spread over the whole range, not a fixed delay
+
+
+async def test_idempotent_call_retries_transient_errors(no_backoff):
+    upstream = FlakyUpstream(server_error(), httpx.ReadTimeout("slow"))
+
+    assert await resilient("storage", idempotent=True)(upstream.call)() == "ok"
+    assert upstream.calls == 3
+
+
+async def test_retries_stop_after_the_configured_attempts(no_backoff):
+    upstream = FlakyUpstream(*(server_error() for _ in range(5)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await resilient("storage", idempotent=True)(upstream.call)()
+    assert upstream.calls == 3
+
+
+async def test_client_errors_are_not_retried(no_backoff):
+    upstream = FlakyUpstream(server_error(400))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await resilient("storage", idempotent=True)(upstream.call)()
+    assert upstream.calls == 1
+    assert UpstreamResilience().breaker("storage").state == CircuitBreaker.CLOSED
+
+
+async def test_writes_retry_only_when_the_request_was_not_sent(no_backoff):
+    unsent = FlakyUpstream(httpx.ConnectError("refused"))
+    sent = FlakyUpstream(httpx.ReadTimeout("slow"))
+
+    assert await resilient("postgrest")(unsent.call)() == "ok"
+    with pytest.raises(httpx.ReadTimeout):
+        await resilient("postgrest")(sent.call)()
+    assert (unsent.calls, sent.calls) == (2, 1)
+
+
+async def test_open_circuit_fails_fast_without_calling_upstream(no_backoff, app_env):
+    app_env.setenv("CIRCUIT_FAILURE_THRESHOLD", "2")
+    upstream = FlakyUpstream(*(server_error() for _ in range(10)))
+    call = resilient("storage", idempotent=True)(upstream.call)
+
+    with pytest.raises(CircuitOpenError):
+        await call()
+    assert upstream.calls == 2
+
+
+async def test_deadline_bounds_the_whole_attempt(no_backoff, app_env):
+    app_env.setenv("STORAGE_TIMEOUT", "0.05")
+    app_env.setenv("UPSTREAM_RETRY_ATTEMPTS", "1")
+
+    async def trickle() -> None:
+        # Each chunk arrives well within a per-read timeout, but the response as a whole never finishes.
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        await resilient("storage", idempotent=True)(trickle)()
+    assert time.perf_counter() - started < 0.5
+
+
+async def test_operation_timeout_overrides_the_upstream_default(no_backoff, app_env):
+    app_env.setenv("STORAGE_TIMEOUT", "5")
+    app_env.setenv("UPSTREAM_OPERATION_TIMEOUTS", "storage.slow_call=0.05")
+    app_env.setenv("UPSTREAM_RETRY_ATTEMPTS", "1")
+
+    async def slow_call() -> None:
+        await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        await resilient("storage", idempotent=True)(slow_call)()
+
+
+def test_request_hook_clamps_every_phase_to_the_remaining_time(clock):
+    request = httpx.Request("GET", "http://supabase.test/rest/v1/user_files", extensions={"timeout": {"connect": 5, "read": 0.5, "write": None, "pool": 5}})
+
+    with upstream_deadline(2):
+        clock.now += 1
+        apply_upstream_deadline(request)
+        assert request.extensions["timeout"] == {"connect": 1, "read": 0.5, "write": 1, "pool": 1}
+
+        clock.now += 1
+        with pytest.raises(httpx.TimeoutException):
+            apply_upstream_deadline(request)
@@ -0,0 +1,129 @@
+import os
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes.local_storage import router as local_storage_router
+from app.core.db import AsyncDBClient
+from app.core.multipart import MultipartUploadClient
+from app.core.storage import AsyncStorageClient
+from app.facades.file_facade import AsyncFileFacade
+from app.models.enums import FileStatus
+from app.models.schemas import ResumableUploadRequest
+from app.repositories.file_repository import AsyncFileRepository
+from app.utils.exceptions import FileValidationError, register_exception_handlers
+
+CHUNK_SIZE = MultipartUploadClient.MIN_PART_SIZE
+SIZE = CHUNK_SIZE + 10
+DATA = os.urandom(SIZE)
+
+
+@pytest.fixture
+def local_storage(app_env, tmp_path):
+    app_env.setenv("STORAGE_BACKEND", "local")
+    app_env.setenv("MULTIPART_BACKEND", "local")
+    app_env.setenv("LOCAL_STORAGE_ROOT", str(tmp_path))
+    app_env.setenv("LOCAL_STORAGE_PUBLIC_URL", "http://api.test")
+    app_env.setenv("LOCAL_STORAGE_SIGNING_KEY", "test-signing-key")
+    app_env.setenv("RESUMABLE_CHUNK_SIZE", str(CHUNK_SIZE))
+    return tmp_path
+
+
+@pytest.fixture
+def facade(local_storage, fake_supabase):
+    return AsyncFileFacade(AsyncFileRepository(AsyncDBClient()), AsyncStorageClient(), multipart_client=MultipartUploadClient())
+
+
+@pytest.fixture
+async def api(local_storage):
+    app = FastAPI()
+    app.include_router(local_storage_router)
+    register_exception_handlers(app)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api.test") as client:
+        yield client
+
+
+async def put_parts(facade, api, user_id, file_id, part_numbers):
+    urls = await facade.get_resumable_part_urls(user_id, file_id, part_numbers)
+    for part in urls.parts:
+        start = (part.part_number - 1) * CHUNK_SIZE
+        response = await api.put(part.upload_url, content=DATA[start : start + CHUNK_SIZE])
+        assert response.status_code == 200, response.text
+
+
+async def test_finalize_assembles_parts_in_order(facade, api, local_storage):
+    user_id = str(uuid.uuid4())
+    session = await facade.start_resumable_upload(user_id, ResumableUploadRequest(name="big.bin", size_bytes=SIZE, mime_type="text/plain"))
+    file_id = str(session.file_id)
+    assert session.total_parts == 2
+
+    await put_parts(facade, api, user_id, file_id, [2])
+    assert (await facade.get_resumable_status(user_id, file_id)).missing_parts == [1]
+    with pytest.raises(FileValidationError):
+        await facade.finalize_resumable_upload(user_id, file_id)
+
+    await put_parts(facade, api, user_id, file_id, [1])
+    response = await facade.finalize_resumable_upload(user_id, file_id)
+
+    assert response.status == FileStatus.UPLOADED
+    assert (local_storage / session.storage_path).read_bytes() == DATA
+    assert not os.listdir(local_storage / ".multipart")
+
+
+async def test_part_upload_requires_a_valid_signature(facade, api):
+    user_id = str(uuid.uuid4())
+    session = await facade.start_resumable_upload(user_id, ResumableUploadRequest(name="big.bin", size_bytes=SIZE, mime_type="text/plain"))
+    url = (await facade.get_resumable_part_urls(user_id, str(session.file_id), [1])).parts[0].upload_url
+
+    tampered = await api.put(url.replace("/1?", "/2?"), content=b"x")
+    unknown = await api.put(url.replace(url.split("/")[-2], "0" * 32), content=b"x")
+
+    assert tampered.status_code == 403
+    assert unknown.status_code in (403, 404)
+
+
+def test_local_multipart_needs_local_storage(app_env):
+    from app.core.config import AppConfig
+
+    app_env.setenv("MULTIPART_BACKEND", "local")
+    with pytest.raises(EnvironmentError):
+        AppConfig()
+
+
+def test_multipart_backend_follows_the_storage_backend(local_storage, app_env):
+    from app.core.config import AppConfig
+
+    app_env.delenv("MULTIPART_BACKEND")
+    assert AppConfig().multipart_backend == "local"
+
+
+async def test_only_multipart_routes_depend_on_the_multipart_client(fake_supabase):
+    from fastapi import Request
+
+    from app.api.deps import get_multipart_client, validate_token
+    from app.api.routes.files import router as files_router
+
+    user_id = str(uuid.uuid4())
+
+    async def authenticated(request: Request) -> None:
+        request.state.user_id = user_id
+
+    async def broken_multipart_client():
+        raise RuntimeError("multipart backend unavailable")
+
+    app = FastAPI()
+    app.include_router(files_router)
+    register_exception_handlers(app)
+    app.dependency_overrides[validate_token] = authenticated
+    app.dependency_overrides[get_multipart_client] = broken_multipart_client
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://api.test") as client:
+        listed = await client.get("/api/v1/files")
+        signed = await client.post("/api/v1/files/upload-url", json={"name": "a.txt", "size_bytes": 1, "mime_type": "text/plain"})
+        resumable = await client.post("/api/v1/files/resumable", json={"name": "a.txt", "size_bytes": 1, "mime_type": "text/plain"})
+
+    assert listed.status_code == 200
+    assert signed.status_code == 201
+    assert resumable.status_code == 500
@@ -0,0 +1,74 @@
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import FileSearchQuery
+from app.repositories.file_repository import AsyncFileRepository
+
+
+@pytest.fixture
+async def files(upload_file, fake_supabase):
+    """One user's uploaded files, plus another user's match and an unconfirmed upload that must never show up."""
+    user_id = str(uuid.uuid4())
+    for name, data in (
+        ("Report_2024.txt", b"x" * 10),
+        ("reportX2024.txt", b"x" * 20),
+        ("100%.txt", b"x" * 30),
+        ("1000.txt", b"x" * 40),
+        ("my report.pdf", b"x" * 50),
+    ):
+        await upload_file(user_id, name, data)
+    for row in fake_supabase.tables["user_files"]:
+        if row["name"].endswith(".pdf"):
+            row["mime_type"] = "application/pdf"
+    await upload_file(str(uuid.uuid4()), "report.txt")
+    fake_supabase.tables["user_files"].append({**fake_supabase.tables["user_files"][0], "id": str(uuid.uuid4()), "name": "report-draft.txt", "status": "uploading"})
+    return user_id
+
+
+async def names(file_facade, user_id: str, **query) -> list[str]:
+    response = await file_facade.search_files(user_id, FileSearchQuery(**query))
+    return sorted(file.name for file in response.files)
+
+
+def test_like_literal_escapes_wildcards():
+    assert AsyncFileRepository._like_literal("a%b_c\\d") == "a\\%b\\_c\\\\d"
+    assert AsyncFileRepository._like_literal("a*c") == "a_c"  # PostgREST would read an escaped * as % anyway
+
+
+async def test_substring_is_case_insensitive_and_scoped_to_uploaded_files(file_facade, files):
+    assert await names(file_facade, files, q="REPORT") == ["Report_2024.txt", "my report.pdf", "reportX2024.txt"]
+
+
+async def test_like_wildcards_in_the_query_match_literally(file_facade, files):
+    assert await names(file_facade, files, q="t_2") == ["Report_2024.txt"]
+    assert await names(file_facade, files, q="0%") == ["100%.txt"]
+
+
+async def test_prefix_only_matches_the_start(file_facade, files):
+    assert await names(file_facade, files, prefix="rep") == ["Report_2024.txt", "reportX2024.txt"]
+
+
+async def test_filters_combine(file_facade, files):
+    assert await names(file_facade, files, min_size=20, max_size=40) == ["100%.txt", "1000.txt", "reportX2024.txt"]
+    assert await names(file_facade, files, q="report", mime_type=["application/pdf"]) == ["my report.pdf"]
+    assert await names(file_facade, files, q="report", min_size=15) == ["my report.pdf", "reportX2024.txt"]
+
+
+async def test_pages_follow_the_cursor(file_facade, files):
+    first = await file_facade.search_files(files, FileSearchQuery(q="report", limit=2, count="exact"))
+    second = await file_facade.search_files(files, FileSearchQuery(q="report", limit=2, cursor=first.next_cursor))
+    seen = [file.name for file in first.files + second.files]
+
+    assert first.total == 3
+    assert second.next_cursor is None
+    assert sorted(seen) == ["Report_2024.txt", "my report.pdf", "reportX2024.txt"]
+    assert seen[0] == "my report.pdf"  # newest first
+
+
+def test_query_ranges_are_validated():
+    with pytest.raises(ValidationError):
+        FileSearchQuery(min_size=10, max_size=5)
+    with pytest.raises(ValidationError):
+        FileSearchQuery(created_after="2026-01-02T00:00:00", created_before="2026-01-01T00:00:00")
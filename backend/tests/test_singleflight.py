@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.utils.singleflight import AsyncSingleFlight
+
+
+class Upstream:
+    """Counts calls and holds each one open until ``release`` is set."""
+
+    def __init__(self, result="rows") -> None:
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight, upstream = AsyncSingleFlight(), Upstream()
+
+    callers = [asyncio.create_task(flight.do(("list_files", "u1"), upstream)) for _ in range(5)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    assert await asyncio.gather(*callers) == ["rows"] * 5
+    assert upstream.calls == 1
+
+
+async def test_different_keys_run_separately():
+    flight, upstream = AsyncSingleFlight(), Upstream()
+    upstream.release.set()
+
+    await asyncio.gather(flight.do(("list_files", "u1"), upstream), flight.do(("list_files", "u2"), upstream))
+
+    assert upstream.calls == 2
+
+
+async def test_call_after_completion_runs_again():
+    flight, upstream = AsyncSingleFlight(), Upstream()
+    upstream.release.set()
+
+    await flight.do(("list_files", "u1"), upstream)
+    await flight.do(("list_files", "u1"), upstream)
+
+    assert upstream.calls == 2
+
+
+async def test_waiters_share_the_exception():
+    flight, upstream = AsyncSingleFlight(), Upstream(result=RuntimeError("upstream down"))
+
+    callers = [asyncio.create_task(flight.do(("get_download_url", "u1", "f1"), upstream)) for _ in range(3)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert upstream.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight, upstream = AsyncSingleFlight(), Upstream()
+
+    leader = asyncio.create_task(flight.do(("list_files", "u1"), upstream))
+    follower = asyncio.create_task(flight.do(("list_files", "u1"), upstream))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    assert await follower == "rows"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_forget_starts_a_fresh_call():
+    flight, stale = AsyncSingleFlight(), Upstream(result="old")
+    fresh = Upstream(result="new")
+    fresh.release.set()
+
+    in_flight = asyncio.create_task(flight.do(("list_files", "u1", "v1"), stale))
+    await asyncio.sleep(0)
+    flight.forget("list_files", "u1")
+
+    assert await flight.do(("list_files", "u1", "v1"), fresh) == "new"
+    stale.release.set()
+    assert await in_flight == "old"
+
+
+async def test_duplicate_download_url_requests_sign_once(file_facade, upload_file, upstream_requests):
+    file_facade._single_flight = AsyncSingleFlight()
+    file_facade._download_url_cache = None  # every leader signs, so only coalescing can keep this to one call
+    user_id = str(uuid.uuid4())
+    upload = await upload_file(user_id, "a.txt")
+    upstream_requests.clear()
+
+    responses = await asyncio.gather(*(file_facade.get_download_url(user_id, str(upload.file_id)) for _ in range(4)))
+
+    assert len({response.download_url for response in responses}) == 1
+    assert upstream_requests.count(("GET", "/rest/v1/user_files")) == 1
+    assert sum(1 for method, path in upstream_requests if method == "POST" and path.startswith("/storage/v1/object/sign/")) == 1
@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.db import AsyncDBClient
+from app.jobs.lease import JobLease
+from app.jobs.upload_reaper import UploadReaper
+from app.repositories.job_lease_repository import AsyncJobLeaseRepository
+
+
+class RecordingMultipartClient:
+
+    def __init__(self) -> None:
+        self.aborted: list[str] = []
+
+    def abort(self, path: str, upload_id: str) -> None:
+        self.aborted.append(upload_id)
+
+
+def add_file(state, status: str, idle: timedelta, upload_id: str | None = None) -> dict:
+    now = datetime.now(timezone.utc)
+    user_id, file_id = str(uuid.uuid4()), str(uuid.uuid4())
+    row = {
+        "id": file_id,
+        "user_id": user_id,
+        "name": "a.txt",
+        "storage_path": f"{user_id}/{file_id}/a.txt",
+        "size_bytes": 1,
+        "mime_type": "text/plain",
+        "status": status,
+        "is_deleted": False,
+        "blob_sha256": None,
+        "upload_id": upload_id,
+        "chunk_size": None,
+        "created_at": (now - timedelta(days=30)).isoformat(),
+        "updated_at": (now - idle).isoformat(),
+    }
+    state.tables.setdefault("user_files", []).append(row)
+    state.objects[row["storage_path"]] = {"size": 1, "content_type": "text/plain"}
+    return row
+
+
+@pytest.fixture
+def multipart_client():
+    return RecordingMultipartClient()
+
+
+@pytest.fixture
+def reaper(fake_supabase, multipart_client):
+    reaper = UploadReaper(multipart_client=multipart_client)
+    reaper.stale_after = 3600
+    return reaper
+
+
+async def test_reaps_only_uploads_idle_past_the_cutoff(reaper, fake_supabase, multipart_client):
+    idle = add_file(fake_supabase, "uploading", timedelta(hours=2))
+    idle_multipart = add_file(fake_supabase, "uploading", timedelta(hours=2), upload_id="u1")
+    # Started long ago but touched recently: a long transfer still in progress.
+    active = add_file(fake_supabase, "uploading", timedelta(minutes=5))
+    uploaded = add_file(fake_supabase, "uploaded", timedelta(days=10))
+
+    metrics = await reaper.run_once()
+
+    remaining = {row["id"] for row in fake_supabase.tables["user_files"]}
+    assert remaining == {active["id"], uploaded["id"]}
+    assert metrics.stale_rows_reaped == 2 and metrics.last_error is None
+    assert multipart_client.aborted == ["u1"]
+    assert idle["storage_path"] not in fake_supabase.objects
+    assert idle_multipart["storage_path"] not in fake_supabase.objects
+    assert active["storage_path"] in fake_supabase.objects
+
+
+async def test_activity_on_a_resumable_upload_postpones_reaping(reaper, fake_supabase):
+    row = add_file(fake_supabase, "uploading", timedelta(hours=2))
+
+    await reaper._file_repo.touch(row["id"], row["user_id"])
+    await reaper.run_once()
+
+    assert [stored["id"] for stored in fake_supabase.tables["user_files"]] == [row["id"]]
+
+
+async def test_only_one_lease_holder_at_a_time(fake_supabase):
+    repository = AsyncJobLeaseRepository(AsyncDBClient())
+    first, second = JobLease("upload_reaper", 60, repository), JobLease("upload_reaper", 60, repository)
+
+    assert await first.acquire()
+    assert not await second.acquire()
+    assert await first.acquire()  # the leader renews
+
+    await first.release()
+    assert await second.acquire()
+
+
+async def test_run_forever_skips_passes_without_the_lease(fake_supabase, multipart_client):
+    leader = JobLease("upload_reaper", 60)
+    assert await leader.acquire()
+    follower = UploadReaper(multipart_client=multipart_client, lease=JobLease("upload_reaper", 60))
+    follower.interval = 0.01
+
+    task = asyncio.create_task(follower.run_forever())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert follower.metrics.runs == 0
@@ -0,0 +1,101 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.models.enums import FileStatus
+from app.models.schemas import ConfirmUploadRequest, UploadURLRequest
+from app.utils.exceptions import FileValidationError
+
+CONFIRM = ConfirmUploadRequest(status=FileStatus.UPLOADED)
+
+
+class BlockingInfoBackend:
+    """Storage backend whose metadata lookups wait until ``release`` is set."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def create_signed_upload_url(self, path: str) -> str:
+        return f"http://storage.test/upload/{path}"
+
+    async def get_file_info(self, path: str) -> dict | None:
+        await self.release.wait()
+        return {"size": 4, "mime_type": "text/plain"}
+
+
+@pytest.fixture
+def verification_cache(file_facade):
+    from app.core.cache import UploadVerificationCache
+
+    file_facade._verification_cache = UploadVerificationCache()
+    return file_facade._verification_cache
+
+
+async def sign(file_facade, user_id: str, size_bytes: int = 4):
+    return await file_facade.generate_upload_url(user_id, UploadURLRequest(name="a.txt", size_bytes=size_bytes, mime_type="text/plain"))
+
+
+async def test_confirm_rejects_missing_object(file_facade, fake_supabase):
+    user_id = str(uuid.uuid4())
+    response = await sign(file_facade, user_id)
+
+    with pytest.raises(FileValidationError, match="not found"):
+        await file_facade.confirm_upload(user_id, str(response.file_id), CONFIRM)
+    assert fake_supabase.tables["user_files"][0]["status"] == "uploading"
+
+
+async def test_confirm_rejects_size_mismatch(file_facade, put_object, fake_supabase):
+    user_id = str(uuid.uuid4())
+    response = await sign(file_facade, user_id)
+    await put_object(response.upload_url, b"too long")
+
+    with pytest.raises(FileValidationError, match="8 bytes; expected 4"):
+        await file_facade.confirm_upload(user_id, str(response.file_id), CONFIRM)
+
+
+async def test_verified_upload_skips_storage_lookup_on_retry(file_facade, verification_cache, put_object, fake_supabase, upstream_requests):
+    user_id = str(uuid.uuid4())
+    response = await sign(file_facade, user_id)
+    await put_object(response.upload_url, b"data")
+
+    await file_facade.confirm_upload(user_id, str(response.file_id), CONFIRM)
+    # A retried confirm (the first response was lost) must not go back to Storage.
+    fake_supabase.tables["user_files"][0]["status"] = "uploading"
+    upstream_requests.clear()
+    await file_facade.confirm_upload(user_id, str(response.file_id), CONFIRM)
+
+    assert not [path for _, path in upstream_requests if "/storage/v1/object/info/" in path]
+    assert fake_supabase.tables["user_files"][0]["status"] == "uploaded"
+
+
+async def test_failed_verification_is_not_cached(file_facade, verification_cache, put_object):
+    user_id = str(uuid.uuid4())
+    response = await sign(file_facade, user_id)
+
+    with pytest.raises(FileValidationError):
+        await file_facade.confirm_upload(user_id, str(response.file_id), CONFIRM)
+    await put_object(response.upload_url, b"data")
+    confirmed = await file_facade.confirm_upload(user_id, str(response.file_id), CONFIRM)
+
+    assert confirmed.status == FileStatus.UPLOADED
+
+
+async def test_queued_info_lookups_do_not_hold_admission_slots(app_env):
+    from app.core.admission import UpstreamAdmission
+    from app.core.storage import AsyncStorageClient
+
+    app_env.setenv("STORAGE_INFO_CONCURRENCY", "1")
+    app_env.setenv("STORAGE_MAX_CONCURRENCY", "2")
+    backend = BlockingInfoBackend()
+    client = AsyncStorageClient(backend)
+
+    lookups = [asyncio.create_task(client.get_file_info(f"u/{index}.txt")) for index in range(5)]
+    await asyncio.sleep(0.01)
+
+    assert UpstreamAdmission().limiter("storage").in_use == 1
+    assert await client.create_signed_upload_url("u/new.txt") == "http://storage.test/upload/u/new.txt"
+
+    backend.release.set()
+    assert len(await asyncio.gather(*lookups)) == 5
+    assert UpstreamAdmission().limiter("storage").in_use == 0
@@ -6,6 +6,7 @@ import { confirmUpload, getUploadUrl } from "@/lib/backend-api";
 import {
   ALLOWED_MIME_TYPES,
   MAX_FILE_SIZE_BYTES,
+  computeSha256,
   formatFileSize,
 } from "@/lib/file-utils";
 import {
@@ -67,10 +68,19 @@ export function UploadFileModal({
         name: file.name,
         size_bytes: file.size,
         mime_type: file.type as AllowedMimeType,
+        sha256: await computeSha256(file),
       });
 
       createdFileId = uploadData.file_id;
 
+      // Identical content is already stored: the file is recorded as uploaded.
+      if (uploadData.already_present || !uploadData.upload_url) {
+        await onUploaded();
+        resetState();
+        onClose();
+        return;
+      }
+
       const UPLOAD_PUT_TIMEOUT_MS = 120_000; // 2 min for large files
       const uploadController = new AbortController();
       const uploadTimeoutId = setTimeout(
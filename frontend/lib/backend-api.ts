@@ -1,9 +1,17 @@
 import { createClient } from "@/utils/supabase/client";
 import type {
+  BatchDownloadUrlResponse,
+  BatchUploadUrlResponse,
+  BulkDeleteResponse,
   ConfirmUploadRequest,
   ConfirmUploadResponse,
   DownloadUrlResponse,
   FileListResponse,
+  FileSearchParams,
+  ResumablePartUrlsResponse,
+  ResumableUploadSessionResponse,
+  ResumableUploadStatusResponse,
+  StorageUsageResponse,
   UploadUrlRequest,
   UploadUrlResponse,
 } from "@/types/files";
@@ -92,6 +100,21 @@ export const listFiles = (skip = 0, limit = 20) => {
   );
 };
 
+export const searchFiles = (params: FileSearchParams) => {
+  const query = new URLSearchParams();
+  for (const [key, value] of Object.entries(params)) {
+    if (value === undefined || value === "") continue;
+    for (const item of Array.isArray(value) ? value : [value]) {
+      query.append(key, String(item));
+    }
+  }
+  return apiFetch<FileListResponse>(`/api/v1/files/search?${query}`);
+};
+
+export const getUsage = () => {
+  return apiFetch<StorageUsageResponse>("/api/v1/files/usage");
+};
+
 export const getUploadUrl = (payload: UploadUrlRequest) => {
   return apiFetch<UploadUrlResponse>("/api/v1/files/upload-url", {
     method: "POST",
@@ -99,6 +122,37 @@ export const getUploadUrl = (payload: UploadUrlRequest) => {
   });
 };
 
+export const getUploadUrls = (payload: UploadUrlRequest[]) => {
+  return apiFetch<BatchUploadUrlResponse>("/api/v1/files/upload-urls", {
+    method: "POST",
+    body: JSON.stringify({ files: payload }),
+  });
+};
+
+export const startResumableUpload = (payload: UploadUrlRequest) => {
+  return apiFetch<ResumableUploadSessionResponse>("/api/v1/files/resumable", {
+    method: "POST",
+    body: JSON.stringify(payload),
+  });
+};
+
+export const getResumableUploadStatus = (fileId: string) => {
+  return apiFetch<ResumableUploadStatusResponse>(`/api/v1/files/${fileId}/resumable`);
+};
+
+export const getResumablePartUrls = (fileId: string, partNumbers: number[]) => {
+  return apiFetch<ResumablePartUrlsResponse>(`/api/v1/files/${fileId}/resumable/parts`, {
+    method: "POST",
+    body: JSON.stringify({ part_numbers: partNumbers }),
+  });
+};
+
+export const finalizeResumableUpload = (fileId: string) => {
+  return apiFetch<ConfirmUploadResponse>(`/api/v1/files/${fileId}/resumable/complete`, {
+    method: "POST",
+  });
+};
+
 export const confirmUpload = (
   fileId: string,
   payload: ConfirmUploadRequest,
@@ -113,8 +167,36 @@ export const getDownloadUrl = (fileId: string) => {
   return apiFetch<DownloadUrlResponse>(`/api/v1/files/${fileId}/download-url`);
 };
 
+// Streams the file through the API instead of Storage; for when the presigned URL cannot be used.
+export const downloadFileContent = async (fileId: string): Promise<Blob> => {
+  const token = await getAccessToken();
+  const response = await fetchWithTimeout(
+    `${getBackendBaseUrl()}/api/v1/files/${fileId}/content`,
+    { headers: { Authorization: `Bearer ${token}` } },
+  );
+  if (!response.ok) {
+    const message = await response.text();
+    throw new Error(message || `Request failed with status ${response.status}`);
+  }
+  return response.blob();
+};
+
+export const getDownloadUrls = (fileIds: string[]) => {
+  return apiFetch<BatchDownloadUrlResponse>("/api/v1/files/download-urls", {
+    method: "POST",
+    body: JSON.stringify({ file_ids: fileIds }),
+  });
+};
+
 export const deleteFile = async (fileId: string): Promise<void> => {
   return apiFetch<void>(`/api/v1/files/${fileId}`, {
     method: "DELETE",
   });
 };
+
+export const deleteFiles = (fileIds: string[]) => {
+  return apiFetch<BulkDeleteResponse>("/api/v1/files/bulk-delete", {
+    method: "POST",
+    body: JSON.stringify({ file_ids: fileIds }),
+  });
+};
@@ -10,6 +10,13 @@ export const ALLOWED_MIME_TYPES: AllowedMimeType[] = [
 
 export const MAX_FILE_SIZE_BYTES = 10 * 1024 * 1024;
 
+export const computeSha256 = async (file: File) => {
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (byte) =>
+    byte.toString(16).padStart(2, "0"),
+  ).join("");
+};
+
 export const formatFileSize = (bytes: number) => {
   if (bytes < 1024) return `${bytes} B`;
   if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(2)} KB`;
@@ -31,21 +31,37 @@ export interface UserFile {
 
 export interface FileListResponse {
   files: UserFile[];
-  total: number;
+  total: number | null;
   skip: number;
   limit: number;
+  next_cursor: string | null;
+}
+
+export interface FileSearchParams {
+  q?: string;
+  prefix?: string;
+  mime_type?: AllowedMimeType[];
+  min_size?: number;
+  max_size?: number;
+  created_after?: string;
+  created_before?: string;
+  limit?: number;
+  cursor?: string;
+  count?: "exact" | "estimated" | "none";
 }
 
 export interface UploadUrlRequest {
   name: string;
   size_bytes: number;
   mime_type: AllowedMimeType;
+  sha256?: string;
 }
 
 export interface UploadUrlResponse {
   file_id: string;
-  upload_url: string;
+  upload_url: string | null;
   storage_path: string;
+  already_present: boolean;
 }
 
 export interface ConfirmUploadRequest {
@@ -57,8 +73,78 @@ export interface ConfirmUploadResponse {
   status: "uploaded" | "failed";
 }
 
+export interface StorageUsageResponse {
+  bytes_used: number;
+  file_count: number;
+  bytes_pending: number;
+  quota_bytes: number | null;
+  bytes_available: number | null;
+}
+
 export interface DownloadUrlResponse {
   file_id: string;
   download_url: string;
   expires_in: number;
 }
+
+export interface BatchDownloadUrlItem {
+  file_id: string;
+  download_url: string | null;
+  expires_in: number | null;
+  error: string | null;
+}
+
+export interface BatchDownloadUrlResponse {
+  results: BatchDownloadUrlItem[];
+}
+
+export interface BulkDeleteItem {
+  file_id: string;
+  deleted: boolean;
+  error: string | null;
+}
+
+export interface BulkDeleteResponse {
+  deleted_count: number;
+  results: BulkDeleteItem[];
+}
+
+export interface BatchUploadUrlItem {
+  index: number;
+  file_id: string | null;
+  upload_url: string | null;
+  storage_path: string | null;
+  error: string | null;
+}
+
+export interface BatchUploadUrlResponse {
+  results: BatchUploadUrlItem[];
+}
+
+export interface ResumableUploadSessionResponse {
+  file_id: string;
+  storage_path: string;
+  chunk_size: number;
+  total_parts: number;
+  max_concurrency: number;
+}
+
+export interface ResumableUploadStatusResponse {
+  file_id: string;
+  size_bytes: number;
+  chunk_size: number;
+  total_parts: number;
+  received_bytes: number;
+  received_ranges: [number, number][];
+  missing_parts: number[];
+}
+
+export interface ResumablePartUrl {
+  part_number: number;
+  upload_url: string;
+}
+
+export interface ResumablePartUrlsResponse {
+  parts: ResumablePartUrl[];
+  expires_in: number;
+}